@@ -1,7 +1,13 @@
 import os
 
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# See MIDDLEWARE in config/settings.py
+os.environ.setdefault('WHITENOISE_MIDDLEWARE', 'False')
 
-application = get_asgi_application()
+# Async views (questions/async_views.py) only run without a thread hop
+# under an ASGI server, e.g.:
+#   gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --workers 3
+application = ASGIStaticFilesHandler(get_asgi_application())
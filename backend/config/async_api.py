@@ -0,0 +1,75 @@
+"""Plumbing for the async read views (served through config/asgi.py).
+
+DRF views are synchronous, so the async endpoints are plain Django
+``async def`` views wrapped by ``async_api_view``, which gives them what
+APIView would: a DRF Request authenticated with
+DEFAULT_AUTHENTICATION_CLASSES, GET/HEAD only, DRF's error bodies
+(``{"detail": ...}``, WWW-Authenticate on 401) and JSON rendered by
+config.renderers.dumps, byte for byte what FastJSONRenderer sends.
+
+Requests an async view doesn't implement (sparse fieldsets, search, ...)
+are handed to the regular DRF view with ``delegate``.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from .renderers import dumps
+
+SAFE_METHODS = ('GET', 'HEAD')
+FORWARDED_HEADERS = ('WWW-Authenticate', 'Retry-After')
+
+
+def json_response(data, status=200):
+    response = HttpResponse(dumps(data), content_type='application/json', status=status)
+    response['Vary'] = 'Accept'
+    return response
+
+
+def error_response(exc):
+    """The response DRF's exception handler gives ``exc``, rendered as JSON"""
+    handled = exception_handler(exc, {})
+    if handled is None:
+        raise exc
+    response = json_response(handled.data, status=handled.status_code)
+    for header in FORWARDED_HEADERS:
+        if header in handled:
+            response[header] = handled[header]
+    return response
+
+
+async def authenticate(request):
+    """Wrap ``request`` in an authenticated DRF Request (the lookup runs in a thread)"""
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    drf_request = Request(request, authenticators=authenticators)
+    try:
+        await sync_to_async(getattr)(drf_request, 'user')
+    except exceptions.AuthenticationFailed as exc:
+        exc.auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+        raise
+    return drf_request
+
+
+def async_api_view(view):
+    """Decorate an ``async def view(request, *args, **kwargs)`` read endpoint"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            response = error_response(exceptions.MethodNotAllowed(request.method))
+            response['Allow'] = ', '.join(SAFE_METHODS)
+            return response
+        try:
+            return await view(await authenticate(request), *args, **kwargs)
+        except Exception as exc:
+            return error_response(exc)
+    return wrapper
+
+
+async def delegate(view, request, *args, **kwargs):
+    """Answer ``request`` with the synchronous (DRF) ``view``"""
+    return await sync_to_async(view)(request._request, *args, **kwargs)
@@ -0,0 +1,252 @@
+"""Per-request performance instrumentation.
+
+PerformanceMiddleware records the resolved view, wall time, number of DB
+queries, DB time and serializer time of every request, without needing
+DEBUG. The figures are sent back as a ``Server-Timing`` header to staff
+users only (SERVER_TIMING: 'staff'), to everyone ('all') or to no one
+('off'). Requests over the SLOW_REQUEST_MS or MAX_QUERIES thresholds are
+logged as a JSON line at WARNING on the ``performance`` logger, together
+with the SQL they ran, to track down N+1 regressions in production.
+Other requests are logged at INFO, which the default
+PERFORMANCE_LOG_LEVEL (WARNING) leaves out.
+
+Serializer time is measured with Django's view hooks rather than by
+patching DRF. It covers the rendering of DRF responses (from
+process_template_response to the end of render()) and the functions
+decorated with ``timed_serializer``. DRF serializers evaluate ``.data``
+inside the view, so that part is reported as view time, net of its
+queries.
+
+Configured with settings.PERFORMANCE_MONITOR, see DEFAULTS.
+"""
+import functools
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('performance')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': 'staff',
+    'SLOW_REQUEST_MS': 1000,
+    'MAX_QUERIES': 50,
+    'DUMP_SQL': True,
+    'MAX_CAPTURED_QUERIES': 200,
+}
+
+_current = ContextVar('performance_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self, capture_sql, max_captured):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        self.view_seconds = 0.0
+        # (perf_counter, db_seconds, serializer_seconds) when the view started
+        self.view_started = None
+        self.render_started = None
+        self.capture_sql = capture_sql
+        self.max_captured = max_captured
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Connection execute_wrapper: time and count every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_seconds += elapsed
+            if self.capture_sql and len(self.sql) < self.max_captured:
+                self.sql.append({'sql': sql, 'ms': round(elapsed * 1000, 3)})
+
+
+    def view_started_now(self):
+        self.view_started = (time.perf_counter(), self.db_seconds, self.serializer_seconds)
+
+    def view_ended_now(self):
+        """The view returned: its time net of queries and timed serializers is view time"""
+        if self.view_started is None:
+            return
+        start, db_seconds, serializer_seconds = self.view_started
+        self.view_started = None
+        self.view_seconds += (
+            time.perf_counter() - start
+            - (self.db_seconds - db_seconds)
+            - (self.serializer_seconds - serializer_seconds)
+        )
+
+    def render_ended(self, response):
+        """Post-render callback of a template response"""
+        if self.render_started is not None:
+            self.serializer_seconds += time.perf_counter() - self.render_started
+            self.render_started = None
+        return response
+
+
+def timed_serializer(function):
+    """Count a plain serialization function as serializer time"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return function(*args, **kwargs)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.serializer_depth -= 1
+            if stats.serializer_depth == 0:
+                stats.serializer_seconds += time.perf_counter() - start
+    return wrapper
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {**DEFAULTS, **getattr(settings, 'PERFORMANCE_MONITOR', {})}
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Spares the handler a thread hop per hook
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    @staticmethod
+    def view_starting():
+        stats = _current.get()
+        if stats is not None:
+            stats.view_started_now()
+
+    @staticmethod
+    def view_returned(response):
+        """DRF responses: the view is done and rendering starts after this hook"""
+        stats = _current.get()
+        if stats is not None:
+            stats.view_ended_now()
+            stats.render_started = time.perf_counter()
+            response.add_post_render_callback(stats.render_ended)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.view_starting()
+
+    def process_template_response(self, request, response):
+        return self.view_returned(response)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.view_starting()
+
+    async def aprocess_template_response(self, request, response):
+        return self.view_returned(response)
+
+    def shows_server_timing(self, request):
+        mode = self.config['SERVER_TIMING']
+        if mode == 'staff':
+            # Set by DRF authentication, or Django's session user
+            user = getattr(request, 'user', None)
+            return bool(user is not None and user.is_staff)
+        return mode in (True, 'all')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        stats = RequestStats(self.config['DUMP_SQL'], self.config['MAX_CAPTURED_QUERIES'])
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.watch_queries(stack, stats)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        self.report(request, response, stats, total_ms, self.shows_server_timing(request))
+        return response
+
+    async def __acall__(self, request):
+        if not self.config['ENABLED']:
+            return await self.get_response(request)
+
+        stats = RequestStats(self.config['DUMP_SQL'], self.config['MAX_CAPTURED_QUERIES'])
+        token = _current.set(stats)
+        start = time.perf_counter()
+        stack = ExitStack()
+        try:
+            # The async ORM runs queries in the request's sync thread, which
+            # has its own connection objects: install the wrapper there
+            await sync_to_async(self.watch_queries)(stack, stats)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        server_timing = self.config['SERVER_TIMING'] in (True, 'all')
+        if self.config['SERVER_TIMING'] == 'staff':
+            # request.user may be a lazy session lookup
+            server_timing = await sync_to_async(self.shows_server_timing)(request)
+        self.report(request, response, stats, total_ms, server_timing)
+        return response
+
+    @staticmethod
+    def watch_queries(stack, stats):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+
+    def report(self, request, response, stats, total_ms, server_timing):
+        # A view returning a plain response never reached process_template_response
+        stats.view_ended_now()
+        db_ms = stats.db_seconds * 1000
+        serializer_ms = stats.serializer_seconds * 1000
+        view_ms = stats.view_seconds * 1000
+        if server_timing:
+            timings = [
+                f'total;dur={total_ms:.1f}',
+                f'db;dur={db_ms:.1f};desc="{stats.queries} queries"',
+                f'view;dur={view_ms:.1f}',
+                f'serialize;dur={serializer_ms:.1f}',
+            ]
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = ', '.join(([existing] if existing else []) + timings)
+
+        match = getattr(request, 'resolver_match', None)
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'view': match._func_path if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(db_ms, 1),
+            'queries': stats.queries,
+            'view_ms': round(view_ms, 1),
+            'serializer_ms': round(serializer_ms, 1),
+        }
+        slow = total_ms > self.config['SLOW_REQUEST_MS']
+        chatty = stats.queries > self.config['MAX_QUERIES']
+        if slow or chatty:
+            entry['slow'] = slow
+            entry['too_many_queries'] = chatty
+            if stats.capture_sql:
+                entry['sql'] = stats.sql
+            logger.warning(json.dumps(entry))
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(entry))
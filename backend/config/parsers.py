@@ -0,0 +1,22 @@
+"""JSON request parsing with orjson, falling back to DRF's JSONParser."""
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+class FastJSONParser(parsers.JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        # orjson only reads UTF-8 and always rejects NaN/Infinity (STRICT_JSON)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8') or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
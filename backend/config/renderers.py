@@ -0,0 +1,114 @@
+"""JSON rendering with orjson.
+
+FastJSONRenderer renders the same JSON as DRF's JSONRenderer (compact,
+UTF-8, ``\\u2028``/``\\u2029`` escaped, dates in DRF's format) several
+times faster when orjson is installed, and falls back to the standard
+library otherwise or when the client asks for indented output. The bytes
+are identical except for exponents: orjson writes them without a sign
+or leading zero (``1e16`` where DRF writes ``1e+16``, ``1e-7`` for
+``1e-07``), and the parsed documents are equal. NaN and infinities,
+which orjson would write as ``null``, raise ValueError like DRF does.
+
+Large lists that don't need pagination can be sent as a chunked
+StreamingJSONResponse, so the whole document is never built in memory.
+"""
+import json
+import math
+
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# DRF encodes datetimes itself (millisecond precision, 'Z' for UTC), so
+# orjson hands them to the same encoder instead of using its own format
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def has_non_finite(data):
+    """True if a NaN or infinite float is nested in ``data``"""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite(value) for value in data)
+    return False
+
+
+def dumps(data):
+    """Compact UTF-8 JSON for ``data``, as JSONRenderer renders it (exponents aside, see above)"""
+    content = None
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, default=encoders.JSONEncoder().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits: let the standard library try
+            pass
+        # orjson writes NaN and infinities as null, the standard library raises ValueError
+        if content is not None and b'null' in content and has_non_finite(data):
+            content = None
+    if content is None:
+        content = json.dumps(
+            data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+        ).encode()
+    # Valid JSON but not valid JavaScript, escaped like DRF does
+    for raw, escaped in LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def iter_json_array(items, chunk_size=500):
+    """Encode ``items`` as a JSON array, ``chunk_size`` items per yielded chunk"""
+    yield b'['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(chunk)
+            chunk, first = [], False
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+
+
+def iter_json_lines(items, chunk_size=500):
+    """Encode ``items`` as newline-delimited JSON, ``chunk_size`` lines per chunk"""
+    chunk = []
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield b'\n'.join(chunk) + b'\n'
+            chunk = []
+    if chunk:
+        yield b'\n'.join(chunk) + b'\n'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """A JSON array response written out as ``items`` are consumed"""
+
+    def __init__(self, items, chunk_size=500, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(iter_json_array(items, chunk_size), **kwargs)
@@ -3,6 +3,7 @@ from datetime import timedelta
 from decouple import config
 import dj_database_url
 import os
+import sys
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,6 +46,7 @@ CORS_ALLOW_METHODS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -56,6 +58,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# WhiteNoise only runs synchronously: config/asgi.py turns it off and serves
+# static files itself, so the middleware chain stays async end to end
+if not config('WHITENOISE_MIDDLEWARE', default=True, cast=bool):
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -175,6 +182,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # orjson-backed JSON, see config/renderers.py; set JSON_RENDERER=rest_framework.renderers.JSONRenderer
+    # and JSON_PARSER=rest_framework.parsers.JSONParser to go back to the standard library
+    'DEFAULT_RENDERER_CLASSES': (
+        config('JSON_RENDERER', default='config.renderers.FastJSONRenderer'),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        config('JSON_PARSER', default='config.parsers.FastJSONParser'),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -184,6 +202,103 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Plain-dict serialization of the question and answer lists, see
+# questions/fast_serializers.py
+FAST_SERIALIZERS = config('FAST_SERIALIZERS', default=True, cast=bool)
+
+# Question view counter: hits are buffered and flushed as batched updates
+VIEW_COUNTER = {
+    'BACKEND': config('VIEW_COUNTER_BACKEND', default='questions.view_counter.LocalMemoryBuffer'),
+    'OPTIONS': {},
+    'FLUSH_INTERVAL': config('VIEW_COUNTER_FLUSH_INTERVAL', default=10, cast=int),
+    'DEDUP_WINDOW': config('VIEW_COUNTER_DEDUP_WINDOW', default=15 * 60, cast=int),
+    # Repeat views are remembered in the 'views' cache below
+    'CACHE': 'views',
+    # Reverse proxies in front of the app (1 on Render): the client IP is
+    # read from that many hops from the right of X-Forwarded-For
+    'TRUSTED_PROXIES': config('TRUSTED_PROXIES', default=0, cast=int),
+}
+
+# Question full-text search: 'auto' uses PostgreSQL tsvector search when
+# available, the in-process inverted index otherwise (see questions/search.py)
+QUESTION_SEARCH = {
+    'BACKEND': config('QUESTION_SEARCH_BACKEND', default='auto'),
+    'OPTIONS': {},
+}
+
+# Related/duplicate question suggestions (see questions/related.py). With a
+# PATH, workers memory-map the index written by build_related_index there.
+QUESTION_RELATED = {
+    'PATH': config('RELATED_INDEX_PATH', default=None),
+    'DIMENSIONS': config('RELATED_INDEX_DIMENSIONS', default=512, cast=int),
+    'REFRESH_INTERVAL': config('RELATED_INDEX_REFRESH_INTERVAL', default=60, cast=int),
+    'DUPLICATE_THRESHOLD': config('RELATED_DUPLICATE_THRESHOLD', default=0.5, cast=float),
+}
+
+# Caches. The 'responses' cache holds anonymous API responses and must be
+# shared by all workers (filesystem or Redis): invalidations are
+# per-process with local memory. For Redis set the backend to
+# django.core.cache.backends.redis.RedisCache and the location to its URL.
+RESPONSE_CACHE_BACKEND = config(
+    'RESPONSE_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    },
+    'responses': {
+        'BACKEND': RESPONSE_CACHE_BACKEND,
+        'LOCATION': config('RESPONSE_CACHE_LOCATION', default=str(BASE_DIR / 'response_cache')),
+        'TIMEOUT': None,
+        'OPTIONS': {} if 'redis' in RESPONSE_CACHE_BACKEND.lower() else {'MAX_ENTRIES': 10000},
+    },
+    # Repeat-view keys of the view counter, one add() per view: needs an
+    # atomic add(). Local memory dedups per worker; use Redis to share it.
+    'views': {
+        'BACKEND': config('VIEW_DEDUP_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('VIEW_DEDUP_CACHE_LOCATION', default='question-views'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Anonymous GETs of questions and tags, invalidated by questions.signals
+RESPONSE_CACHE = {
+    'ENABLED': config('RESPONSE_CACHE', default=True, cast=bool),
+    'CACHE': 'responses',
+    'TIMEOUT': None,
+}
+
+# Per-request timings: JSON lines on the 'performance' logger, plus a
+# Server-Timing header for 'staff' users, 'all' clients or 'off'
+# (it reveals query counts and timings)
+PERFORMANCE_MONITOR = {
+    'ENABLED': config('PERFORMANCE_MONITOR', default=True, cast=bool),
+    'SERVER_TIMING': config('SERVER_TIMING', default='staff'),
+    'SLOW_REQUEST_MS': config('SLOW_REQUEST_MS', default=1000, cast=int),
+    'MAX_QUERIES': config('SLOW_REQUEST_MAX_QUERIES', default=50, cast=int),
+    'DUMP_SQL': config('SLOW_REQUEST_DUMP_SQL', default=True, cast=bool),
+}
+
+# Keeps the request log out of the test runner's output
+TESTING = sys.argv[1:2] == ['test']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # WARNING: slow or query-heavy requests only, INFO: every request
+        'performance': {
+            'handlers': ['console'],
+            'level': 'ERROR' if TESTING else config('PERFORMANCE_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -0,0 +1,175 @@
+"""Sparse fieldsets for API responses.
+
+Without ``?fields=`` responses keep their full shape. With it, only the
+listed fields are rendered:
+
+    ?fields=id,title,author.username,tags.name
+
+Nested objects listed without sub-fields are rendered as their primary
+key(s) unless they are also listed in ``?expand=``:
+
+    ?fields=id,title,author,tags            -> "author": 3, "tags": [1, 7]
+    ?fields=id,title,author&expand=author   -> "author": {...full user...}
+
+Only GET requests are affected. Fields that are dropped are never
+computed, and querysets use the same FieldSpec to skip the prefetches and
+annotations behind them (see questions.models.QuestionQuerySet). Views
+using SparseFieldsViewMixin answer 400 with the available paths when a
+requested one does not exist.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSpec:
+    """Requested shape of one serializer's output.
+
+    ``include`` is a tree of field names, None meaning every field;
+    ``expand`` the tree of nested objects to render in full.
+    """
+
+    def __init__(self, include=None, expand=None):
+        self.include = include
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method != 'GET' or 'fields' not in request.query_params:
+            return FULL
+        params = request.query_params
+        return cls(parse_paths(params['fields']), parse_paths(params.get('expand', '')))
+
+    @property
+    def is_full(self):
+        return self.include is None
+
+    def wants(self, name):
+        return self.include is None or name in self.include
+
+    def expanded(self, name):
+        """Whether the nested object ``name`` is rendered as an object (not as its key)"""
+        if self.include is None:
+            return True
+        return name in self.include and (bool(self.include[name]) or name in self.expand)
+
+    def child(self, name):
+        if self.include is None:
+            return FULL
+        return FieldSpec(self.include.get(name) or None, self.expand.get(name))
+
+
+FULL = FieldSpec()
+
+
+class SparseFieldsMixin:
+    """Serializer mixin applying the FieldSpec of the request.
+
+    Nested serializers receive their part of the spec from their parent.
+    """
+
+    @property
+    def field_spec(self):
+        spec = getattr(self, '_field_spec', None)
+        if spec is None:
+            parent = getattr(self, 'parent', None)
+            if isinstance(parent, serializers.ListSerializer):
+                parent = getattr(parent, 'parent', None)
+            spec = FieldSpec.from_request(self.context.get('request')) if parent is None else FULL
+            self._field_spec = spec
+        return spec
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.field_spec
+        if spec.is_full:
+            return fields
+        for name in list(fields):
+            field = fields[name]
+            if field.write_only:
+                continue
+            if not spec.wants(name):
+                del fields[name]
+                continue
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            if spec.expanded(name):
+                nested._field_spec = spec.child(name)
+            else:
+                kwargs = {'source': field.source} if field.source else {}
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many, **kwargs)
+        return fields
+
+
+def readable_fields(serializer):
+    """{name: nested serializer or None} of the fields ``serializer`` can render"""
+    readable = {}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        readable[name] = nested if isinstance(nested, serializers.BaseSerializer) else None
+    return readable
+
+
+def available_paths(serializer, prefix=''):
+    paths = []
+    for name, nested in readable_fields(serializer).items():
+        paths.append(prefix + name)
+        if nested is not None:
+            paths.extend(available_paths(nested, f'{prefix}{name}.'))
+    return paths
+
+
+def unknown_paths(tree, serializer, nested_only=False, prefix=''):
+    """Dotted paths of ``tree`` that ``serializer`` has no field for"""
+    fields = readable_fields(serializer)
+    unknown = []
+    for name, children in tree.items():
+        nested = fields.get(name)
+        if name not in fields or (nested is None and (children or nested_only)):
+            unknown.append(prefix + name)
+        elif children:
+            unknown.extend(unknown_paths(children, nested, nested_only, f'{prefix}{name}.'))
+    return unknown
+
+
+def check_fields(request, serializer_class):
+    """Raise a 400 when ?fields= or ?expand= name paths ``serializer_class`` does not render"""
+    spec = FieldSpec.from_request(request)
+    if spec.is_full:
+        return
+    serializer = serializer_class(context={'request': request})
+    serializer._field_spec = FULL
+    errors = {}
+    if not spec.include:
+        errors['fields'] = ["Indiquez au moins un champ."]
+    unknown = unknown_paths(spec.include, serializer)
+    if unknown:
+        errors['fields'] = [f"Champs inconnus : {', '.join(unknown)}."]
+    unknown = unknown_paths(spec.expand, serializer, nested_only=True)
+    if unknown:
+        errors['expand'] = [f"Objets imbriqués inconnus : {', '.join(unknown)}."]
+    if errors:
+        errors['available_fields'] = available_paths(serializer)
+        raise ValidationError(errors)
+
+
+class SparseFieldsViewMixin:
+    """Generic view mixin rejecting ?fields= / ?expand= paths its serializer does not have"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        check_fields(request, self.get_serializer_class())
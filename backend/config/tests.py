@@ -0,0 +1,77 @@
+import datetime
+import decimal
+import json
+import math
+import uuid
+from unittest import skipIf
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONRenderer, orjson
+
+
+@skipIf(orjson is None, "orjson is not installed")
+class FastJSONRendererTests(SimpleTestCase):
+    def render_both(self, data):
+        return FastJSONRenderer().render(data), JSONRenderer().render(data)
+
+    def test_same_bytes_as_drf(self):
+        samples = [
+            {'id': 1, 'title': 'Qu’est-ce que Django ?', 'tags': ['python', 'django'], 'accepted': None},
+            {'line': 'a\u2028b\u2029c', 'emoji': '\U0001F600', 'flag': True, 'nested': {'list': [1, [2, [3]]]}},
+            {1: 'non-string key', 'score': -3, 'big': 2 ** 70},
+            {'created_at': datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)},
+            {'day': datetime.date(2024, 1, 2), 'time': datetime.time(3, 4, 5), 'duration': datetime.timedelta(hours=1)},
+            {'amount': decimal.Decimal('12.50'), 'uuid': uuid.UUID(int=42)},
+            {'similarity': 0.123, 'ratio': 12345678.9, 'zero': -0.0, 'whole': 3.0},
+            [],
+            '',
+        ]
+        for data in samples:
+            with self.subTest(data=data):
+                fast, drf = self.render_both(data)
+                self.assertEqual(fast, drf)
+
+    def test_exponent_floats_differ_only_in_formatting(self):
+        data = {'large': 1e16, 'small': 1e-7, 'huge': 1.5e300}
+        fast, drf = self.render_both(data)
+        self.assertEqual(fast, b'{"large":1e16,"small":1e-7,"huge":1.5e300}')
+        self.assertEqual(drf, b'{"large":1e+16,"small":1e-07,"huge":1.5e+300}')
+        self.assertEqual(json.loads(fast), json.loads(drf))
+
+    def test_non_finite_floats(self):
+        for value in (math.nan, math.inf, -math.inf):
+            with self.subTest(value=value):
+                for renderer in (JSONRenderer(), FastJSONRenderer()):
+                    with self.assertRaises(ValueError):
+                        renderer.render({'value': value, 'nested': [{'value': value}]})
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render([1.5, {'list': (None, value)}])
+        self.assertEqual(FastJSONRenderer().render({'value': None, 'ratio': 1.5}), b'{"value":null,"ratio":1.5}')
+
+    def test_indented_output_uses_drf(self):
+        data = {'large': 1e16}
+        context = {'indent': 2}
+        self.assertEqual(
+            FastJSONRenderer().render(data, renderer_context=context),
+            JSONRenderer().render(data, renderer_context=context),
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, RESPONSE_CACHE={'ENABLED': False})
+class PerformanceLogTests(TestCase):
+    def test_requests_under_the_thresholds_are_logged_at_info(self):
+        with self.assertLogs('performance', 'INFO') as logs:
+            self.client.get('/api/questions/')
+        self.assertEqual([record.levelname for record in logs.records], ['INFO'])
+        with self.assertNoLogs('performance', 'WARNING'):
+            self.client.get('/api/questions/')
+
+    @override_settings(PERFORMANCE_MONITOR={'MAX_QUERIES': 0})
+    def test_requests_over_the_thresholds_are_warnings(self):
+        with self.assertLogs('performance', 'WARNING') as logs:
+            self.client.get('/api/questions/')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertTrue(entry['too_many_queries'])
+        self.assertIn('sql', entry)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Question, Answer, Comment, Tag, Vote
+from .models import Question, Answer, Comment, Tag, Vote, ReputationEvent
 
 
 @admin.register(Tag)
@@ -10,7 +10,7 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'created_at', 'views']
+    list_display = ['title', 'author', 'created_at', 'views', 'score', 'answer_count']
     list_filter = ['created_at', 'tags']
     search_fields = ['title', 'content']
     filter_horizontal = ['tags']
@@ -18,7 +18,7 @@ class QuestionAdmin(admin.ModelAdmin):
 
 @admin.register(Answer)
 class AnswerAdmin(admin.ModelAdmin):
-    list_display = ['question', 'author', 'is_accepted', 'created_at']
+    list_display = ['question', 'author', 'is_accepted', 'score', 'created_at']
     list_filter = ['is_accepted', 'created_at']
 
 
@@ -32,3 +32,10 @@ class CommentAdmin(admin.ModelAdmin):
 class VoteAdmin(admin.ModelAdmin):
     list_display = ['user', 'value', 'question', 'answer', 'created_at']
     list_filter = ['value', 'created_at']
+
+
+@admin.register(ReputationEvent)
+class ReputationEventAdmin(admin.ModelAdmin):
+    list_display = ['user', 'reason', 'delta', 'votes_delta', 'created_at']
+    list_filter = ['reason', 'created_at']
+    raw_id_fields = ['user', 'question', 'answer']
@@ -0,0 +1,151 @@
+"""Async versions of the hot read endpoints, for the ASGI server.
+
+Each one mirrors its DRF view (same JSON, caching, validators and view
+counting) with the queries going through Django's async ORM, so a worker
+keeps serving other requests while one waits on the database:
+
+- /api/async/questions/           QuestionListCreateView (GET)
+- /api/async/questions/<pk>/      QuestionDetailView (GET)
+- /api/async/answers/<pk>/        AnswerDetailView (GET)
+- /api/async/tags/                TagListView
+- /api/auth/async/users/<pk>/     users.views.UserDetailView
+
+Only the full shape on the keyset-paginated orderings is implemented;
+anything else (``?fields=``, search, ``?ordering=``, page numbers,
+django-filter's ``?tags=``, the streamed tag list) is answered by the
+DRF view itself. See the benchmark_asgi command for a throughput
+comparison with the WSGI deployment.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+
+from config.async_api import async_api_view, delegate, json_response
+from . import conditional, fast_serializers, response_cache
+from .models import Answer, Question, Vote
+from .pagination import KeysetPagination, TagPagination
+from .tag_directory import filter_by_prefix, get_tag_directory
+from .view_counter import get_view_counter, viewer_key
+from .views import (
+    VALIDATOR_FIELDS,
+    AnswerDetailView,
+    QuestionDetailView,
+    QuestionListCreateView,
+    TagListView,
+)
+
+LIST_PARAMS = {'tag', 'unanswered', 'unaccepted', 'sort', 'cursor', 'page_size', 'count'}
+
+sync_question_list = QuestionListCreateView.as_view()
+sync_question_detail = QuestionDetailView.as_view()
+sync_answer_detail = AnswerDetailView.as_view()
+sync_tag_list = TagListView.as_view()
+
+
+def with_cache_status(response, cache_status):
+    if cache_status is not None:
+        response['X-Cache'] = cache_status
+    return response
+
+
+@async_api_view
+async def question_list(request):
+    view = QuestionListCreateView()
+    view.request = request
+    ordering = view.get_keyset_ordering()
+    if not fast_serializers.enabled(request) or ordering is None or not set(request.query_params) <= LIST_PARAMS:
+        return await delegate(sync_question_list, request)
+
+    async def build():
+        paginator = KeysetPagination()
+        rows = await paginator.apaginate_queryset(view.get_queryset(), request, ordering)
+        return paginator.get_paginated_data(await fast_serializers.aquestion_list(rows, request))
+
+    data, cache_status = await response_cache.acached_data(request, [response_cache.QUESTION_LIST], build)
+    return with_cache_status(json_response(data), cache_status)
+
+
+@async_api_view
+async def question_detail(request, pk):
+    if not fast_serializers.enabled(request):
+        return await delegate(sync_question_detail, request, pk=pk)
+
+    cache = response_cache.get_response_cache() if response_cache.cacheable(request) else None
+    key = await sync_to_async(cache.key)(request, response_cache.question_scope(pk)) if cache else None
+    entry = await sync_to_async(cache.get)(key) if key else None
+    if entry is not None:
+        state, data = entry
+    else:
+        state = await Question.objects.filter(pk=pk).values(*VALIDATOR_FIELDS).afirst()
+        if state is None:
+            raise Http404
+
+    etag, last_modified = conditional.make_validators(
+        'question', pk, state['version'], state['views'], response_cache.normalized_query(request),
+        user=request.user, updated_at=state['updated_at'], last_activity_at=state['last_activity_at'],
+    )
+    not_modified = conditional.not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    counter = get_view_counter()
+    await sync_to_async(counter.hit)(pk, viewer=viewer_key(request, counter.trusted_proxies))
+
+    if entry is None:
+        row = await Question.objects.filter(pk=pk).values(*fast_serializers.QUESTION_DETAIL_FIELDS).afirst()
+        if row is None:
+            raise Http404
+        question_vote, answer_votes = None, {}
+        if request.user.is_authenticated:
+            question_vote, answer_votes = await Vote.avalues_for_question(request.user, pk)
+        data = await fast_serializers.aquestion_detail(row, request, question_vote, answer_votes)
+        if key:
+            await sync_to_async(cache.set)(key, (state, data))
+
+    pending = await sync_to_async(counter.pending)(pk)
+    response = json_response({**data, 'views': data['views'] + pending})
+    if key:
+        response['X-Cache'] = 'HIT' if entry is not None else 'MISS'
+    return conditional.set_validators(response, etag, last_modified)
+
+
+@async_api_view
+async def answer_detail(request, pk):
+    if not fast_serializers.enabled(request):
+        return await delegate(sync_answer_detail, request, pk=pk)
+
+    row = await Answer.objects.filter(pk=pk).values(
+        *fast_serializers.ANSWER_FIELDS, 'question__version', 'question__last_activity_at'
+    ).afirst()
+    if row is None:
+        raise Http404
+    etag, last_modified = conditional.make_validators(
+        'answer', pk, row['question__version'], response_cache.normalized_query(request),
+        user=request.user, updated_at=row['updated_at'], last_activity_at=row['question__last_activity_at'],
+    )
+    not_modified = conditional.not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    answer_votes = None
+    if request.user.is_authenticated:
+        answer_votes = await Vote.avalues_for_answers(request.user, [pk])
+    answers = await fast_serializers.aanswer_list([row], request, answer_votes)
+    return conditional.set_validators(json_response(answers[0]), etag, last_modified)
+
+
+@async_api_view
+async def tag_list(request):
+    if request.query_params.get('page_size') == 'all':
+        return await delegate(sync_tag_list, request)
+
+    async def build():
+        entries = await sync_to_async(get_tag_directory)()
+        prefix = request.query_params.get('prefix', None)
+        if prefix:
+            entries = filter_by_prefix(entries, prefix)
+        paginator = TagPagination()
+        page = paginator.paginate_queryset(entries, request)
+        return paginator.get_paginated_response(page).data
+
+    data, cache_status = await response_cache.acached_data(request, [response_cache.TAG_LIST], build)
+    return with_cache_status(json_response(data), cache_status)
@@ -0,0 +1,144 @@
+"""Helpers shared by the benchmark management commands.
+
+Requests go through the Django test client, so the whole stack
+(middleware, authentication, serializers) is measured, without a network
+hop, except for http_load() which drives a running server over HTTP.
+Results are plain dicts ready to be dumped as JSON.
+"""
+import asyncio
+import json
+import math
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(timings_ms, query_counts=None):
+    summary = {
+        'requests': len(timings_ms),
+        'mean_ms': round(statistics.fmean(timings_ms), 3),
+        'p50_ms': round(percentile(timings_ms, 50), 3),
+        'p90_ms': round(percentile(timings_ms, 90), 3),
+        'p95_ms': round(percentile(timings_ms, 95), 3),
+        'p99_ms': round(percentile(timings_ms, 99), 3),
+        'max_ms': round(max(timings_ms), 3),
+    }
+    if query_counts:
+        summary['queries_mean'] = round(statistics.fmean(query_counts), 2)
+        summary['queries_max'] = max(query_counts)
+    return summary
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class ApiClient:
+    """Test client speaking JWT, over HTTPS so SECURE_SSL_REDIRECT does not interfere"""
+
+    def __init__(self, user=None):
+        self.client = Client()
+        self.headers = {}
+        if user is not None:
+            token = RefreshToken.for_user(user).access_token
+            self.headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    def request(self, method, path, data=None):
+        if data is None:
+            return self.client.generic(method, path, secure=True, **self.headers)
+        return self.client.generic(
+            method, path, data=data, content_type='application/json', secure=True, **self.headers
+        )
+
+
+def measure_endpoint(client, method, path, body=None, requests=50, warmup=1):
+    """Time ``requests`` calls; body may be a callable of the iteration number"""
+    encode = body if callable(body) else (lambda i: body)
+    for i in range(warmup):
+        client.request(method, path, _json(encode(i)))
+    timings, query_counts, status = [], [], None
+    for i in range(requests):
+        payload = _json(encode(i))
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.request(method, path, payload)
+            timings.append((time.perf_counter() - start) * 1000)
+        query_counts.append(len(queries.captured_queries))
+        status = response.status_code
+    return {'method': method, 'path': path, 'status': status, **summarize(timings, query_counts)}
+
+
+def _json(body):
+    return None if body is None else json.dumps(body)
+
+
+async def _http_get(host, port, path, headers):
+    """One GET on a fresh connection: (status, latency in ms)"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f'GET {path} HTTP/1.1', f'Host: {host}', 'Connection: close']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, (time.perf_counter() - start) * 1000
+
+
+async def _http_load(host, port, path, headers, concurrency, requests):
+    remaining = iter(range(requests))
+    timings, statuses = [], {}
+
+    async def client():
+        for _ in remaining:
+            try:
+                status, elapsed = await _http_get(host, port, path, headers)
+            except OSError:
+                status, elapsed = 0, 0.0
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                timings.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return timings, statuses, time.perf_counter() - start
+
+
+def http_load(host, port, path, headers=None, concurrency=10, requests=500):
+    """GET ``path`` ``requests`` times from ``concurrency`` concurrent clients"""
+    timings, statuses, elapsed = asyncio.run(
+        _http_load(host, port, path, headers or {}, concurrency, requests)
+    )
+    report = {
+        'path': path,
+        'concurrency': concurrency,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(timings) / elapsed, 1),
+    }
+    if timings:
+        report.update(summarize(timings))
+    return report
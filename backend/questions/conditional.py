@@ -0,0 +1,44 @@
+"""Conditional GET for the question and answer detail endpoints.
+
+Validators come from a few columns read in one query, before any
+serializer runs:
+
+- the strong ETag hashes the question's ``updated_at`` and ``version``
+  (bumped by questions.signals when answers, comments or votes change),
+  the view count, the query string (sparse fieldsets) and the caller,
+  since ``user_vote`` depends on them;
+- Last-Modified is the later of ``updated_at`` and ``last_activity_at``.
+
+A matching ``If-None-Match`` (or, without one, ``If-Modified-Since``)
+gets a 304 from Django's get_conditional_response. Author cards embedded
+in the payload (reputation, post counts) are not part of the validators.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_validators(*parts, user, updated_at, last_activity_at):
+    """(ETag, Last-Modified timestamp) for the given state and caller"""
+    viewer = user.pk if user.is_authenticated else 'anonymous'
+    raw = ':'.join(str(part) for part in (*parts, updated_at.isoformat(), viewer))
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    return etag, int(max(updated_at, last_activity_at).timestamp())
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when the client's copy is current, else None"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Let browsers store the response but always revalidate it
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
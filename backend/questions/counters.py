@@ -0,0 +1,100 @@
+"""Maintenance of the denormalized counters stored on Question and Answer.
+
+Write paths (votes, new answers, accepted answers) call these helpers inside
+their own transaction; deletes are handled by the receivers in
+questions.signals so that cascades are covered too. The signals also bump
+the question version with ``touch_questions``. ``rebuild_counters``
+recomputes everything from the source tables to repair drift (run
+ranking.rebuild_hot_scores after it). A score is the sum of the votes
+plus ``imported_score``, the part of an imported archive's score that
+came without its votes.
+"""
+from django.db.models import Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from .models import Answer, Question, Vote, count_subquery
+from .ranking import hot_score_expression
+
+
+def vote_delta(old_value, new_value):
+    """Score change when a vote goes from old_value to new_value (None = no vote)"""
+    return (new_value or 0) - (old_value or 0)
+
+
+def question_vote_changed(question_id, old_value, new_value):
+    delta = vote_delta(old_value, new_value)
+    if delta:
+        Question.objects.filter(pk=question_id).update(
+            score=F('score') + delta,
+            hot_score=hot_score_expression(score=F('score') + delta),
+        )
+
+
+def answer_vote_changed(answer_id, old_value, new_value):
+    delta = vote_delta(old_value, new_value)
+    if delta:
+        Answer.objects.filter(pk=answer_id).update(score=F('score') + delta)
+
+
+def answer_added(question_id):
+    Question.objects.filter(pk=question_id).update(
+        answer_count=F('answer_count') + 1,
+        hot_score=hot_score_expression(answer_count=F('answer_count') + 1),
+    )
+
+
+def answer_removed(question_id, was_accepted=False):
+    updates = {
+        'answer_count': F('answer_count') - 1,
+        'hot_score': hot_score_expression(answer_count=F('answer_count') - 1),
+    }
+    if was_accepted:
+        updates['has_accepted'] = False
+    Question.objects.filter(pk=question_id, answer_count__gt=0).update(**updates)
+
+
+def answer_accepted(question_id):
+    Question.objects.filter(pk=question_id).update(has_accepted=True)
+
+
+def touch_questions(question_ids):
+    """Bump the version and activity date read by the question ETags.
+
+    Also refreshes the hot score (questions/ranking.py), for the score
+    updates that don't go through this module (questions.voting).
+    """
+    if question_ids:
+        Question.objects.filter(pk__in=question_ids).update(
+            version=F('version') + 1,
+            last_activity_at=Now(),
+            hot_score=hot_score_expression(),
+        )
+
+
+def score_subquery(vote_model, target_field):
+    """Sum of vote values per target row, usable in annotate() and update()"""
+    totals = (
+        vote_model.objects
+        .filter(**{target_field: OuterRef('pk')})
+        .order_by()
+        .values(target_field)
+        .annotate(total=Sum('value'))
+        .values('total')
+    )
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def rebuild_counters():
+    """Recompute every stored counter with one UPDATE per table.
+
+    Returns the number of (questions, answers) rows touched.
+    """
+    answers = Answer.objects.update(score=F('imported_score') + score_subquery(Vote, 'answer'))
+    questions = Question.objects.update(
+        score=F('imported_score') + score_subquery(Vote, 'question'),
+        answer_count=count_subquery(Answer, 'question'),
+        has_accepted=Exists(
+            Answer.objects.filter(question=OuterRef('pk'), is_accepted=True)
+        ),
+    )
+    return questions, answers
@@ -0,0 +1,176 @@
+"""Streaming export of the Q&A corpus.
+
+One JSON document per question, with its tags, answers and comments
+nested, written as newline-delimited JSON (optionally gzip-compressed).
+Used by the export_corpus command and the admin-only /api/export/
+endpoint.
+
+Questions are read through ``iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) and their answers, comments, tags and authors are
+fetched one batch of ``chunk_size`` questions at a time, so memory stays
+bounded whatever the size of the corpus.
+
+Incremental exports pass ``since``: only questions created, edited or
+with activity (answers, comments, votes, see counters.touch_questions)
+at or after that time are exported, each one in full. Deletions are not
+reported. Pass the ``started`` time of the previous export as the next
+``since`` so nothing written during an export is missed.
+
+Under ASGI, Django reads a synchronous iterator given to
+StreamingHttpResponse to the end before sending anything; the endpoint
+wraps the chunks with async_chunks() there to keep streaming.
+"""
+import datetime
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from config.renderers import iter_json_lines
+from .models import Answer, Comment, Question, User
+
+DEFAULT_CHUNK_SIZE = 500
+
+QUESTION_FIELDS = (
+    'id', 'title', 'content', 'author_id', 'score', 'views', 'answer_count', 'has_accepted',
+    'created_at', 'updated_at', 'last_activity_at',
+)
+ANSWER_FIELDS = ('id', 'question_id', 'author_id', 'content', 'is_accepted', 'score', 'created_at', 'updated_at')
+COMMENT_FIELDS = ('id', 'answer_id', 'author_id', 'content', 'created_at')
+
+
+def parse_since(value):
+    """Aware datetime for an ISO 8601 date or datetime, ValueError if invalid"""
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"invalid date: {value!r}")
+        since = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def changed_questions(since=None):
+    questions = Question.objects.order_by('id')
+    if since is not None:
+        questions = questions.filter(Q(updated_at__gte=since) | Q(last_activity_at__gte=since))
+    return questions
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def export_batch(questions):
+    """Export documents for one batch of question rows, in 4 queries"""
+    question_ids = [row['id'] for row in questions]
+    tags = defaultdict(list)
+    links = (
+        Question.tags.through.objects.filter(question_id__in=question_ids)
+        .order_by('tag__name').values_list('question_id', 'tag__name')
+    )
+    for question_id, name in links:
+        tags[question_id].append(name)
+    answers = list(
+        Answer.objects.filter(question_id__in=question_ids)
+        .order_by('question_id', 'created_at', 'id').values(*ANSWER_FIELDS)
+    )
+    comments = defaultdict(list)
+    comment_rows = list(
+        Comment.objects.filter(answer__question_id__in=question_ids)
+        .order_by('answer_id', 'created_at', 'id').values(*COMMENT_FIELDS)
+    )
+    author_ids = {row['author_id'] for rows in (questions, answers, comment_rows) for row in rows}
+    usernames = dict(User.objects.filter(pk__in=author_ids).values_list('id', 'username'))
+
+    def author(row):
+        return {'id': row['author_id'], 'username': usernames.get(row['author_id'])}
+
+    for row in comment_rows:
+        comments[row['answer_id']].append({
+            'id': row['id'],
+            'author': author(row),
+            'content': row['content'],
+            'created_at': row['created_at'],
+        })
+    question_answers = defaultdict(list)
+    for row in answers:
+        question_answers[row['question_id']].append({
+            'id': row['id'],
+            'author': author(row),
+            'content': row['content'],
+            'is_accepted': row['is_accepted'],
+            'score': row['score'],
+            'comments': comments.get(row['id'], []),
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        })
+    for row in questions:
+        yield {
+            'id': row['id'],
+            'title': row['title'],
+            'content': row['content'],
+            'author': author(row),
+            'tags': tags.get(row['id'], []),
+            'score': row['score'],
+            'views': row['views'],
+            'answer_count': row['answer_count'],
+            'has_accepted_answer': row['has_accepted'],
+            'answers': question_answers.get(row['id'], []),
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'last_activity_at': row['last_activity_at'],
+        }
+
+
+def export_documents(since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export document of every (changed) question, by id"""
+    rows = changed_questions(since).values(*QUESTION_FIELDS).iterator(chunk_size=chunk_size)
+    for batch in batches(rows, chunk_size):
+        yield from export_batch(batch)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks into one gzip stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(since=None, chunk_size=DEFAULT_CHUNK_SIZE, compress=False):
+    """NDJSON bytes of the export, gzip-compressed with ``compress``"""
+    chunks = iter_json_lines(export_documents(since, chunk_size), chunk_size)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+async def async_chunks(chunks):
+    """Async iterator over the byte chunks of ``chunks``, one sync_to_async() step per chunk.
+
+    The steps are thread-sensitive, so the database cursor behind the
+    chunks is only used from one thread.
+    """
+    chunks = iter(chunks)
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await step(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Client gone: release the cursor from the same thread
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,237 @@
+"""Plain-dict serialization for the hot read endpoints.
+
+The question list and answer list endpoints spend most of their CPU time
+in DRF's field-by-field serialization once their queries are fixed. The
+functions here build the same output straight from ``.values()`` rows
+and id-keyed maps:
+
+- question_list(): QuestionListSerializer(many=True) output
+- answer_list(): AnswerSerializer(many=True) output
+
+The JSON they render to is byte-identical to the DRF serializers' (see
+questions/tests/test_fast_serializers.py and the benchmark_serializers
+command, which check it). They only cover the
+full shape: sparse fieldsets and writes go through the regular
+serializers. Turned off with settings.FAST_SERIALIZERS = False.
+
+The queries are kept apart from the pure ``*_entry``/``*_entries``
+builders so the async views (questions.async_views) can run them through
+the async ORM: aquestion_list(), aanswer_list() and aquestion_detail()
+(QuestionDetailSerializer output).
+"""
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import serializers
+
+from config.middleware import timed_serializer
+from config.sparse_fields import FieldSpec
+from .models import Answer, Comment, Question, Tag, User, users_with_post_counts
+from .tag_directory import build_tag_directory, get_tag_directory
+
+QUESTION_LIST_FIELDS = (
+    'id', 'title', 'author_id', 'score', 'answer_count', 'has_accepted', 'views', 'created_at',
+    'hot_score',  # keyset cursor of the hot feeds
+)
+QUESTION_DETAIL_FIELDS = (
+    'id', 'title', 'content', 'author_id', 'score', 'answer_count', 'views', 'created_at', 'updated_at',
+)
+ANSWER_FIELDS = ('id', 'question_id', 'author_id', 'content', 'is_accepted', 'score', 'created_at', 'updated_at')
+COMMENT_FIELDS = ('id', 'answer_id', 'author_id', 'content', 'created_at')
+USER_FIELDS = ('id', 'username', 'email', 'bio', 'avatar', 'reputation', 'created_at')
+
+# DRF's own formatting, so dates come out exactly as ModelSerializer renders them
+_datetime_field = serializers.DateTimeField()
+format_datetime = _datetime_field.to_representation
+
+
+def enabled(request):
+    """Whether ``request`` can be answered through the fast path"""
+    return (
+        getattr(settings, 'FAST_SERIALIZERS', True)
+        and request.method == 'GET'
+        and FieldSpec.from_request(request).is_full
+    )
+
+
+def avatar_url(name, request):
+    """What DRF's ImageField renders for a stored file name"""
+    if not name:
+        return None
+    url = User._meta.get_field('avatar').storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def user_rows(user_ids):
+    return users_with_post_counts().filter(pk__in=user_ids).values(*USER_FIELDS, 'questions_total', 'answers_total')
+
+
+def user_entry(row, request):
+    """UserSerializer output for a row of user_rows()"""
+    return {
+        'id': row['id'],
+        'username': row['username'],
+        'email': row['email'],
+        'bio': row['bio'],
+        'avatar': avatar_url(row['avatar'], request),
+        'reputation': row['reputation'],
+        'created_at': format_datetime(row['created_at']),
+        'questions_count': row['questions_total'],
+        'answers_count': row['answers_total'],
+    }
+
+
+def user_map(user_ids, request):
+    """{id: UserSerializer output} for the given users, in one query"""
+    return {row['id']: user_entry(row, request) for row in user_rows(user_ids)}
+
+
+async def auser_map(user_ids, request):
+    return {row['id']: user_entry(row, request) async for row in user_rows(user_ids)}
+
+
+def tag_link_rows(question_ids):
+    """(question_id, tag_id) pairs, tags in Tag.Meta.ordering like the prefetch"""
+    return (
+        Question.tags.through.objects
+        .filter(question_id__in=question_ids)
+        .order_by(*[f'tag__{field}' for field in Tag._meta.ordering])
+        .values_list('question_id', 'tag_id')
+    )
+
+
+def group_tags(links, directory):
+    """{question_id: [TagSerializer output]}, None if a tag is missing from the directory"""
+    entries = {entry['id']: entry for entry in directory}
+    if any(tag_id not in entries for _, tag_id in links):
+        return None
+    tags = defaultdict(list)
+    for question_id, tag_id in links:
+        tags[question_id].append(entries[tag_id])
+    return tags
+
+
+def tag_lists(question_ids):
+    links = list(tag_link_rows(question_ids))
+    tags = group_tags(links, get_tag_directory())
+    if tags is None:
+        tags = group_tags(links, build_tag_directory())
+    return tags
+
+
+async def atag_lists(question_ids):
+    links = [link async for link in tag_link_rows(question_ids)]
+    tags = group_tags(links, await sync_to_async(get_tag_directory)())
+    if tags is None:
+        tags = group_tags(links, await sync_to_async(build_tag_directory)())
+    return tags
+
+
+def comment_rows(answer_ids):
+    return Comment.objects.filter(answer_id__in=answer_ids).values(*COMMENT_FIELDS)
+
+
+@timed_serializer
+def question_entries(rows, authors, tags):
+    """QuestionListSerializer(many=True) output for rows of QUESTION_LIST_FIELDS"""
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'author': authors.get(row['author_id']),
+            'tags': tags.get(row['id'], []),
+            'vote_count': row['score'],
+            'answer_count': row['answer_count'],
+            'has_accepted_answer': row['has_accepted'],
+            'views': row['views'],
+            'created_at': format_datetime(row['created_at']),
+        }
+        for row in rows
+    ]
+
+
+@timed_serializer
+def answer_entries(rows, comments, authors, answer_votes=None):
+    """AnswerSerializer(many=True) output for rows of ANSWER_FIELDS and their comment_rows().
+
+    ``answer_votes`` is the caller's {answer_id: value}, None when anonymous.
+    """
+    answer_comments = defaultdict(list)
+    for row in comments:
+        answer_comments[row['answer_id']].append({
+            'id': row['id'],
+            'author': authors.get(row['author_id']),
+            'content': row['content'],
+            'created_at': format_datetime(row['created_at']),
+        })
+    answer_votes = answer_votes or {}
+    return [
+        {
+            'id': row['id'],
+            'question': row['question_id'],
+            'author': authors.get(row['author_id']),
+            'content': row['content'],
+            'is_accepted': row['is_accepted'],
+            'vote_count': row['score'],
+            'user_vote': answer_votes.get(row['id']),
+            'comments': answer_comments.get(row['id'], []),
+            'created_at': format_datetime(row['created_at']),
+            'updated_at': format_datetime(row['updated_at']),
+        }
+        for row in rows
+    ]
+
+
+@timed_serializer
+def question_detail_entry(row, authors, tags, answers, question_vote=None):
+    """QuestionDetailSerializer output for a row of QUESTION_DETAIL_FIELDS"""
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'content': row['content'],
+        'author': authors.get(row['author_id']),
+        'tags': tags.get(row['id'], []),
+        'vote_count': row['score'],
+        'answer_count': row['answer_count'],
+        'answers': answers,
+        'user_vote': question_vote,
+        'views': row['views'],
+        'created_at': format_datetime(row['created_at']),
+        'updated_at': format_datetime(row['updated_at']),
+    }
+
+
+def question_list(rows, request):
+    rows = list(rows)
+    authors = user_map({row['author_id'] for row in rows}, request)
+    return question_entries(rows, authors, tag_lists([row['id'] for row in rows]))
+
+
+async def aquestion_list(rows, request):
+    authors = await auser_map({row['author_id'] for row in rows}, request)
+    return question_entries(rows, authors, await atag_lists([row['id'] for row in rows]))
+
+
+def answer_list(rows, request, answer_votes=None):
+    rows = list(rows)
+    comments = list(comment_rows([row['id'] for row in rows]))
+    authors = user_map({row['author_id'] for row in rows + comments}, request)
+    return answer_entries(rows, comments, authors, answer_votes)
+
+
+async def aanswer_list(rows, request, answer_votes=None):
+    comments = [row async for row in comment_rows([row['id'] for row in rows])]
+    authors = await auser_map({row['author_id'] for row in rows + comments}, request)
+    return answer_entries(rows, comments, authors, answer_votes)
+
+
+async def aquestion_detail(row, request, question_vote=None, answer_votes=None):
+    """Detail output for a row of QUESTION_DETAIL_FIELDS, answers in their default ordering"""
+    answers = [answer async for answer in Answer.objects.filter(question_id=row['id']).values(*ANSWER_FIELDS)]
+    comments = [comment async for comment in comment_rows([answer['id'] for answer in answers])]
+    authors = await auser_map({item['author_id'] for item in [row] + answers + comments}, request)
+    tags = await atag_lists([row['id']])
+    return question_detail_entry(
+        row, authors, tags, answer_entries(answers, comments, authors, answer_votes), question_vote
+    )
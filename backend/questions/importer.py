@@ -0,0 +1,543 @@
+"""Bulk import of existing Q&A archives.
+
+Readers turn an archive into a stream of ``(kind, record)`` pairs with
+plain values and external ids:
+
+- stackexchange_records(): a Stack Exchange data dump directory
+  (Users.xml, Posts.xml, Comments.xml, Votes.xml), parsed incrementally
+  with iterparse; tags come from the questions' Tags attribute
+- ndjson_records(): NDJSON question documents as written by
+  questions.export (plain or gzip-compressed)
+
+Importer buffers the records per kind and writes them with bulk_create,
+one transaction per batch, in dependency order (users, questions,
+answers, comments, votes). User.save() and its full_clean() are skipped:
+usernames, emails and lengths are normalized here to what the model
+validation accepts instead. Each created row gets an ImportedRecord
+mapping its external id to the local one; references are resolved
+through it, and records already mapped are skipped, so an interrupted
+import is resumed by running it again with the same source name.
+Votes need no mapping: the ones whose (user, target) pair is already
+recorded are skipped.
+
+Archives give each post's score but rarely every vote behind it (the
+public dumps leave voters out, NDJSON exports carry no votes). Posts keep
+that score: the part not backed by an imported vote is stored in
+``imported_score``, which counters.rebuild_counters adds to the vote sum
+and questions.reputation credits to the author.
+
+Counters, reputation, the tag directory and the response cache are
+rebuilt once by ``finish()``.
+"""
+import datetime
+import gzip
+import json
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .counters import rebuild_counters
+from .models import Answer, Comment, ImportedRecord, Question, Tag, User, Vote
+from .ranking import rebuild_hot_scores
+from .tag_cooccurrence import rebuild_cooccurrence
+from .reputation import recompute_reputation
+from .response_cache import GLOBAL_SCOPE, invalidate
+from .seeding import bulk_create_with_timestamps
+from .tag_directory import invalidate_tag_directory
+
+USER = ImportedRecord.USER
+QUESTION = ImportedRecord.QUESTION
+ANSWER = ImportedRecord.ANSWER
+COMMENT = ImportedRecord.COMMENT
+VOTE = 'vote'
+KINDS = (USER, QUESTION, ANSWER, COMMENT, VOTE)
+
+# Author of posts whose user is missing from the archive (deleted accounts)
+GHOST_ID = '__ghost__'
+
+USERNAME_MAX = User._meta.get_field('username').max_length
+TITLE_MAX = Question._meta.get_field('title').max_length
+COMMENT_MAX = Comment._meta.get_field('content').max_length
+TAG_MAX = Tag._meta.get_field('name').max_length
+USERNAME_INVALID_RE = re.compile(r'[^\w.@+-]+')
+
+
+def parse_timestamp(value):
+    """Aware datetime from an ISO 8601 string (naive values are UTC), None if empty"""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, datetime.timezone.utc)
+    return moment
+
+
+def clean_username(name, external_id):
+    name = USERNAME_INVALID_RE.sub('_', (name or '').strip()).strip('_')
+    return (name or f'user_{external_id}')[:USERNAME_MAX]
+
+
+def with_suffix(name, suffix):
+    return name[:USERNAME_MAX - len(suffix)] + suffix
+
+
+def clean_tag(name):
+    return name.strip().lower()[:TAG_MAX]
+
+
+# Readers
+
+
+def iter_xml_rows(path):
+    """Attribute dicts of the <row> elements of a data dump file, in constant memory"""
+    context = ET.iterparse(path, events=('start', 'end'))
+    _, root = next(context)
+    for event, element in context:
+        if event == 'end' and element.tag == 'row':
+            yield dict(element.attrib)
+            root.clear()
+
+
+def split_se_tags(value):
+    """'<python><django>' or '|python|django|' -> ['python', 'django']"""
+    if not value:
+        return []
+    if value.startswith('<'):
+        return re.findall(r'<([^>]+)>', value)
+    return [tag for tag in value.split('|') if tag]
+
+
+def stackexchange_records(directory):
+    """(kind, record) pairs of a Stack Exchange data dump directory.
+
+    Public dumps leave the voter of up/down votes out; those votes are
+    dropped (see Importer.stats['skipped']) since a Vote needs a user,
+    and the posts' Score attribute is kept instead.
+    """
+    directory = Path(directory)
+
+    def rows(name):
+        path = directory / name
+        return iter_xml_rows(path) if path.exists() else ()
+
+    for row in rows('Users.xml'):
+        yield USER, {
+            'id': row['Id'],
+            'username': row.get('DisplayName'),
+            'bio': row.get('AboutMe'),
+            'created_at': parse_timestamp(row.get('CreationDate')),
+        }
+    # Posts are ordered by id, so a question comes before its answers
+    accepted = set()
+    for row in rows('Posts.xml'):
+        created_at = parse_timestamp(row.get('CreationDate'))
+        updated_at = parse_timestamp(row.get('LastEditDate')) or created_at
+        if row.get('PostTypeId') == '1':
+            if row.get('AcceptedAnswerId'):
+                accepted.add(row['AcceptedAnswerId'])
+            yield QUESTION, {
+                'id': row['Id'],
+                'author': row.get('OwnerUserId'),
+                'title': row.get('Title', ''),
+                'content': row.get('Body', ''),
+                'tags': split_se_tags(row.get('Tags')),
+                'score': int(row.get('Score') or 0),
+                'views': int(row.get('ViewCount') or 0),
+                'created_at': created_at,
+                'updated_at': updated_at,
+                'last_activity_at': parse_timestamp(row.get('LastActivityDate')) or updated_at,
+            }
+        elif row.get('PostTypeId') == '2':
+            yield ANSWER, {
+                'id': row['Id'],
+                'question': row.get('ParentId'),
+                'author': row.get('OwnerUserId'),
+                'content': row.get('Body', ''),
+                'is_accepted': row['Id'] in accepted,
+                'score': int(row.get('Score') or 0),
+                'created_at': created_at,
+                'updated_at': updated_at,
+            }
+    for row in rows('Comments.xml'):
+        # Comments on questions don't resolve to an answer and are skipped
+        yield COMMENT, {
+            'id': row['Id'],
+            'answer': row.get('PostId'),
+            'author': row.get('UserId'),
+            'content': row.get('Text', ''),
+            'created_at': parse_timestamp(row.get('CreationDate')),
+        }
+    vote_values = {'2': 1, '3': -1}
+    for row in rows('Votes.xml'):
+        if row.get('VoteTypeId') in vote_values:
+            yield VOTE, {
+                'user': row.get('UserId'),
+                'post': row.get('PostId'),
+                'value': vote_values[row['VoteTypeId']],
+                'created_at': parse_timestamp(row.get('CreationDate')),
+            }
+
+
+def ndjson_records(path):
+    """(kind, record) pairs of an NDJSON export (see questions.export)"""
+    path = Path(path)
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rb') as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            document = json.loads(line)
+            authors = [document.get('author')]
+            for answer in document.get('answers', []):
+                authors.append(answer.get('author'))
+                authors.extend(comment.get('author') for comment in answer.get('comments', []))
+            for author in authors:
+                if author and author.get('id') is not None:
+                    yield USER, {'id': author['id'], 'username': author.get('username')}
+            created_at = parse_timestamp(document.get('created_at'))
+            yield QUESTION, {
+                'id': document['id'],
+                'author': (document.get('author') or {}).get('id'),
+                'title': document.get('title', ''),
+                'content': document.get('content', ''),
+                'tags': document.get('tags', []),
+                'score': document.get('score', 0),
+                'views': document.get('views', 0),
+                'created_at': created_at,
+                'updated_at': parse_timestamp(document.get('updated_at')),
+                'last_activity_at': parse_timestamp(document.get('last_activity_at')),
+            }
+            for answer in document.get('answers', []):
+                yield ANSWER, {
+                    'id': answer['id'],
+                    'question': document['id'],
+                    'author': (answer.get('author') or {}).get('id'),
+                    'content': answer.get('content', ''),
+                    'is_accepted': answer.get('is_accepted', False),
+                    'score': answer.get('score', 0),
+                    'created_at': parse_timestamp(answer.get('created_at')),
+                    'updated_at': parse_timestamp(answer.get('updated_at')),
+                }
+                for comment in answer.get('comments', []):
+                    yield COMMENT, {
+                        'id': comment['id'],
+                        'answer': answer['id'],
+                        'author': (comment.get('author') or {}).get('id'),
+                        'content': comment.get('content', ''),
+                        'created_at': parse_timestamp(comment.get('created_at')),
+                    }
+
+
+# Importer
+
+
+class Importer:
+    def __init__(self, source, batch_size=1000, log=None):
+        self.source = source
+        self.batch_size = batch_size
+        self.log = log
+        self.buffers = {kind: {} for kind in KINDS}
+        self.stats = {'imported': Counter(), 'skipped': Counter()}
+        self.started = time.perf_counter()
+        self.now = timezone.now()
+        self.password = make_password(None)
+        self._ghost_user = None
+        self.writers = {
+            USER: self.write_users,
+            QUESTION: self.write_questions,
+            ANSWER: self.write_answers,
+            COMMENT: self.write_comments,
+            VOTE: self.write_votes,
+        }
+
+    def run(self, records):
+        for kind, record in records:
+            self.add(kind, record)
+        self.flush()
+        return self.stats
+
+    def add(self, kind, record):
+        buffer = self.buffers[kind]
+        # Votes have no external id of their own
+        key = len(buffer) if kind == VOTE else str(record['id'])
+        buffer.setdefault(key, record)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered record, dependencies first, one transaction per kind"""
+        for kind in KINDS:
+            records = self.buffers[kind]
+            if not records:
+                continue
+            self.buffers[kind] = {}
+            with transaction.atomic():
+                self.writers[kind](records)
+        if self.log is not None:
+            self.log(self.progress())
+
+    def progress(self):
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.stats['imported'].values())
+        counts = ', '.join(f"{count} {kind}s" for kind, count in self.stats['imported'].items())
+        return f"{counts or 'nothing'} imported in {elapsed:.1f} s ({total / max(elapsed, 1e-9):.0f} rows/s)"
+
+    def finish(self):
+        """Rebuild the derived data once every record is written"""
+        with transaction.atomic():
+            rebuild_counters()
+            rebuild_hot_scores()
+            rebuild_cooccurrence()
+            recompute_reputation(record_events=False)
+        invalidate_tag_directory()
+        invalidate(GLOBAL_SCOPE)
+
+    # Id mapping
+
+    def lookup(self, kind, external_ids):
+        """{external_id: local_id} of the already imported ``kind`` rows"""
+        external_ids = {str(external_id) for external_id in external_ids if external_id is not None}
+        if not external_ids:
+            return {}
+        return dict(
+            ImportedRecord.objects.filter(source=self.source, kind=kind, external_id__in=external_ids)
+            .values_list('external_id', 'local_id')
+        )
+
+    def new_records(self, kind, records):
+        """The records not imported by an earlier (interrupted) run"""
+        done = self.lookup(kind, records)
+        self.stats['skipped'][kind] += len(done)
+        return {key: record for key, record in records.items() if key not in done}
+
+    def remember(self, kind, pairs):
+        ImportedRecord.objects.bulk_create(
+            [
+                ImportedRecord(source=self.source, kind=kind, external_id=key, local_id=obj.pk)
+                for key, obj in pairs
+            ],
+            batch_size=self.batch_size,
+        )
+        self.stats['imported'][kind] += len(pairs)
+
+    def authors(self, records, field='author'):
+        """{external user id: local id}, unknown users mapped to the ghost user"""
+        users = self.lookup(USER, [record.get(field) for record in records])
+        for record in records:
+            if str(record.get(field)) not in users:
+                users[str(record.get(field))] = self.ghost_user()
+        return users
+
+    def ghost_user(self):
+        if self._ghost_user is None:
+            found = self.lookup(USER, [GHOST_ID])
+            if found:
+                self._ghost_user = found[GHOST_ID]
+            else:
+                self.write_users({GHOST_ID: {'id': GHOST_ID, 'username': f'{self.source}_deleted_user'}})
+                self._ghost_user = self.lookup(USER, [GHOST_ID])[GHOST_ID]
+        return self._ghost_user
+
+    # Writers
+
+    def write_users(self, records):
+        records = self.new_records(USER, records)
+        if not records:
+            return
+        usernames = self.unique_usernames(records)
+        users = []
+        for key, record in records.items():
+            username = usernames[key]
+            created_at = record.get('created_at') or self.now
+            users.append((key, User(
+                username=username,
+                # Unique and valid by construction, never used to log in
+                email=f"{clean_username(self.source, '')}.{clean_username(key, '')}@import.invalid".lower(),
+                password=self.password,
+                bio=record.get('bio') or None,
+                created_at=created_at,
+                updated_at=created_at,
+            )))
+        bulk_create_with_timestamps(User, [user for _, user in users], self.batch_size)
+        self.remember(USER, users)
+
+    def unique_usernames(self, records):
+        """{key: username} for new users, clear of existing users and of each other"""
+        candidates = {}
+        for key, record in records.items():
+            name = clean_username(record.get('username'), key)
+            candidates[key] = [name, with_suffix(name, f'_{key}')]
+        taken = set(
+            User.objects.filter(username__in=[name for names in candidates.values() for name in names])
+            .values_list('username', flat=True)
+        )
+        usernames = {}
+        for key, names in candidates.items():
+            username = next((name for name in names if name not in taken), None)
+            attempt = 2
+            while username is None:
+                name = with_suffix(names[0], f'_{key}_{attempt}')
+                if name not in taken and not User.objects.filter(username=name).exists():
+                    username = name
+                attempt += 1
+            taken.add(username)
+            usernames[key] = username
+        return usernames
+
+    def tag_ids(self, names):
+        """{name: id}, creating the missing tags"""
+        names = {clean_tag(name) for name in names} - {''}
+        tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = names - set(tags)
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(name=name, created_at=self.now) for name in sorted(missing)],
+                batch_size=self.batch_size, ignore_conflicts=True,
+            )
+            tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        return tags
+
+    def write_questions(self, records):
+        records = self.new_records(QUESTION, records)
+        if not records:
+            return
+        authors = self.authors(records.values())
+        tags = self.tag_ids(name for record in records.values() for name in record.get('tags', []))
+        questions = []
+        for key, record in records.items():
+            created_at = record.get('created_at') or self.now
+            updated_at = record.get('updated_at') or created_at
+            questions.append((key, Question(
+                title=(record.get('title') or '')[:TITLE_MAX],
+                content=record.get('content') or '',
+                author_id=authors[str(record.get('author'))],
+                score=record.get('score') or 0,
+                imported_score=record.get('score') or 0,
+                views=record.get('views') or 0,
+                created_at=created_at,
+                updated_at=updated_at,
+                last_activity_at=record.get('last_activity_at') or updated_at,
+            )))
+        bulk_create_with_timestamps(Question, [question for _, question in questions], self.batch_size)
+        Question.tags.through.objects.bulk_create(
+            [
+                Question.tags.through(question_id=question.pk, tag_id=tags[name])
+                for key, question in questions
+                for name in {clean_tag(name) for name in records[key].get('tags', [])}
+                if name in tags
+            ],
+            batch_size=self.batch_size,
+        )
+        self.remember(QUESTION, questions)
+
+    def write_answers(self, records):
+        records = self.new_records(ANSWER, records)
+        if not records:
+            return
+        questions = self.lookup(QUESTION, [record.get('question') for record in records.values()])
+        authors = self.authors(records.values())
+        answers = []
+        for key, record in records.items():
+            question_id = questions.get(str(record.get('question')))
+            if question_id is None:
+                self.stats['skipped'][ANSWER] += 1
+                continue
+            created_at = record.get('created_at') or self.now
+            answers.append((key, Answer(
+                question_id=question_id,
+                author_id=authors[str(record.get('author'))],
+                content=record.get('content') or '',
+                is_accepted=bool(record.get('is_accepted')),
+                score=record.get('score') or 0,
+                imported_score=record.get('score') or 0,
+                created_at=created_at,
+                updated_at=record.get('updated_at') or created_at,
+            )))
+        bulk_create_with_timestamps(Answer, [answer for _, answer in answers], self.batch_size)
+        self.remember(ANSWER, answers)
+
+    def write_comments(self, records):
+        records = self.new_records(COMMENT, records)
+        if not records:
+            return
+        answers = self.lookup(ANSWER, [record.get('answer') for record in records.values()])
+        authors = self.authors(records.values())
+        comments = []
+        for key, record in records.items():
+            answer_id = answers.get(str(record.get('answer')))
+            if answer_id is None:
+                self.stats['skipped'][COMMENT] += 1
+                continue
+            comments.append((key, Comment(
+                answer_id=answer_id,
+                author_id=authors[str(record.get('author'))],
+                content=(record.get('content') or '')[:COMMENT_MAX],
+                created_at=record.get('created_at') or self.now,
+            )))
+        bulk_create_with_timestamps(Comment, [comment for _, comment in comments], self.batch_size)
+        self.remember(COMMENT, comments)
+
+    def write_votes(self, records):
+        records = list(records.values())
+        users = self.lookup(USER, [record.get('user') for record in records])
+        posts = [record.get('post') for record in records]
+        questions, answers = self.lookup(QUESTION, posts), self.lookup(ANSWER, posts)
+        votes = []
+        for record in records:
+            user_id = users.get(str(record.get('user')))
+            post = str(record.get('post'))
+            if user_id is None or record.get('value') not in (1, -1):
+                self.stats['skipped'][VOTE] += 1
+            elif post in questions:
+                votes.append(Vote(user_id=user_id, question_id=questions[post], value=record['value'],
+                                  created_at=record.get('created_at') or self.now))
+            elif post in answers:
+                votes.append(Vote(user_id=user_id, answer_id=answers[post], value=record['value'],
+                                  created_at=record.get('created_at') or self.now))
+            else:
+                self.stats['skipped'][VOTE] += 1
+        new = self.new_votes(votes)
+        self.stats['skipped'][VOTE] += len(votes) - len(new)
+        bulk_create_with_timestamps(Vote, new, self.batch_size)
+        # The archive score already counts these votes
+        for model, field in ((Question, 'question_id'), (Answer, 'answer_id')):
+            totals = Counter()
+            for vote in new:
+                if getattr(vote, field) is not None:
+                    totals[getattr(vote, field)] += vote.value
+            totals = {target_id: total for target_id, total in totals.items() if total}
+            if totals:
+                model.objects.filter(pk__in=totals).update(imported_score=F('imported_score') - Case(
+                    *[When(pk=target_id, then=Value(total)) for target_id, total in totals.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ))
+        self.stats['imported'][VOTE] += len(new)
+
+    def new_votes(self, votes):
+        """The votes whose (user, target) pair is not recorded yet (resumed run, duplicates in the archive)"""
+        seen = set()
+        user_ids = {vote.user_id for vote in votes}
+        for field in ('question_id', 'answer_id'):
+            targets = {getattr(vote, field) for vote in votes} - {None}
+            if targets:
+                existing = Vote.objects.filter(user_id__in=user_ids, **{f'{field}__in': targets})
+                seen.update((field, user_id, target_id) for user_id, target_id in existing.values_list('user_id', field))
+        new = []
+        for vote in votes:
+            field = 'question_id' if vote.question_id is not None else 'answer_id'
+            key = (field, vote.user_id, getattr(vote, field))
+            if key not in seen:
+                seen.add(key)
+                new.append(vote)
+        return new
@@ -0,0 +1,122 @@
+import json
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment
+
+from questions.benchmarking import ApiClient, git_commit, measure_endpoint
+from questions.models import Answer, Comment, Question, Tag, User, Vote
+from questions.seeding import DEFAULT_VOLUMES, seed
+
+
+def toggle_vote(i):
+    """Alternate up and down votes so every request changes the score"""
+    return {'value': 1 if i % 2 == 0 else -1}
+
+
+def scenarios(user):
+    """(name, method, path, body, user) for the endpoints of questions/ and users/ urls"""
+    question = Question.objects.select_related('author').order_by('-answer_count', '-id').first()
+    answer = Answer.objects.filter(question=question).first() if question else None
+    tag = Tag.objects.filter(questions__isnull=False).first()
+    if question is None or answer is None or tag is None:
+        raise CommandError("Not enough data, run seed_data or pass --seed first.")
+    q, a = question.pk, answer.pk
+    author = question.author_id
+    return [
+        ('question list', 'GET', '/api/questions/', None, None),
+        ('question list page 2', 'GET', '/api/questions/?page=2', None, None),
+        ('question list by votes', 'GET', '/api/questions/?sort=votes', None, None),
+        ('question list unanswered', 'GET', '/api/questions/?unanswered=1', None, None),
+        ('question list unaccepted', 'GET', '/api/questions/?unaccepted=1', None, None),
+        ('question list by tag', 'GET', f'/api/questions/?tag={tag.name}', None, None),
+        ('question search', 'GET', '/api/questions/?search=django%20index', None, None),
+        ('question detail', 'GET', f'/api/questions/{q}/', None, None),
+        ('question detail (auth)', 'GET', f'/api/questions/{q}/', None, user),
+        ('answer detail', 'GET', f'/api/answers/{a}/', None, None),
+        ('tag list', 'GET', '/api/tags/', None, None),
+        ('user answers', 'GET', f'/api/users/{author}/answers/', None, user),
+        ('user detail', 'GET', f'/api/auth/users/{author}/', None, None),
+        ('profile', 'GET', '/api/auth/profile/', None, user),
+        ('vote question', 'POST', f'/api/questions/{q}/vote/', toggle_vote, user),
+        ('vote answer', 'POST', f'/api/answers/{a}/vote/', toggle_vote, user),
+        ('bulk vote', 'POST', '/api/votes/bulk/', lambda i: {'votes': [
+            {'question': q, **toggle_vote(i)}, {'answer': a, **toggle_vote(i)},
+        ]}, user),
+        ('create answer', 'POST', f'/api/questions/{q}/answers/', {'content': 'Benchmark answer'}, user),
+        ('create comment', 'POST', f'/api/answers/{a}/comments/', {'content': 'Benchmark comment'}, user),
+        ('accept answer', 'POST', f'/api/answers/{a}/accept/', None, question.author),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Drive the API endpoints through the test client and report latency percentiles and query counts as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Insert a synthetic dataset first")
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, dest=name)
+        parser.add_argument('--requests', type=int, default=50, help="Measured requests per endpoint")
+        parser.add_argument('--only', help="Comma-separated substrings of endpoint names to run")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--compare', help="Previous JSON report to diff p50 and query counts against")
+        parser.add_argument('--keep-writes', action='store_true', help="Do not roll back the rows written by POST endpoints")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        log = self.stderr
+        if options['seed']:
+            seed({name: options[name] for name in DEFAULT_VOLUMES}, stdout=log)
+
+        user = User.objects.order_by('?').first()
+        results = {}
+        with transaction.atomic():
+            for name, method, path, body, client_user in scenarios(user):
+                if options['only'] and not any(part in name for part in options['only'].split(',')):
+                    continue
+                log.write(f"{name}...")
+                results[name] = measure_endpoint(
+                    ApiClient(client_user), method, path, body, requests=options['requests']
+                )
+            transaction.set_rollback(not options['keep_writes'])
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'git_commit': git_commit(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'requests_per_endpoint': options['requests'],
+                'rows': {
+                    model.__name__.lower(): model.objects.count()
+                    for model in (User, Tag, Question, Answer, Comment, Vote)
+                },
+            },
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            log.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def compare(self, path, results):
+        with open(path) as handle:
+            previous = json.load(handle)['endpoints']
+        for name, current in results.items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            change = (current['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            queries = current['queries_mean'] - before['queries_mean']
+            line = f"{name:32} p50 {before['p50_ms']:>9.2f} -> {current['p50_ms']:>9.2f} ms ({change:+.0f}%)  queries {queries:+.1f}"
+            style = self.style.ERROR if change > 20 or queries > 0 else self.style.SUCCESS
+            self.stderr.write(style(line))
+
@@ -0,0 +1,131 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from questions.benchmarking import git_commit, http_load
+from questions.models import Answer, Question, User
+from questions.seeding import DEFAULT_VOLUMES, seed
+
+HOST = '127.0.0.1'
+
+
+def endpoints():
+    """(name, WSGI path, ASGI path) of the read endpoints with an async version"""
+    question = Question.objects.order_by('-answer_count', '-id').first()
+    answer = Answer.objects.filter(question=question).first() if question else None
+    if answer is None:
+        raise CommandError("Not enough data, run seed_data or pass --seed first.")
+    author = question.author_id
+    return [
+        ('question list', '/api/questions/', '/api/async/questions/'),
+        ('question detail', f'/api/questions/{question.pk}/', f'/api/async/questions/{question.pk}/'),
+        ('answer detail', f'/api/answers/{answer.pk}/', f'/api/async/answers/{answer.pk}/'),
+        ('tag list', '/api/tags/', '/api/async/tags/'),
+        ('user detail', f'/api/auth/users/{author}/', f'/api/auth/async/users/{author}/'),
+    ]
+
+
+def server_command(kind, workers, port):
+    command = [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'{HOST}:{port}']
+    if kind == 'asgi':
+        return command + ['-k', 'uvicorn.workers.UvicornWorker', 'config.asgi:application']
+    return command + ['config.wsgi:application']
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"The server exited with code {process.returncode}.")
+        try:
+            socket.create_connection((HOST, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"No server listening on port {port} after {timeout} s.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-request throughput of the async read endpoints under gunicorn with "
+        "uvicorn workers (config/asgi.py) against the DRF views under gunicorn sync workers "
+        "(config/wsgi.py), with the same number of workers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Insert a synthetic dataset first")
+        parser.add_argument('--workers', type=int, default=3, help="Workers of each server (default: render.yaml's 3)")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and server")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--anonymous', action='store_true', help="Don't authenticate (hits the response cache)")
+        parser.add_argument('--only', help="Comma-separated substrings of endpoint names to run")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        if 'sqlite' in settings.DATABASES['default']['ENGINE'] and settings.DATABASES['default']['NAME'] == ':memory:':
+            raise CommandError("The servers need a database they can share: set DATABASE_URL.")
+        if options['seed']:
+            seed(DEFAULT_VOLUMES, stdout=self.stderr)
+        selected = [
+            endpoint for endpoint in endpoints()
+            if not options['only'] or any(part in endpoint[0] for part in options['only'].split(','))
+        ]
+        # Plain HTTP behind a "proxy", so SECURE_SSL_REDIRECT does not interfere
+        headers = {'X-Forwarded-Proto': 'https'}
+        if not options['anonymous']:
+            user = User.objects.order_by('id').first()
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+
+        results = {}
+        for kind in ('wsgi', 'asgi'):
+            port = options['port']
+            env = {**os.environ, 'PYTHONUNBUFFERED': '1'}
+            process = subprocess.Popen(
+                server_command(kind, options['workers'], port), cwd=settings.BASE_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+            try:
+                wait_for_port(port, process)
+                for name, wsgi_path, asgi_path in selected:
+                    path = wsgi_path if kind == 'wsgi' else asgi_path
+                    # Warm up the workers (imports, connections, tag directory)
+                    http_load(HOST, port, path, headers, options['concurrency'], options['concurrency'] * 2)
+                    report = http_load(HOST, port, path, headers, options['concurrency'], options['requests'])
+                    results.setdefault(name, {})[kind] = report
+                    self.stderr.write(
+                        f"{kind} {name:16} {report['throughput_rps']:8.1f} req/s  "
+                        f"p50 {report.get('p50_ms', 0):7.1f} ms  p99 {report.get('p99_ms', 0):7.1f} ms  "
+                        f"statuses {report['statuses']}"
+                    )
+            finally:
+                os.killpg(process.pid, signal.SIGTERM)
+                process.wait(timeout=30)
+
+        for name, runs in results.items():
+            if runs['wsgi']['throughput_rps']:
+                runs['asgi_speedup'] = round(runs['asgi']['throughput_rps'] / runs['wsgi']['throughput_rps'], 2)
+        report = {
+            'commit': git_commit(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'authenticated': not options['anonymous'],
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
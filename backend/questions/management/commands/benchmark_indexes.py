@@ -0,0 +1,97 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from questions.models import Answer, Comment, Question, Tag, Vote
+from questions.seeding import seed
+
+# Indexes added by migration 0004 and later, dropped temporarily for the "before" run
+INDEXED_MODELS = (Question, Answer, Comment, Vote)
+
+
+def sample_queries():
+    """Querysets mirroring the hot access paths of the API"""
+    question = Question.objects.order_by('-answer_count').first()
+    answer = Answer.objects.order_by('-score').first()
+    tag = Tag.objects.order_by('?').first()
+    if question is None or answer is None or tag is None:
+        raise CommandError("The database is empty, run with --seed first.")
+    return {
+        'latest questions': Question.objects.order_by('-created_at', '-id')[:20],
+        'questions by votes': Question.objects.order_by('-score', '-id')[:20],
+        'most viewed questions': Question.objects.order_by('-views')[:20],
+        'questions by tag': Question.objects.filter(tags__name=tag.name).order_by('-created_at', '-id')[:20],
+        'unanswered queue': Question.objects.filter(answer_count=0).order_by('-created_at', '-id')[:20],
+        'no accepted answer queue': Question.objects.filter(has_accepted=False).order_by('-created_at', '-id')[:20],
+        'unanswered queue by tag': (
+            Question.objects.filter(answer_count=0, tags__name=tag.name).order_by('-created_at', '-id')[:20]
+        ),
+        'answers of a question': Answer.objects.filter(question_id=question.pk),
+        'accepted answer': Answer.objects.filter(question_id=question.pk, is_accepted=True),
+        'answers of a user': Answer.objects.filter(author_id=answer.author_id).order_by('-created_at', '-id')[:20],
+        'comments of an answer': Comment.objects.filter(answer_id=answer.pk),
+        'question score': Vote.objects.filter(question_id=question.pk).values('question').annotate(total=Sum('value')),
+        'answer score': Vote.objects.filter(answer_id=answer.pk).values('answer').annotate(total=Sum('value')),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, queryset in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            'plan': queryset.explain(),
+            'median_ms': round(statistics.median(timings), 3),
+        }
+    return results
+
+
+class Command(BaseCommand):
+    help = "Show query plans and timings of the hot queries with and without the composite indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Insert the default synthetic dataset first")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed(stdout=self.stderr if options['json'] else self.stdout)
+
+        queries = sample_queries()
+        # Fresh connections, so no statement prepared against the other schema is reused
+        connection.close()
+        after = measure(queries, options['repeat'])
+        connection.close()
+
+        # Drop the indexes inside a transaction that is always rolled back
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+            before = measure(queries, options['repeat'])
+            transaction.set_rollback(True)
+
+        if options['json']:
+            report = {
+                name: {'before': before[name], 'after': after[name]}
+                for name in queries
+            }
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  before: {before[name]['median_ms']} ms")
+            self.stdout.write('    ' + before[name]['plan'].replace('\n', '\n    '))
+            self.stdout.write(f"  after:  {after[name]['median_ms']} ms")
+            self.stdout.write('    ' + after[name]['plan'].replace('\n', '\n    '))
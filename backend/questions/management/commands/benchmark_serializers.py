@@ -0,0 +1,97 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from questions import fast_serializers
+from questions.benchmarking import summarize
+from questions.models import Answer, Question, answer_prefetches
+from questions.seeding import DEFAULT_VOLUMES, seed
+from questions.serializers import AnswerSerializer, QuestionListSerializer
+
+
+def drf_question_list(request, page_size):
+    rows = Question.objects.for_list().order_by('-created_at', '-id')[:page_size]
+    return QuestionListSerializer(rows, many=True, context={'request': request}).data
+
+
+def fast_question_list(request, page_size):
+    rows = Question.objects.values(*fast_serializers.QUESTION_LIST_FIELDS).order_by('-created_at', '-id')[:page_size]
+    return fast_serializers.question_list(rows, request)
+
+
+def drf_answer_list(request, page_size, author_id):
+    rows = (
+        Answer.objects.filter(author_id=author_id)
+        .prefetch_related(*answer_prefetches())
+        .order_by('-created_at', '-id')[:page_size]
+    )
+    return AnswerSerializer(rows, many=True, context={'request': request, 'answer_votes': {}}).data
+
+
+def fast_answer_list(request, page_size, author_id):
+    rows = (
+        Answer.objects.filter(author_id=author_id)
+        .values(*fast_serializers.ANSWER_FIELDS)
+        .order_by('-created_at', '-id')[:page_size]
+    )
+    return fast_serializers.answer_list(rows, request)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the DRF serializers against questions.fast_serializers on the question and answer "
+        "lists (queries included) and check both render the same JSON bytes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Insert a synthetic dataset first")
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed(DEFAULT_VOLUMES, stdout=self.stderr)
+        author_id = (
+            Answer.objects.values('author_id').annotate(total=Count('id')).order_by('-total')
+            .values_list('author_id', flat=True).first()
+        )
+        if author_id is None:
+            raise CommandError("Not enough data, run seed_data or pass --seed first.")
+
+        request = Request(APIRequestFactory().get('/api/questions/', secure=True))
+        page_size = options['page_size']
+        cases = {
+            'question list': (drf_question_list, fast_question_list, (request, page_size)),
+            'user answers': (drf_answer_list, fast_answer_list, (request, page_size, author_id)),
+        }
+        renderer = JSONRenderer()
+        report = {}
+        for name, (drf, fast, arguments) in cases.items():
+            expected = renderer.render(drf(*arguments))
+            actual = renderer.render(fast(*arguments))
+            if expected != actual:
+                raise CommandError(f"{name}: fast path output differs from the serializer's")
+            timings = {'drf': [], 'fast': []}
+            for _ in range(options['repeat']):
+                for variant, build in (('drf', drf), ('fast', fast)):
+                    start = time.perf_counter()
+                    renderer.render(build(*arguments))
+                    timings[variant].append((time.perf_counter() - start) * 1000)
+            drf_summary, fast_summary = summarize(timings['drf']), summarize(timings['fast'])
+            report[name] = {
+                'bytes': len(expected),
+                'identical': True,
+                'drf': drf_summary,
+                'fast': fast_summary,
+                'speedup_p50': round(drf_summary['p50_ms'] / fast_summary['p50_ms'], 2),
+            }
+            self.stderr.write(self.style.SUCCESS(
+                f"{name:14} drf p50 {drf_summary['p50_ms']:.2f} ms, fast p50 {fast_summary['p50_ms']:.2f} ms "
+                f"(x{report[name]['speedup_p50']}), identical JSON"
+            ))
+        self.stdout.write(json.dumps(report, indent=2))
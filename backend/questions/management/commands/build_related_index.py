@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from questions.models import Question
+from questions.related import get_related_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Vectorize every question for the related/duplicate suggestions and write the index "
+        "that workers memory-map (settings.QUESTION_RELATED['PATH'])"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Output directory (default: QUESTION_RELATED['PATH'])")
+        parser.add_argument('--queries', type=int, default=100, help="Sample lookups to time after the build")
+
+    def handle(self, *args, **options):
+        index = get_related_index()
+        path = options['path'] or index.path
+        if not path:
+            raise CommandError("Set RELATED_INDEX_PATH or pass --path.")
+
+        start = time.perf_counter()
+        index.build()
+        built = time.perf_counter() - start
+        count = index.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} questions vectorized in {built:.2f} s "
+            f"({count * index.dimensions * 4 / 1024 / 1024:.1f} MiB of vectors) -> {path}"
+        ))
+
+        sample = list(Question.objects.order_by('?').values_list('id', flat=True)[:options['queries']])
+        if sample:
+            start = time.perf_counter()
+            for question_id in sample:
+                index.similar_to_question(question_id)
+            elapsed = (time.perf_counter() - start) * 1000 / len(sample)
+            self.stdout.write(f"Top-5 lookup: {elapsed:.2f} ms on average over {len(sample)} questions")
@@ -0,0 +1,62 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from config.renderers import iter_json_lines
+from questions.export import DEFAULT_CHUNK_SIZE, export_documents, gzip_chunks, parse_since
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every question with its answers, comments, tags and scores as NDJSON "
+        "(gzip-compressed for .gz files or with --gzip)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help="Output file, '-' for stdout (default)")
+        parser.add_argument('--since', help="Only questions changed since this ISO 8601 date/datetime")
+        parser.add_argument('--gzip', action='store_true', help="Compress the output")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError as exc:
+                raise CommandError(exc)
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+
+        started = timezone.now()
+        start = time.perf_counter()
+        counts = {'questions': 0, 'answers': 0}
+
+        def documents():
+            for document in export_documents(since, options['chunk_size']):
+                counts['questions'] += 1
+                counts['answers'] += len(document['answers'])
+                yield document
+
+        chunks = iter_json_lines(documents(), options['chunk_size'])
+        if compress:
+            chunks = gzip_chunks(chunks)
+        written = 0
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+            else:
+                stream.flush()
+        elapsed = time.perf_counter() - start
+        self.stderr.write(self.style.SUCCESS(
+            f"{counts['questions']} questions, {counts['answers']} answers ({written / 1024:.1f} KiB) "
+            f"exported in {elapsed:.2f} s ({counts['questions'] / max(elapsed, 1e-9):.0f} questions/s). "
+            f"Next incremental export: --since {started.isoformat()}"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from questions.view_counter import get_view_counter
+
+
+class Command(BaseCommand):
+    help = "Write the buffered question views to the database (useful with the SQLite buffer)"
+
+    def handle(self, *args, **options):
+        flushed = get_view_counter().flush()
+        self.stdout.write(self.style.SUCCESS(f"{flushed} buffered views written."))
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from questions.importer import Importer, ndjson_records, stackexchange_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a Stack Exchange data dump directory or an NDJSON export (.ndjson, .ndjson.gz) "
+        "in batches; run it again with the same --source to resume an interrupted import"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Data dump directory or NDJSON file")
+        parser.add_argument('--format', choices=['stackexchange', 'ndjson'], help="Guessed from the path by default")
+        parser.add_argument('--source', help="Name the imported ids are recorded under (default: the path's name)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-rebuild', action='store_true', help="Don't rebuild counters and reputation")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+        archive_format = options['format'] or ('stackexchange' if path.is_dir() else 'ndjson')
+        records = stackexchange_records(path) if archive_format == 'stackexchange' else ndjson_records(path)
+        source = options['source'] or path.name.split('.')[0]
+
+        importer = Importer(source, batch_size=options['batch_size'], log=self.stderr.write)
+        stats = importer.run(records)
+        if not options['skip_rebuild']:
+            self.stderr.write("Rebuilding counters and reputation...")
+            importer.finish()
+        skipped = ', '.join(f"{count} {kind}s" for kind, count in stats['skipped'].items() if count)
+        self.stdout.write(self.style.SUCCESS(
+            f"{importer.progress()}. Skipped (already imported or unresolved): {skipped or 'none'}."
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from questions.counters import rebuild_counters
+from questions.ranking import rebuild_hot_scores
+from questions.response_cache import GLOBAL_SCOPE, invalidate
+from questions.tag_cooccurrence import rebuild_cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored score / answer_count / has_accepted counters, hot scores and tag pairs from the votes, answers and tag links"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            questions, answers = rebuild_counters()
+            rebuild_hot_scores()
+            pairs = rebuild_cooccurrence()
+            invalidate(GLOBAL_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f"Counters rebuilt for {questions} questions and {answers} answers, {pairs} tag pairs."
+        ))
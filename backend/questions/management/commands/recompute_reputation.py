@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from questions.reputation import recompute_reputation
+from questions.response_cache import GLOBAL_SCOPE, invalidate
+
+
+class Command(BaseCommand):
+    help = "Recompute User.reputation and total_votes from the votes and answers tables and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-events', action='store_true', help="Do not write REPAIR rows to the ledger")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = recompute_reputation(record_events=not options['no_events'])
+            invalidate(GLOBAL_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f"Reputation repaired for {fixed} users."))
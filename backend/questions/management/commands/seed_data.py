@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from questions.seeding import DEFAULT_VOLUMES, seed
+
+
+class Command(BaseCommand):
+    help = "Insert a synthetic dataset (users, tags, questions, answers, comments, votes) with bulk inserts"
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, dest=name)
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--days', type=int, default=365, help="Spread creation dates over this many days")
+
+    def handle(self, *args, **options):
+        volumes = {name: options[name] for name in DEFAULT_VOLUMES}
+        created = seed(
+            volumes,
+            random_seed=options['random_seed'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+            stdout=self.stdout,
+        )
+        summary = ', '.join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
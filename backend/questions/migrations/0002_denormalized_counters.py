@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:27
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    Answer = apps.get_model('questions', 'Answer')
+    Vote = apps.get_model('questions', 'Vote')
+
+    def total(model, field, aggregate):
+        rows = (
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(total=aggregate).values('total')
+        )
+        return Coalesce(Subquery(rows, output_field=models.IntegerField()), Value(0))
+
+    Answer.objects.update(score=total(Vote, 'answer', Sum('value')))
+    Question.objects.update(
+        score=total(Vote, 'question', Sum('value')),
+        answer_count=total(Answer, 'question', Count('pk')),
+        has_accepted=Exists(Answer.objects.filter(question=OuterRef('pk'), is_accepted=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='answer_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='has_accepted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# PostgreSQL only: a stored generated tsvector (title weighted A, content B)
+# and its GIN index. Other databases use the in-process inverted index, see
+# questions/search.py.
+CREATE_SQL = [
+    """
+    ALTER TABLE questions_question ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX questions_question_search_gin ON questions_question USING gin (search_vector)",
+]
+DROP_SQL = [
+    "DROP INDEX IF EXISTS questions_question_search_gin",
+    "ALTER TABLE questions_question DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgres(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0002_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgres(CREATE_SQL), run_on_postgres(DROP_SQL)),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0003_question_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', '-is_accepted', '-created_at'], name='answer_question_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(condition=models.Q(('is_accepted', True)), fields=['question'], name='answer_accepted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='answer_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['answer', 'created_at'], name='comment_answer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-created_at', '-id'], name='question_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-score', '-id'], name='question_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-views'], name='question_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['question', 'value'], name='vote_question_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['answer', 'value'], name='vote_answer_value_idx'),
+        ),
+    ]
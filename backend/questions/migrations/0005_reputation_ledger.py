@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, Exists, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+# Points of questions.reputation when this migration was written
+QUESTION_UPVOTE = 5
+ANSWER_UPVOTE = 10
+DOWNVOTE = -2
+ACCEPTED = 15
+ACCEPT_GIVEN = 2
+
+
+def backfill_reputation(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Question = apps.get_model('questions', 'Question')
+    Answer = apps.get_model('questions', 'Answer')
+    Vote = apps.get_model('questions', 'Vote')
+
+    def total(queryset, group_by, aggregate):
+        rows = queryset.order_by().values(group_by).annotate(total=aggregate).values('total')
+        return Coalesce(Subquery(rows, output_field=models.IntegerField()), Value(0))
+
+    def points(upvote):
+        return Case(
+            When(value=1, then=Value(upvote)),
+            When(value=-1, then=Value(DOWNVOTE)),
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+
+    question_votes = Vote.objects.filter(question__author=OuterRef('pk'))
+    answer_votes = Vote.objects.filter(answer__author=OuterRef('pk'))
+    accepted_answers = Answer.objects.filter(author=OuterRef('pk'), is_accepted=True)
+    accepting_questions = Question.objects.filter(author=OuterRef('pk')).filter(
+        Exists(Answer.objects.filter(question=OuterRef('pk'), is_accepted=True))
+    )
+    User.objects.update(
+        total_votes=(
+            total(question_votes, 'question__author', Sum('value'))
+            + total(answer_votes, 'answer__author', Sum('value'))
+        ),
+        reputation=(
+            total(question_votes, 'question__author', Sum(points(QUESTION_UPVOTE)))
+            + total(answer_votes, 'answer__author', Sum(points(ANSWER_UPVOTE)))
+            + total(accepted_answers, 'author', Count('pk')) * ACCEPTED
+            + total(accepting_questions, 'author', Count('pk')) * ACCEPT_GIVEN
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_query_indexes'),
+        ('users', '0002_user_total_votes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReputationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('question_vote', 'Vote on a question'), ('answer_vote', 'Vote on an answer'), ('accepted', 'Answer accepted'), ('accept_given', 'Accepted an answer'), ('repair', 'Drift repaired by recompute_reputation')], max_length=20)),
+                ('delta', models.IntegerField()),
+                ('votes_delta', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('answer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='questions.answer')),
+                ('question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='questions.question')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reputation_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='reputation_user_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_reputation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_last_activity(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    Answer = apps.get_model('questions', 'Answer')
+    latest_answer = (
+        Answer.objects.filter(question=OuterRef('pk'))
+        .order_by()
+        .values('question')
+        .annotate(latest=Max('updated_at'))
+        .values('latest')
+    )
+    Question.objects.update(
+        last_activity_at=Greatest(F('updated_at'), Coalesce(Subquery(latest_answer), F('updated_at')))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0005_reputation_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0006_question_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('user', 'User'), ('question', 'Question'), ('answer', 'Answer'), ('comment', 'Comment')], max_length=10)),
+                ('external_id', models.CharField(max_length=64)),
+                ('local_id', models.IntegerField()),
+            ],
+            options={
+                'unique_together': {('source', 'kind', 'external_id')},
+            },
+        ),
+    ]
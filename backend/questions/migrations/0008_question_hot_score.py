@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:14
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Abs, Cast, Greatest, Log, Sign
+
+# Parameters of questions.ranking when this migration was written
+ANSWER_POINTS = 2
+VIEWS_PER_POINT = 100
+DECAY = 45000
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Epoch(Func):
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)::double precision'
+    output_field = models.FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="((julianday(%(expressions)s) - 2440587.5) * 86400.0)",
+            **extra_context,
+        )
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    points = (
+        Cast(F('score'), models.FloatField())
+        + Cast(F('answer_count'), models.FloatField()) * Value(float(ANSWER_POINTS))
+        + Cast(F('views'), models.FloatField()) / Value(float(VIEWS_PER_POINT))
+    )
+    order = Log(Value(10.0), Greatest(Abs(points), Value(1.0)))
+    age = (Epoch('created_at') - Value(EPOCH.timestamp())) / Value(float(DECAY))
+    Question.objects.update(hot_score=Sign(points) * order + age)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0007_imported_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-hot_score', '-id'], name='question_hot_idx'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
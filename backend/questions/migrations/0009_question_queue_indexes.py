@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0008_question_hot_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('answer_count', 0)), fields=['-created_at', '-id'], name='question_unanswered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('has_accepted', False)), fields=['-created_at', '-id'], name='question_unaccepted_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_pairs(apps, schema_editor):
+    qn = schema_editor.quote_name
+    pairs = qn(apps.get_model('questions', 'TagPair')._meta.db_table)
+    links = qn(apps.get_model('questions', 'Question').tags.through._meta.db_table)
+    schema_editor.execute(
+        f"INSERT INTO {pairs} ({qn('tag_id')}, {qn('other_id')}, {qn('count')}) "
+        f"SELECT a.{qn('tag_id')}, b.{qn('tag_id')}, COUNT(*) FROM {links} a "
+        f"JOIN {links} b ON b.{qn('question_id')} = a.{qn('question_id')} AND b.{qn('tag_id')} <> a.{qn('tag_id')} "
+        f"GROUP BY a.{qn('tag_id')}, b.{qn('tag_id')}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0009_question_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='questions.tag')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairs', to='questions.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', '-count'], name='tag_pair_count_idx')],
+                'unique_together': {('tag', 'other')},
+            },
+        ),
+        migrations.RunPython(backfill_pairs, migrations.RunPython.noop),
+    ]
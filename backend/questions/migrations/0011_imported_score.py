@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0010_tag_pair'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='imported_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='imported_score',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,9 +1,95 @@
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from config.sparse_fields import FULL
 
 User = get_user_model()
 
 
+def count_subquery(model, field):
+    """COUNT of ``model`` rows whose ``field`` points at the outer row, 0 when none"""
+    totals = (
+        model.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def users_with_post_counts(spec=FULL):
+    """Users annotated with the totals read by UserSerializer, when requested"""
+    annotations = {}
+    if spec.wants('questions_count'):
+        annotations['questions_total'] = count_subquery(Question, 'author')
+    if spec.wants('answers_count'):
+        annotations['answers_total'] = count_subquery(Answer, 'author')
+    return User.objects.annotate(**annotations)
+
+
+def tags_with_question_counts(spec=FULL):
+    """Tags annotated with the total read by TagSerializer, when requested"""
+    if not spec.wants('questions_count'):
+        return Tag.objects.all()
+    return Tag.objects.annotate(
+        questions_total=count_subquery(Question.tags.through, 'tag'),
+    )
+
+
+def related_prefetches(spec, name, lookup, queryset, compact_queryset=None):
+    """Prefetch for the nested field ``name``: full rows when it is expanded,
+    ``compact_queryset`` (ids only) when it is rendered as keys, else nothing.
+    ``queryset`` is called with the nested FieldSpec.
+    """
+    if spec.expanded(name):
+        return [Prefetch(lookup, queryset=queryset(spec.child(name)))]
+    if spec.wants(name) and compact_queryset is not None:
+        return [Prefetch(lookup, queryset=compact_queryset)]
+    return []
+
+
+def answer_prefetches(spec=FULL, prefix=''):
+    """Everything AnswerSerializer reads for the requested fields, one query each"""
+    prefetches = related_prefetches(spec, 'author', f'{prefix}author', users_with_post_counts)
+    comments = spec.child('comments')
+    prefetches += related_prefetches(
+        spec, 'comments', f'{prefix}comments', lambda _: Comment.objects.all(),
+        Comment.objects.only('id', 'answer_id'),
+    )
+    if spec.expanded('comments'):
+        prefetches += related_prefetches(
+            comments, 'author', f'{prefix}comments__author', users_with_post_counts
+        )
+    return prefetches
+
+
+class QuestionQuerySet(models.QuerySet):
+    def for_list(self, spec=FULL):
+        """Everything QuestionListSerializer reads, in a fixed number of queries.
+        
+        ``spec`` (a config.sparse_fields.FieldSpec) leaves out what isn't requested.
+        """
+        return self.prefetch_related(
+            *related_prefetches(spec, 'author', 'author', users_with_post_counts),
+            *related_prefetches(spec, 'tags', 'tags', tags_with_question_counts, Tag.objects.only('id')),
+        )
+    
+    def for_detail(self, spec=FULL):
+        """for_list() plus answers, comments and their authors, one query each"""
+        prefetches = related_prefetches(
+            spec, 'answers', 'answers', lambda _: Answer.objects.all(),
+            Answer.objects.only('id', 'question_id'),
+        )
+        if spec.expanded('answers'):
+            prefetches += answer_prefetches(spec.child('answers'), prefix='answers__')
+        return self.for_list(spec).prefetch_related(*prefetches)
+
+
 class Tag(models.Model):
     """Tag model for categorizing questions"""
     name = models.CharField(max_length=50, unique=True)
@@ -17,6 +103,27 @@ class Tag(models.Model):
         ordering = ['name']
 
 
+class TagPair(models.Model):
+    """Number of questions tagged with both ``tag`` and ``other``.
+
+    A sparse co-occurrence matrix stored in both directions, so the
+    neighbours of a tag are one index range. Kept up to date by
+    questions.tag_cooccurrence.
+    """
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='pairs')
+    other = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+')
+    count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.tag_id} + {self.other_id}: {self.count}"
+    
+    class Meta:
+        unique_together = [['tag', 'other']]
+        indexes = [
+            models.Index(fields=['tag', '-count'], name='tag_pair_count_idx'),
+        ]
+
+
 class Question(models.Model):
     """Question model"""
     title = models.CharField(max_length=300)
@@ -28,26 +135,56 @@ class Question(models.Model):
     )
     tags = models.ManyToManyField(Tag, related_name='questions')
     views = models.IntegerField(default=0)
+    # Denormalized counters, kept in sync by questions.counters
+    score = models.IntegerField(default=0)
+    # Part of the score carried over from an imported archive without
+    # the votes behind it, see questions/importer.py
+    imported_score = models.IntegerField(default=0)
+    answer_count = models.PositiveIntegerField(default=0)
+    has_accepted = models.BooleanField(default=False)
+    # Ranking of the hot/week/month feeds, see questions/ranking.py
+    hot_score = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped when answers, comments or votes change, see questions/conditional.py
+    version = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    
+    objects = QuestionQuerySet.as_manager()
     
     def __str__(self):
         return self.title
     
     @property
     def vote_count(self):
-        return self.votes.filter(value=1).count() - self.votes.filter(value=-1).count()
-    
-    @property
-    def answer_count(self):
-        return self.answers.count()
+        return self.score
     
     @property
     def has_accepted_answer(self):
-        return self.answers.filter(is_accepted=True).exists()
+        return self.has_accepted
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset feeds: latest (created_at, id), sort=votes (score, id)
+            # and sort=hot/week/month (hot_score, id)
+            models.Index(fields=['-created_at', '-id'], name='question_latest_idx'),
+            models.Index(fields=['-score', '-id'], name='question_score_idx'),
+            models.Index(fields=['-hot_score', '-id'], name='question_hot_idx'),
+            models.Index(fields=['-views'], name='question_views_idx'),
+            # Partial: the ?unanswered=1 and ?unaccepted=1 review queues,
+            # newest first, only as large as the queues themselves
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(answer_count=0),
+                name='question_unanswered_idx',
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(has_accepted=False),
+                name='question_unaccepted_idx',
+            ),
+        ]
 
 
 class Answer(models.Model):
@@ -64,6 +201,10 @@ class Answer(models.Model):
     )
     content = models.TextField()
     is_accepted = models.BooleanField(default=False)
+    # Denormalized vote total, kept in sync by questions.counters
+    score = models.IntegerField(default=0)
+    # Same as Question.imported_score
+    imported_score = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -72,10 +213,22 @@ class Answer(models.Model):
     
     @property
     def vote_count(self):
-        return self.votes.filter(value=1).count() - self.votes.filter(value=-1).count()
+        return self.score
     
     class Meta:
         ordering = ['-is_accepted', '-created_at']
+        indexes = [
+            # Answers of a question in display order
+            models.Index(fields=['question', '-is_accepted', '-created_at'], name='answer_question_idx'),
+            # Partial: only accepted answers, for accept_answer and has_accepted checks
+            models.Index(
+                fields=['question'],
+                condition=models.Q(is_accepted=True),
+                name='answer_accepted_idx',
+            ),
+            # UserAnswersView feed
+            models.Index(fields=['author', '-created_at', '-id'], name='answer_author_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -98,6 +251,9 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['answer', 'created_at'], name='comment_answer_idx'),
+        ]
 
 
 class Vote(models.Model):
@@ -133,8 +289,118 @@ class Vote(models.Model):
             ['user', 'question'],
             ['user', 'answer']
         ]
+        indexes = [
+            # Covering indexes for per-target score sums
+            models.Index(fields=['question', 'value'], name='vote_question_value_idx'),
+            models.Index(fields=['answer', 'value'], name='vote_answer_value_idx'),
+        ]
+    
+    @classmethod
+    def values_for_question(cls, user, question_id):
+        """The user's votes on a question and all its answers, in one query.
+
+        Returns (question_vote, {answer_id: value}); question_vote is None
+        when the user has not voted on the question itself.
+        """
+        return cls._split_question_votes(cls._question_vote_rows(user, question_id))
+    
+    @classmethod
+    async def avalues_for_question(cls, user, question_id):
+        rows = [row async for row in cls._question_vote_rows(user, question_id)]
+        return cls._split_question_votes(rows)
+    
+    @classmethod
+    def _question_vote_rows(cls, user, question_id):
+        return cls.objects.filter(
+            models.Q(question_id=question_id) | models.Q(answer__question_id=question_id),
+            user=user,
+        ).values_list('question_id', 'answer_id', 'value')
+    
+    @staticmethod
+    def _split_question_votes(rows):
+        question_vote, answer_votes = None, {}
+        for vote_question_id, answer_id, value in rows:
+            if vote_question_id is not None:
+                question_vote = value
+            else:
+                answer_votes[answer_id] = value
+        return question_vote, answer_votes
+    
+    @classmethod
+    def values_for_answers(cls, user, answer_ids):
+        """{answer_id: value} of the user's votes on the given answers"""
+        return dict(
+            cls.objects.filter(user=user, answer_id__in=answer_ids).values_list('answer_id', 'value')
+        )
+    
+    @classmethod
+    async def avalues_for_answers(cls, user, answer_ids):
+        rows = cls.objects.filter(user=user, answer_id__in=answer_ids).values_list('answer_id', 'value')
+        return {answer_id: value async for answer_id, value in rows}
     
     def __str__(self):
         if self.question:
             return f"{self.user.username} voted {self.value} on question"
         return f"{self.user.username} voted {self.value} on answer"
+
+
+class ReputationEvent(models.Model):
+    """Ledger of reputation changes, written by questions.reputation"""
+    QUESTION_VOTE = 'question_vote'
+    ANSWER_VOTE = 'answer_vote'
+    ACCEPTED = 'accepted'
+    ACCEPT_GIVEN = 'accept_given'
+    REPAIR = 'repair'
+    REASON_CHOICES = (
+        (QUESTION_VOTE, 'Vote on a question'),
+        (ANSWER_VOTE, 'Vote on an answer'),
+        (ACCEPTED, 'Answer accepted'),
+        (ACCEPT_GIVEN, 'Accepted an answer'),
+        (REPAIR, 'Drift repaired by recompute_reputation'),
+    )
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reputation_events'
+    )
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    delta = models.IntegerField()
+    votes_delta = models.IntegerField(default=0)
+    question = models.ForeignKey(Question, on_delete=models.SET_NULL, null=True, blank=True)
+    answer = models.ForeignKey(Answer, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.user.username} {self.delta:+d} ({self.reason})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='reputation_user_idx'),
+        ]
+
+
+class ImportedRecord(models.Model):
+    """External id -> local id of rows loaded by questions.importer, so imports can resume"""
+    USER = 'user'
+    QUESTION = 'question'
+    ANSWER = 'answer'
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (USER, 'User'),
+        (QUESTION, 'Question'),
+        (ANSWER, 'Answer'),
+        (COMMENT, 'Comment'),
+    )
+    
+    source = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    external_id = models.CharField(max_length=64)
+    local_id = models.IntegerField()
+    
+    def __str__(self):
+        return f"{self.source} {self.kind} {self.external_id} -> {self.local_id}"
+    
+    class Meta:
+        unique_together = [['source', 'kind', 'external_id']]
@@ -0,0 +1,169 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TagPagination(PageNumberPagination):
+    """Lets clients fetch large tag pages, e.g. for the tag picker"""
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique ordering such as (created_at, id).
+
+    Each page is a ``WHERE (key) < (last key)`` range read instead of an
+    OFFSET scan, and the total count is skipped unless ``?count=1`` is
+    passed. The view provides the ordering through ``get_keyset_ordering()``;
+    when it returns None (custom ?ordering=, relevance-ranked search) or
+    the client asks for ``?page=``, page-number pagination is used instead.
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Curseur invalide.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = view.get_keyset_ordering() if hasattr(view, 'get_keyset_ordering') else None
+        if ordering is None or 'page' in request.query_params:
+            self.fallback = PageNumberPagination()
+            # Same ?page_size= rules as the cursor pages
+            self.fallback.page_size = self.page_size
+            self.fallback.page_size_query_param = self.page_size_query_param
+            self.fallback.max_page_size = self.max_page_size
+            return self.fallback.paginate_queryset(queryset, request, view)
+        self.fallback = None
+        self.count = queryset.count() if self.wants_count(request) else None
+        return self.page_rows(list(self.page_window(queryset, request, ordering)))
+
+    async def apaginate_queryset(self, queryset, request, ordering):
+        """paginate_queryset() through the async ORM, for a keyset ordering"""
+        self.request = request
+        self.fallback = None
+        self.count = await queryset.acount() if self.wants_count(request) else None
+        window = self.page_window(queryset, request, ordering)
+        return self.page_rows([row async for row in window])
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param) in ('1', 'true')
+
+    def page_window(self, queryset, request, ordering):
+        """The rows after the cursor, one more than the page size to detect the next page"""
+        self.ordering = ordering
+        self.page_size_requested = self.get_page_size(request)
+        self.cursor_values, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            queryset = queryset.order_by(*[self._invert(field) for field in ordering])
+        else:
+            queryset = queryset.order_by(*ordering)
+        if self.cursor_values is not None:
+            try:
+                queryset = queryset.filter(self._after(self.cursor_values, self.reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size_requested + 1]
+
+    def page_rows(self, rows):
+        page_size, values, reverse = self.page_size_requested, self.cursor_values, self.reverse
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = has_more if reverse else values is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return payload
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def _key(self, row):
+        # Rows are model instances, or dicts when the view paginates .values()
+        if isinstance(row, dict):
+            return [self._json_value(row[field.lstrip('-')]) for field in self.ordering]
+        return [self._json_value(getattr(row, field.lstrip('-'))) for field in self.ordering]
+
+    @staticmethod
+    def _json_value(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, values, reverse):
+        """Rows strictly after ``values`` in the (possibly reversed) ordering"""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        payload = {'k': self._key(row)}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            values = payload['k']
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get('r'))
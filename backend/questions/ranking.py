@@ -0,0 +1,77 @@
+"""Stored "hot" score behind the ?sort=hot, ?sort=week and ?sort=month feeds.
+
+    points = score + ANSWER_POINTS * answer_count + views / VIEWS_PER_POINT
+    hot    = sign(points) * log10(max(|points|, 1)) + (created_at - EPOCH) / DECAY
+
+The age term grows with the creation date instead of shrinking with the
+age, so a score never has to be recomputed just because time passed: a
+question needs ten times the points of one posted DECAY seconds later to
+rank next to it. The score only changes with its inputs, and is refreshed
+in the UPDATEs that already change them (counters.touch_questions after
+votes and answers, the view counter flush), reading the new values in
+the same statement. ``rebuild_hot_scores`` recomputes every row.
+
+The feeds read the ``(-hot_score, -id)`` index in order; week and month
+keep the questions created in their window, which are the newest and so
+come first in that index.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.functions import Abs, Cast, Greatest, Log, Sign
+
+from .models import Question
+
+ANSWER_POINTS = 2
+VIEWS_PER_POINT = 100
+DECAY = 45000  # seconds, 12.5 hours
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+FEED_WINDOWS = {
+    'hot': None,
+    'week': timedelta(days=7),
+    'month': timedelta(days=30),
+}
+ORDERING = ('-hot_score', '-id')
+
+
+class Epoch(Func):
+    """Seconds since 1970-01-01 UTC of a datetime expression"""
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)::double precision'
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="((julianday(%(expressions)s) - 2440587.5) * 86400.0)",
+            **extra_context,
+        )
+
+
+def hot_score_expression(score=F('score'), answer_count=F('answer_count'), views=F('views')):
+    """The hot score of a row, from its fields or from the values an UPDATE sets them to"""
+    points = (
+        Cast(score, FloatField())
+        + Cast(answer_count, FloatField()) * Value(float(ANSWER_POINTS))
+        + Cast(views, FloatField()) / Value(float(VIEWS_PER_POINT))
+    )
+    order = Log(Value(10.0), Greatest(Abs(points), Value(1.0)))
+    age = (Epoch('created_at') - Value(EPOCH.timestamp())) / Value(float(DECAY))
+    return Sign(points) * order + age
+
+
+def refresh_hot_scores(question_ids):
+    if question_ids:
+        Question.objects.filter(pk__in=question_ids).update(hot_score=hot_score_expression())
+
+
+def rebuild_hot_scores():
+    """Recompute every hot score with one UPDATE, returns the number of rows"""
+    return Question.objects.update(hot_score=hot_score_expression())
+
+
+def feed(queryset, name, now):
+    """``queryset`` restricted to the window of the ``name`` feed"""
+    window = FEED_WINDOWS[name]
+    if window is not None:
+        queryset = queryset.filter(created_at__gte=now - window)
+    return queryset
@@ -0,0 +1,344 @@
+"""Related and duplicate question suggestions.
+
+Every question becomes a TF-IDF vector over its title, content and tags.
+The terms are hashed into ``DIMENSIONS`` signed buckets (feature
+hashing), so each vector is one fixed-size, L2-normalized float32 row of
+a NumPy matrix. Cosine similarity against every question is then a
+single matrix-vector product followed by a partial sort.
+
+The index is built from the database on first use, or memory-mapped from
+the files written by the build_related_index command (shared by all
+workers on the host). New and edited questions are added incrementally:
+by the signal receivers in this process once their transaction commits
+(a rolled back question never reaches the vectors), and every
+``REFRESH_INTERVAL`` seconds from the questions changed since the last
+refresh (see questions.export.changed_questions), which picks up writes
+made by other workers. A question is only vectorized again when its
+title, content or tags changed (votes and answers also mark it as
+changed, so a signature of the text is compared first). Document
+frequencies only grow between rebuilds, so IDF weights drift slowly
+until the next build.
+
+Rows of a memory-mapped matrix are never written: replaced or deleted
+questions are masked there and their new vectors go to a small
+in-memory matrix scored alongside it. Rows of that matrix are
+overwritten in place, and it is compacted once deleted rows make up half
+of it.
+"""
+import json
+import math
+import os
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .export import changed_questions
+from .models import Question
+from .search import tokenize
+
+DEFAULTS = {
+    'PATH': None,
+    'DIMENSIONS': 512,
+    'REFRESH_INTERVAL': 60,
+    'DUPLICATE_THRESHOLD': 0.5,
+}
+
+TITLE_WEIGHT = 3.0
+TAG_WEIGHT = 2.0
+DF_BUCKETS = 1 << 20
+BATCH_SIZE = 2000
+COMPACT_MIN_ROWS = 64
+FILES = ('ids.npy', 'vectors.npy', 'df.npy', 'signatures.npy')
+
+
+def signature(title, content, tag_names):
+    """Checksum of everything a vector is made of, to skip unchanged questions"""
+    return zlib.crc32('\0'.join([title, content, *sorted(tag_names)]).encode())
+
+
+def features(title, content, tag_names):
+    """(term hashes, sublinear term weights) of a question, as arrays"""
+    weights = Counter()
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(content):
+        weights[token] += 1
+    for name in tag_names:
+        weights['#' + name.lower()] += TAG_WEIGHT
+    # crc32 rather than hash(): the hashes must match across processes
+    hashes = np.fromiter((zlib.crc32(token.encode()) for token in weights), dtype=np.uint32, count=len(weights))
+    tf = np.fromiter((1 + math.log(weight) for weight in weights.values()), dtype=np.float32, count=len(weights))
+    return hashes, tf
+
+
+def question_tag_names(question_ids):
+    """{question_id: [tag names]} in one query"""
+    names = {}
+    links = Question.tags.through.objects.filter(question_id__in=question_ids).values_list('question_id', 'tag__name')
+    for question_id, name in links:
+        names.setdefault(question_id, []).append(name)
+    return names
+
+
+def question_batches(queryset):
+    """(question_id, title, content, tag names) of ``queryset``, BATCH_SIZE rows at a time"""
+    rows = queryset.order_by().values_list('id', 'title', 'content').iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield from _with_tags(batch)
+            batch = []
+    if batch:
+        yield from _with_tags(batch)
+
+
+def _with_tags(batch):
+    tags = question_tag_names([row[0] for row in batch])
+    for question_id, title, content in batch:
+        yield question_id, title, content, tags.get(question_id, [])
+
+
+class RelatedQuestionsIndex:
+    def __init__(self, path=None, dimensions=512, refresh_interval=60, duplicate_threshold=0.5):
+        self.path = path
+        self.dimensions = dimensions
+        self.refresh_interval = refresh_interval
+        self.duplicate_threshold = duplicate_threshold
+        self._lock = threading.RLock()
+        self._built = False
+
+    def _reset(self, ids, vectors, df, documents, signatures):
+        # Base segment: possibly memory-mapped, never written
+        self._base_ids = ids
+        self._base_vectors = vectors
+        self._masked = np.zeros(len(ids), dtype=bool)
+        # Recent segment: questions added or replaced since, grown by doubling
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._size = 0
+        self._deleted = 0
+        self._rows = {int(question_id): (True, row) for row, question_id in enumerate(ids)}
+        self._signatures = dict(zip(ids.tolist(), signatures.tolist()))
+        self._df = df
+        self._documents = documents
+
+    def _vector(self, hashes, tf):
+        idf = np.log((1 + self._documents) / (1 + self._df[hashes % DF_BUCKETS])) + 1
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        np.add.at(vector, hashes % self.dimensions, signs * tf * idf)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def build(self):
+        """Vectorize every question from the database"""
+        with self._lock:
+            started = timezone.now()
+            documents = []
+            df = np.zeros(DF_BUCKETS, dtype=np.int32)
+            for question_id, title, content, tag_names in question_batches(Question.objects.all()):
+                hashes, tf = features(title, content, tag_names)
+                df[np.unique(hashes % DF_BUCKETS)] += 1
+                documents.append((question_id, hashes, tf, signature(title, content, tag_names)))
+            ids = np.fromiter((document[0] for document in documents), dtype=np.int64, count=len(documents))
+            signatures = np.fromiter((document[3] for document in documents), dtype=np.uint32, count=len(documents))
+            vectors = np.zeros((len(documents), self.dimensions), dtype=np.float32)
+            self._reset(ids, vectors, df, len(documents), signatures)
+            for row, (_, hashes, tf, _) in enumerate(documents):
+                self._base_vectors[row] = self._vector(hashes, tf)
+            self._synced_at = started
+            self._checked = time.monotonic()
+            self._built = True
+
+    def save(self, path=None):
+        """Write the index as .npy files (plus meta.json) that load() can memory-map"""
+        path = str(path or self.path)
+        with self._lock:
+            self._ensure_built()
+            keep = ~self._masked
+            ids = np.concatenate([self._base_ids[keep], self._ids[:self._size]])
+            vectors = np.concatenate([self._base_vectors[keep], self._vectors[:self._size]])
+            ids, vectors = ids[ids > 0], vectors[ids > 0]
+            signatures = np.fromiter(
+                (self._signatures[question_id] for question_id in ids.tolist()), dtype=np.uint32, count=len(ids)
+            )
+            arrays = {'ids.npy': ids, 'vectors.npy': vectors, 'df.npy': self._df, 'signatures.npy': signatures}
+            meta = {
+                'dimensions': self.dimensions,
+                'documents': self._documents,
+                'synced_at': self._synced_at.isoformat(),
+            }
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f'{name}.tmp.npy'), array)
+            os.replace(os.path.join(path, f'{name}.tmp.npy'), os.path.join(path, name))
+        with open(os.path.join(path, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+        return len(arrays['ids.npy'])
+
+    def load(self, path=None):
+        """Memory-map an index written by save(); False if there is none (or another size)"""
+        path = str(path or self.path)
+        try:
+            with open(os.path.join(path, 'meta.json')) as file:
+                meta = json.load(file)
+            ids, vectors, df, signatures = (np.load(os.path.join(path, name), mmap_mode='r') for name in FILES)
+        except (OSError, ValueError):
+            return False
+        # A save() running concurrently may have replaced only some files
+        if meta['dimensions'] != self.dimensions or not len(ids) == len(vectors) == len(signatures):
+            return False
+        with self._lock:
+            self._reset(ids, vectors, np.array(df), meta['documents'], signatures)
+            self._synced_at = datetime.fromisoformat(meta['synced_at'])
+            self._checked = 0
+            self._built = True
+        return True
+
+    def _ensure_built(self):
+        if not self._built and not (self.path and self.load()):
+            self.build()
+
+    def refresh(self, force=False):
+        """Index the questions changed since the last refresh, at most every refresh_interval seconds"""
+        with self._lock:
+            self._ensure_built()
+            if not force and time.monotonic() - self._checked < self.refresh_interval:
+                return 0
+            started = timezone.now()
+            changed = 0
+            for question_id, title, content, tag_names in question_batches(changed_questions(self._synced_at)):
+                changed += self._add(question_id, title, content, tag_names)
+            self._synced_at = started
+            self._checked = time.monotonic()
+            return changed
+
+    def _add(self, question_id, title, content, tag_names):
+        """Vectorize a new or changed question, False if its text and tags are unchanged"""
+        key = signature(title, content, tag_names)
+        location = self._rows.get(question_id)
+        if location is not None and self._signatures.get(question_id) == key:
+            return False
+        hashes, tf = features(title, content, tag_names)
+        if location is None:
+            self._df[np.unique(hashes % DF_BUCKETS)] += 1
+            self._documents += 1
+        self._signatures[question_id] = key
+        in_base, row = location or (True, None)
+        if not in_base:
+            self._vectors[row] = self._vector(hashes, tf)
+            return True
+        if row is not None:
+            self._masked[row] = True
+        if self._size == len(self._ids):
+            capacity = max(2 * self._size, 64)
+            self._ids = np.resize(self._ids, capacity)
+            self._vectors = np.concatenate([
+                self._vectors[:self._size], np.zeros((capacity - self._size, self.dimensions), dtype=np.float32)
+            ])
+        self._ids[self._size] = question_id
+        self._vectors[self._size] = self._vector(hashes, tf)
+        self._rows[question_id] = (False, self._size)
+        self._size += 1
+        return True
+
+    def _remove(self, question_id):
+        location = self._rows.pop(question_id, None)
+        self._signatures.pop(question_id, None)
+        if location is None:
+            return
+        in_base, row = location
+        if in_base:
+            self._masked[row] = True
+            return
+        self._ids[row] = 0
+        self._vectors[row] = 0
+        self._deleted += 1
+        if self._deleted >= max(COMPACT_MIN_ROWS, self._size // 2):
+            self._compact()
+
+    def _compact(self):
+        """Drop the deleted rows of the recent segment"""
+        live = self._ids[:self._size] > 0
+        self._ids = self._ids[:self._size][live]
+        self._vectors = self._vectors[:self._size][live]
+        self._size = len(self._ids)
+        self._deleted = 0
+        for row, question_id in enumerate(self._ids.tolist()):
+            self._rows[question_id] = (False, row)
+
+    def index_question(self, question, tag_names=None):
+        with self._lock:
+            if not self._built:
+                return
+            if tag_names is None:
+                tag_names = list(question.tags.values_list('name', flat=True))
+            self._add(question.pk, question.title, question.content, tag_names)
+
+    def remove_question(self, question_id):
+        with self._lock:
+            if self._built:
+                self._remove(question_id)
+
+    def _rank(self, vector, limit, exclude=None, min_score=0.0):
+        base_scores = self._base_vectors @ vector
+        base_scores[self._masked] = -np.inf
+        ids = np.concatenate([self._base_ids, self._ids[:self._size]])
+        scores = np.concatenate([base_scores, self._vectors[:self._size] @ vector])
+        scores[ids <= 0] = -np.inf
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(ids[row]), float(scores[row])) for row in top if scores[row] > min_score]
+
+    def similar_to_question(self, question_id, limit=5):
+        """[(question_id, similarity)] most similar first, [] for an unknown question"""
+        self.refresh()
+        with self._lock:
+            if question_id not in self._rows:
+                # Posted since the last refresh, possibly through another worker
+                self.refresh(force=True)
+            location = self._rows.get(question_id)
+            if location is None:
+                return []
+            in_base, row = location
+            vector = np.array(self._base_vectors[row] if in_base else self._vectors[row])
+            return self._rank(vector, limit, exclude=question_id)
+
+    def similar_to_text(self, title, content='', tag_names=(), limit=5, min_score=None):
+        """Questions similar to an unsaved one, e.g. a draft before it is posted"""
+        self.refresh()
+        with self._lock:
+            vector = self._vector(*features(title, content, tag_names))
+            threshold = self.duplicate_threshold if min_score is None else min_score
+            return self._rank(vector, limit, min_score=threshold)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_related_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                conf = {**DEFAULTS, **getattr(settings, 'QUESTION_RELATED', {})}
+                _index = RelatedQuestionsIndex(
+                    path=conf['PATH'],
+                    dimensions=conf['DIMENSIONS'],
+                    refresh_interval=conf['REFRESH_INTERVAL'],
+                    duplicate_threshold=conf['DUPLICATE_THRESHOLD'],
+                )
+    return _index
@@ -0,0 +1,219 @@
+"""Incremental reputation engine.
+
+Vote and accept events update ``User.reputation`` and ``User.total_votes``
+with F() deltas and append a ReputationEvent row to the ledger, inside the
+caller's transaction. Changing or withdrawing a vote applies the
+difference between the old and the new value. Reversals caused by deletes
+(see questions.signals) update the figures without a ledger row.
+``recompute_reputation`` derives both figures from the votes and answers
+tables with aggregate SQL and repairs any drift. The ``imported_score``
+of imported posts counts as that many upvotes (or downvotes when
+negative), since the archive did not say who voted.
+"""
+from collections import defaultdict
+
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Answer, Question, ReputationEvent, User, Vote
+
+QUESTION_UPVOTE = 5
+ANSWER_UPVOTE = 10
+DOWNVOTE = -2
+ACCEPTED = 15
+ACCEPT_GIVEN = 2
+
+UPVOTE_POINTS = {'question': QUESTION_UPVOTE, 'answer': ANSWER_UPVOTE}
+
+
+def vote_points(kind, value):
+    """Reputation earned by the author of a ``kind`` post for a vote of ``value``"""
+    if value == 1:
+        return UPVOTE_POINTS[kind]
+    if value == -1:
+        return DOWNVOTE
+    return 0
+
+
+def record(user_id, reason, delta, votes_delta=0, question_id=None, answer_id=None, ledger=True):
+    """Apply a change to the user's figures and log it, unless ``ledger`` is False.
+
+    Changes caused by deletes pass ledger=False: the posts, or the user
+    themselves, may be part of the same cascade and cannot be referenced.
+    """
+    if not delta and not votes_delta:
+        return
+    User.objects.filter(pk=user_id).update(
+        reputation=F('reputation') + delta,
+        total_votes=F('total_votes') + votes_delta,
+    )
+    if not ledger:
+        return
+    ReputationEvent.objects.create(
+        user_id=user_id,
+        reason=reason,
+        delta=delta,
+        votes_delta=votes_delta,
+        question_id=question_id,
+        answer_id=answer_id,
+    )
+
+
+def question_vote_changed(question_id, author_id, old_value, new_value, ledger=True):
+    record(
+        author_id,
+        ReputationEvent.QUESTION_VOTE,
+        vote_points('question', new_value) - vote_points('question', old_value),
+        votes_delta=(new_value or 0) - (old_value or 0),
+        question_id=question_id,
+        ledger=ledger,
+    )
+
+
+def answer_vote_changed(answer_id, author_id, old_value, new_value, ledger=True):
+    record(
+        author_id,
+        ReputationEvent.ANSWER_VOTE,
+        vote_points('answer', new_value) - vote_points('answer', old_value),
+        votes_delta=(new_value or 0) - (old_value or 0),
+        answer_id=answer_id,
+        ledger=ledger,
+    )
+
+
+def votes_changed(changes):
+    """Apply a batch of vote changes with one UPDATE and one ledger insert.
+
+    ``changes``: [(kind, target_id, author_id, old_value, new_value)]
+    """
+    totals = defaultdict(lambda: [0, 0])
+    events = []
+    for kind, target_id, author_id, old_value, new_value in changes:
+        delta = vote_points(kind, new_value) - vote_points(kind, old_value)
+        votes_delta = (new_value or 0) - (old_value or 0)
+        if not delta and not votes_delta:
+            continue
+        totals[author_id][0] += delta
+        totals[author_id][1] += votes_delta
+        events.append(ReputationEvent(
+            user_id=author_id,
+            reason=ReputationEvent.QUESTION_VOTE if kind == 'question' else ReputationEvent.ANSWER_VOTE,
+            delta=delta,
+            votes_delta=votes_delta,
+            question_id=target_id if kind == 'question' else None,
+            answer_id=target_id if kind == 'answer' else None,
+        ))
+    if not totals:
+        return
+
+    def per_user(position):
+        return Case(
+            *[When(pk=user_id, then=Value(figures[position])) for user_id, figures in totals.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    User.objects.filter(pk__in=totals).update(
+        reputation=F('reputation') + per_user(0),
+        total_votes=F('total_votes') + per_user(1),
+    )
+    ReputationEvent.objects.bulk_create(events)
+
+
+def answer_accepted(answer, question, previously_accepted):
+    """``previously_accepted``: [(answer_id, author_id)] accepted before this call"""
+    if any(answer_id == answer.pk for answer_id, _ in previously_accepted):
+        return
+    for answer_id, author_id in previously_accepted:
+        record(author_id, ReputationEvent.ACCEPTED, -ACCEPTED, question_id=question.pk, answer_id=answer_id)
+    record(answer.author_id, ReputationEvent.ACCEPTED, ACCEPTED, question_id=question.pk, answer_id=answer.pk)
+    if not previously_accepted:
+        record(question.author_id, ReputationEvent.ACCEPT_GIVEN, ACCEPT_GIVEN, question_id=question.pk)
+
+
+def acceptance_removed(answer_author_id, question_author_id):
+    """An accepted answer was deleted"""
+    record(answer_author_id, ReputationEvent.ACCEPTED, -ACCEPTED, ledger=False)
+    record(question_author_id, ReputationEvent.ACCEPT_GIVEN, -ACCEPT_GIVEN, ledger=False)
+
+
+def _sum_subquery(queryset, group_by, expression):
+    totals = queryset.order_by().values(group_by).annotate(total=Sum(expression)).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def _count_subquery(queryset, group_by):
+    totals = queryset.order_by().values(group_by).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def expected_figures():
+    """Users annotated with expected_reputation / expected_total_votes from the source tables"""
+    points = {
+        kind: Case(
+            When(value=1, then=Value(UPVOTE_POINTS[kind])),
+            When(value=-1, then=Value(DOWNVOTE)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        for kind in ('question', 'answer')
+    }
+    carried_points = {
+        kind: Case(
+            When(imported_score__gt=0, then=F('imported_score') * UPVOTE_POINTS[kind]),
+            default=F('imported_score') * -DOWNVOTE,
+            output_field=IntegerField(),
+        )
+        for kind in ('question', 'answer')
+    }
+    question_votes = Vote.objects.filter(question__author=OuterRef('pk'))
+    answer_votes = Vote.objects.filter(answer__author=OuterRef('pk'))
+    imported_questions = Question.objects.filter(author=OuterRef('pk')).exclude(imported_score=0)
+    imported_answers = Answer.objects.filter(author=OuterRef('pk')).exclude(imported_score=0)
+    accepted_answers = Answer.objects.filter(author=OuterRef('pk'), is_accepted=True)
+    accepting_questions = Question.objects.filter(author=OuterRef('pk')).filter(
+        Exists(Answer.objects.filter(question=OuterRef('pk'), is_accepted=True))
+    )
+    return User.objects.annotate(
+        expected_total_votes=(
+            _sum_subquery(question_votes, 'question__author', 'value')
+            + _sum_subquery(answer_votes, 'answer__author', 'value')
+            + _sum_subquery(imported_questions, 'author', 'imported_score')
+            + _sum_subquery(imported_answers, 'author', 'imported_score')
+        ),
+        expected_reputation=(
+            _sum_subquery(question_votes, 'question__author', points['question'])
+            + _sum_subquery(answer_votes, 'answer__author', points['answer'])
+            + _sum_subquery(imported_questions, 'author', carried_points['question'])
+            + _sum_subquery(imported_answers, 'author', carried_points['answer'])
+            + _count_subquery(accepted_answers, 'author') * ACCEPTED
+            + _count_subquery(accepting_questions, 'author') * ACCEPT_GIVEN
+        ),
+    )
+
+
+def recompute_reputation(record_events=True, batch_size=1000):
+    """Repair users whose stored figures drifted; returns how many were fixed.
+
+    With ``record_events`` a REPAIR ledger row is written per fixed user.
+    """
+    drifted = (
+        expected_figures()
+        .exclude(reputation=F('expected_reputation'), total_votes=F('expected_total_votes'))
+        .only('pk', 'reputation', 'total_votes')
+    )
+    users, events = [], []
+    for user in drifted.iterator(chunk_size=batch_size):
+        if record_events:
+            events.append(ReputationEvent(
+                user_id=user.pk,
+                reason=ReputationEvent.REPAIR,
+                delta=user.expected_reputation - user.reputation,
+                votes_delta=user.expected_total_votes - user.total_votes,
+            ))
+        user.reputation = user.expected_reputation
+        user.total_votes = user.expected_total_votes
+        users.append(user)
+    User.objects.bulk_update(users, ['reputation', 'total_votes'], batch_size=batch_size)
+    ReputationEvent.objects.bulk_create(events, batch_size=batch_size)
+    return len(users)
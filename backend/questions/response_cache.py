@@ -0,0 +1,164 @@
+"""Response cache for anonymous reads.
+
+Anonymous GETs of the question list, question detail and tag list are
+served from the ``RESPONSE_CACHE['CACHE']`` cache alias (any Django cache
+backend: local memory, filesystem, Redis). The response data is stored,
+not the rendered bytes, so content negotiation still happens per request.
+
+Keys combine the path, the normalized query string and the current token
+of each scope the response depends on:
+
+- ``questions``: every question list page
+- ``question:<pk>``: one question's detail page
+- ``tags``: the tag list
+- ``all``: everything, for tag renames and bulk maintenance commands
+
+Writes don't delete entries. questions.signals replaces the token of the
+affected scopes with a fresh random one once the transaction commits, so
+stale entries can no longer be reached and age out of the cache. A fresh
+token (instead of a counter) stays correct when two workers invalidate
+at the same time on a backend without atomic increments.
+
+Author cards embedded in cached pages (reputation, post counts) are only
+refreshed with the page's own content. Local memory caches are per
+process: with several workers use the filesystem or a Redis backend so
+invalidations reach all of them.
+"""
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'TIMEOUT': None,
+    'KEY_PREFIX': 'response',
+}
+
+GLOBAL_SCOPE = 'all'
+QUESTION_LIST = 'questions'
+TAG_LIST = 'tags'
+
+
+def question_scope(question_id):
+    return f'question:{question_id}'
+
+
+def normalized_query(request):
+    """Query string with parameters and repeated values in a stable order"""
+    params = request.query_params
+    return urlencode(sorted((name, value) for name in params for value in params.getlist(name)))
+
+
+class ResponseCache:
+    def __init__(self, cache, timeout=None, key_prefix='response'):
+        self.cache = cache
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def _token_key(self, scope):
+        return f'{self.key_prefix}:token:{scope}'
+
+    def tokens(self, scopes):
+        """Current token of each scope, creating the missing ones"""
+        keys = [self._token_key(scope) for scope in scopes]
+        found = self.cache.get_many(keys)
+        tokens = []
+        for key in keys:
+            token = found.get(key)
+            if token is None:
+                token = uuid.uuid4().hex
+                if not self.cache.add(key, token, timeout=None):
+                    token = self.cache.get(key, token)
+            tokens.append(token)
+        return tokens
+
+    def key(self, request, *scopes):
+        tokens = self.tokens((GLOBAL_SCOPE, *scopes))
+        digest = hashlib.md5(f'{request.path}?{normalized_query(request)}'.encode()).hexdigest()
+        return f"{self.key_prefix}:{':'.join(tokens)}:{digest}"
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, data):
+        self.cache.set(key, data, timeout=self.timeout)
+
+    def invalidate(self, *scopes):
+        """Retire the scopes' tokens once the current transaction commits"""
+        def retire():
+            self.cache.set_many({self._token_key(scope): uuid.uuid4().hex for scope in scopes}, timeout=None)
+        transaction.on_commit(retire)
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """The configured ResponseCache, None when disabled"""
+    global _response_cache
+    conf = {**DEFAULTS, **getattr(settings, 'RESPONSE_CACHE', {})}
+    if not conf['ENABLED']:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(caches[conf['CACHE']], conf['TIMEOUT'], conf['KEY_PREFIX'])
+    return _response_cache
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    """Pick up a new RESPONSE_CACHE or CACHES (override_settings in tests)"""
+    global _response_cache
+    if setting in ('RESPONSE_CACHE', 'CACHES'):
+        _response_cache = None
+
+
+def invalidate(*scopes):
+    response_cache = get_response_cache()
+    if response_cache is not None and scopes:
+        response_cache.invalidate(*scopes)
+
+
+def cacheable(request):
+    return request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+
+
+def cached_response(request, scopes, build):
+    """Serve ``build()``'s response for ``request`` from the cache when possible"""
+    response_cache = get_response_cache()
+    if response_cache is None or not cacheable(request):
+        return build()
+    key = response_cache.key(request, *scopes)
+    data = response_cache.get(key)
+    if data is not None:
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+    response = build()
+    # Streamed responses have no data to keep
+    if response.status_code == 200 and isinstance(response, Response):
+        response_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+    return response
+
+
+async def acached_data(request, scopes, build):
+    """Async views' cached_response(): (data, 'HIT' / 'MISS' / None), ``await build()`` on a miss"""
+    response_cache = get_response_cache()
+    if response_cache is None or not cacheable(request):
+        return await build(), None
+    key = await sync_to_async(response_cache.key)(request, *scopes)
+    data = await sync_to_async(response_cache.get)(key)
+    if data is not None:
+        return data, 'HIT'
+    data = await build()
+    await sync_to_async(response_cache.set)(key, data)
+    return data, 'MISS'
@@ -0,0 +1,215 @@
+"""Full-text search over questions.
+
+Two interchangeable engines, picked by settings.QUESTION_SEARCH['BACKEND']
+('auto' selects by database vendor):
+
+- PostgresSearchEngine: a stored, generated ``search_vector`` tsvector
+  column (title weighted A, content B) with a GIN index, created by
+  migration 0003 on PostgreSQL only. The database keeps it up to date.
+- InvertedIndexSearchEngine: a pure-Python, in-process inverted index for
+  SQLite and tests. Built lazily on first search, updated by the Question
+  receivers of this process once their transaction commits, and every
+  ``refresh_interval`` seconds from the questions changed since the last
+  refresh (questions.export.changed_questions), which picks up writes
+  made by other workers. Questions deleted by another worker stay in the
+  index until the next build, but the search queryset no longer finds them.
+
+Both return the queryset restricted to matches and ordered by relevance.
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .export import changed_questions
+from .models import Question
+
+TEXT_SEARCH_CONFIG = 'simple'
+TITLE_WEIGHT = 2.5
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lowercased, accent-stripped word tokens"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return TOKEN_RE.findall(text.lower())
+
+
+class PostgresSearchEngine:
+    def search(self, queryset, terms):
+        column = f'{Question._meta.db_table}.search_vector'
+        query = f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %s)"
+        return queryset.filter(
+            RawSQL(f'{column} @@ {query}', (terms,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank_cd({column}, {query})', (terms,), output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+    def index_question(self, question):
+        """Nothing to do, the generated column follows the row"""
+
+    def remove_question(self, question_id):
+        pass
+
+
+class InvertedIndexSearchEngine:
+    """BM25 ranking over an in-memory {token: {question_id: weighted tf}} index"""
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, max_results=1000, refresh_interval=60):
+        self.max_results = max_results
+        self.refresh_interval = refresh_interval
+        self._postings = defaultdict(dict)
+        self._doc_tokens = {}
+        self._doc_lengths = {}
+        self._built = False
+        self._synced_at = None
+        self._checked = 0
+        self._lock = threading.RLock()
+
+    def _weighted_terms(self, title, content):
+        weights = Counter()
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(content):
+            weights[token] += 1
+        return weights
+
+    def _add(self, question_id, title, content):
+        weights = self._weighted_terms(title, content)
+        for token, weight in weights.items():
+            self._postings[token][question_id] = weight
+        self._doc_tokens[question_id] = set(weights)
+        self._doc_lengths[question_id] = sum(weights.values())
+
+    def _remove(self, question_id):
+        for token in self._doc_tokens.pop(question_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(question_id, None)
+                if not postings:
+                    del self._postings[token]
+        self._doc_lengths.pop(question_id, None)
+
+    def build(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_tokens.clear()
+            self._doc_lengths.clear()
+            started = timezone.now()
+            rows = Question.objects.order_by().values_list('id', 'title', 'content')
+            for question_id, title, content in rows.iterator(chunk_size=2000):
+                self._add(question_id, title, content)
+            self._synced_at = started
+            self._checked = time.monotonic()
+            self._built = True
+
+    def refresh(self, force=False):
+        """Index the questions changed since the last refresh, at most every refresh_interval seconds"""
+        with self._lock:
+            if not self._built:
+                self.build()
+                return 0
+            if not force and time.monotonic() - self._checked < self.refresh_interval:
+                return 0
+            started = timezone.now()
+            changed = 0
+            rows = changed_questions(self._synced_at).values_list('id', 'title', 'content')
+            for question_id, title, content in rows.iterator(chunk_size=2000):
+                self._remove(question_id)
+                self._add(question_id, title, content)
+                changed += 1
+            self._synced_at = started
+            self._checked = time.monotonic()
+            return changed
+
+    def index_question(self, question):
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(question.pk)
+            self._add(question.pk, question.title, question.content)
+
+    def remove_question(self, question_id):
+        with self._lock:
+            if self._built:
+                self._remove(question_id)
+
+    def rank(self, terms):
+        """[(question_id, score)] best first, every token must match"""
+        tokens = set(tokenize(terms))
+        if not tokens:
+            return []
+        with self._lock:
+            self.refresh()
+            postings = [self._postings.get(token, {}) for token in tokens]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            matches = set(postings[0]).intersection(*postings[1:])
+            total = len(self._doc_lengths)
+            average_length = sum(self._doc_lengths.values()) / total
+            scores = {}
+            for posting in postings:
+                idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+                for question_id in matches:
+                    tf = posting[question_id]
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[question_id] / average_length)
+                    scores[question_id] = scores.get(question_id, 0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:self.max_results]
+
+    def search(self, queryset, terms):
+        ranked = self.rank(terms)
+        if not ranked:
+            return queryset.none()
+        ids = [question_id for question_id, _ in ranked]
+        position = Case(
+            *[When(pk=question_id, then=Value(i)) for i, question_id in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).annotate(search_position=position).order_by('search_position')
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_search_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                conf = getattr(settings, 'QUESTION_SEARCH', {})
+                backend = conf.get('BACKEND', 'auto')
+                if backend == 'auto':
+                    backend = (
+                        'questions.search.PostgresSearchEngine'
+                        if connection.vendor == 'postgresql'
+                        else 'questions.search.InvertedIndexSearchEngine'
+                    )
+                _engine = import_string(backend)(**conf.get('OPTIONS', {}))
+    return _engine
+
+
+class QuestionSearchFilter(BaseFilterBackend):
+    """Drop-in replacement for SearchFilter on ?search=, ranked by relevance"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        return get_search_engine().search(queryset, terms)
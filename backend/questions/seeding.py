@@ -0,0 +1,208 @@
+"""Synthetic dataset generator used by the benchmarks.
+
+Everything is written with bulk_create in batches, bypassing User.save()
+and its full_clean(); derived counters and reputation are rebuilt once
+at the end.
+Generated names carry a per-run prefix so seeding can be repeated on the
+same database.
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import rebuild_counters
+from .models import Answer, Comment, Question, Tag, User, Vote
+from .ranking import rebuild_hot_scores
+from .tag_cooccurrence import rebuild_cooccurrence
+from .reputation import recompute_reputation
+from .response_cache import GLOBAL_SCOPE, invalidate
+from .tag_directory import invalidate_tag_directory
+
+DEFAULT_VOLUMES = {
+    'users': 200,
+    'tags': 50,
+    'questions': 2000,
+    'answers_per_question': 3,
+    'comments_per_answer': 1,
+    'votes_per_question': 5,
+    'votes_per_answer': 2,
+    'tags_per_question': 3,
+}
+
+WORDS = (
+    'django python query index cache vote answer question tag model view '
+    'serializer migration database postgres sqlite error exception request '
+    'response json pagination cursor async thread worker deploy render '
+    'frontend react api token auth user profile performance latency'
+).split()
+
+
+def bulk_create_with_timestamps(model, objs, batch_size):
+    """bulk_create that keeps the objects' own created_at/updated_at values.
+
+    auto_now/auto_now_add overwrite them on insert, so they are written
+    back afterwards with one UPDATE ... FROM (VALUES ...) per batch; the
+    model fields are left untouched, so concurrent saves keep their
+    automatic timestamps. The objects need their primary key back from
+    bulk_create (PostgreSQL, SQLite 3.33+).
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    stamps = [[getattr(obj, field.attname) for field in fields] for obj in objs]
+    objs = model.objects.bulk_create(objs, batch_size=batch_size)
+    if not fields or not objs:
+        return objs
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [qn(field.column) for field in fields]
+    rows = [
+        [obj.pk, *(connection.ops.adapt_datetimefield_value(value) for value in values)]
+        for obj, values in zip(objs, stamps)
+    ]
+    size = min(batch_size, connection.ops.bulk_batch_size([model._meta.pk, *fields], objs))
+    placeholder = f"({', '.join(['%s'] * (len(fields) + 1))})"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            cursor.execute(
+                f"WITH stamps ({qn('pk')}, {', '.join(columns)}) AS (VALUES {', '.join([placeholder] * len(batch))}) "
+                f"UPDATE {table} SET {', '.join(f'{column} = stamps.{column}' for column in columns)} "
+                f"FROM stamps WHERE {table}.{qn(model._meta.pk.column)} = stamps.{qn('pk')}",
+                [value for row in batch for value in row],
+            )
+    for obj, values in zip(objs, stamps):
+        for field, value in zip(fields, values):
+            setattr(obj, field.attname, value)
+    return objs
+
+
+def _spread(rng, count):
+    """Around count on average, between 0 and 2 * count"""
+    return rng.randint(0, 2 * count) if count else 0
+
+
+def seed(volumes=None, random_seed=0, batch_size=2000, days=365, stdout=None):
+    """Insert a synthetic Q&A dataset and return the number of rows per model"""
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(random_seed)
+    prefix = uuid.uuid4().hex[:6]
+    now = timezone.now()
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    def moment():
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    created = {}
+    with transaction.atomic():
+        password = make_password('seed-password')
+        users = bulk_create_with_timestamps(
+            User,
+            [
+                User(
+                    username=f'seed_{prefix}_{i}',
+                    email=f'seed_{prefix}_{i}@example.com',
+                    password=password,
+                    created_at=moment(),
+                    updated_at=now,
+                )
+                for i in range(volumes['users'])
+            ],
+            batch_size=batch_size,
+        )
+        user_ids = [user.pk for user in users]
+        created['users'] = len(users)
+        log(f"{len(users)} users")
+
+        tags = Tag.objects.bulk_create(
+            [Tag(name=f'{prefix}-tag{i}', created_at=now) for i in range(volumes['tags'])],
+            batch_size=batch_size,
+        )
+        tag_ids = [tag.pk for tag in tags]
+        created['tags'] = len(tags)
+
+        questions = []
+        for i in range(volumes['questions']):
+            stamp = moment()
+            questions.append(Question(
+                title=f'Question {i} about {rng.choice(tags).name}' if tags else f'Question {i}',
+                content=' '.join(rng.choices(WORDS, k=rng.randint(20, 80))),
+                author_id=rng.choice(user_ids),
+                views=rng.randint(0, 5000),
+                created_at=stamp,
+                updated_at=stamp,
+            ))
+        questions = bulk_create_with_timestamps(Question, questions, batch_size)
+        created['questions'] = len(questions)
+        log(f"{len(questions)} questions")
+
+        links = [
+            Question.tags.through(question_id=question.pk, tag_id=tag_id)
+            for question in questions
+            for tag_id in rng.sample(tag_ids, min(len(tag_ids), rng.randint(1, volumes['tags_per_question'])))
+        ] if tag_ids else []
+        Question.tags.through.objects.bulk_create(links, batch_size=batch_size)
+        created['question_tags'] = len(links)
+
+        answers = []
+        for question in questions:
+            count = _spread(rng, volumes['answers_per_question'])
+            accepted = rng.randrange(count) if count and rng.random() < 0.4 else None
+            for i in range(count):
+                stamp = question.created_at + timedelta(seconds=rng.randint(60, 30 * 86400))
+                answers.append(Answer(
+                    question_id=question.pk,
+                    author_id=rng.choice(user_ids),
+                    content=' '.join(rng.choices(WORDS, k=rng.randint(10, 60))),
+                    is_accepted=(i == accepted),
+                    created_at=stamp,
+                    updated_at=stamp,
+                ))
+        answers = bulk_create_with_timestamps(Answer, answers, batch_size)
+        created['answers'] = len(answers)
+        log(f"{len(answers)} answers")
+
+        comments = [
+            Comment(
+                answer_id=answer.pk,
+                author_id=rng.choice(user_ids),
+                content=' '.join(rng.choices(WORDS, k=rng.randint(3, 20))),
+                created_at=answer.created_at + timedelta(seconds=rng.randint(60, 86400)),
+            )
+            for answer in answers
+            for _ in range(_spread(rng, volumes['comments_per_answer']))
+        ]
+        bulk_create_with_timestamps(Comment, comments, batch_size)
+        created['comments'] = len(comments)
+
+        votes = []
+        for field, targets, per_target in (
+            ('question_id', questions, volumes['votes_per_question']),
+            ('answer_id', answers, volumes['votes_per_answer']),
+        ):
+            for target in targets:
+                voters = rng.sample(user_ids, min(len(user_ids), _spread(rng, per_target)))
+                votes.extend(
+                    Vote(user_id=user_id, value=1 if rng.random() < 0.8 else -1, created_at=now, **{field: target.pk})
+                    for user_id in voters
+                )
+        Vote.objects.bulk_create(votes, batch_size=batch_size)
+        created['votes'] = len(votes)
+        log(f"{len(comments)} comments, {len(votes)} votes")
+
+        rebuild_counters()
+        rebuild_hot_scores()
+        rebuild_cooccurrence()
+        recompute_reputation(record_events=False)
+    invalidate_tag_directory()
+    invalidate(GLOBAL_SCOPE)
+    return created
+
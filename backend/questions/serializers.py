@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from config.sparse_fields import SparseFieldsMixin
 from .models import Question, Answer, Comment, Tag, Vote
 from users.serializers import UserSerializer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     questions_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -11,10 +12,14 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'questions_count']
     
     def get_questions_count(self, obj):
-        return obj.questions.count()
+        # Annotated by tags_with_question_counts() on list/detail querysets
+        count = getattr(obj, 'questions_total', None)
+        if count is None:
+            count = obj.questions.count()
+        return count
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     
     class Meta:
@@ -23,10 +28,10 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
-    vote_count = serializers.IntegerField(read_only=True)
+    vote_count = serializers.IntegerField(source='score', read_only=True)
     user_vote = serializers.SerializerMethodField()
     
     class Meta:
@@ -41,6 +46,10 @@ class AnswerSerializer(serializers.ModelSerializer):
         }
     
     def get_user_vote(self, obj):
+        # Batch-loaded by QuestionDetailView, see Vote.values_for_question()
+        answer_votes = self.context.get('answer_votes')
+        if answer_votes is not None:
+            return answer_votes.get(obj.pk)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             vote = Vote.objects.filter(user=request.user, answer=obj).first()
@@ -48,12 +57,12 @@ class AnswerSerializer(serializers.ModelSerializer):
         return None
 
 
-class QuestionListSerializer(serializers.ModelSerializer):
+class QuestionListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    vote_count = serializers.IntegerField(read_only=True)
+    vote_count = serializers.IntegerField(source='score', read_only=True)
     answer_count = serializers.IntegerField(read_only=True)
-    has_accepted_answer = serializers.BooleanField(read_only=True)
+    has_accepted_answer = serializers.BooleanField(source='has_accepted', read_only=True)
     
     class Meta:
         model = Question
@@ -63,7 +72,7 @@ class QuestionListSerializer(serializers.ModelSerializer):
         ]
 
 
-class QuestionDetailSerializer(serializers.ModelSerializer):
+class QuestionDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     tag_ids = serializers.PrimaryKeyRelatedField(
@@ -73,7 +82,7 @@ class QuestionDetailSerializer(serializers.ModelSerializer):
         write_only=True
     )
     answers = AnswerSerializer(many=True, read_only=True)
-    vote_count = serializers.IntegerField(read_only=True)
+    vote_count = serializers.IntegerField(source='score', read_only=True)
     answer_count = serializers.IntegerField(read_only=True)
     user_vote = serializers.SerializerMethodField()
     
@@ -87,6 +96,8 @@ class QuestionDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'views', 'created_at', 'updated_at']
     
     def get_user_vote(self, obj):
+        if 'question_vote' in self.context:
+            return self.context['question_vote']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             vote = Vote.objects.filter(user=request.user, question=obj).first()
@@ -98,4 +109,24 @@ class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vote
         fields = ['value']
-        
\ No newline at end of file
+        
+
+class DuplicateCheckSerializer(serializers.Serializer):
+    """A question draft, checked against existing questions before it is posted"""
+    title = serializers.CharField(max_length=300)
+    content = serializers.CharField(required=False, allow_blank=True, default='')
+    tag_ids = serializers.PrimaryKeyRelatedField(many=True, queryset=Tag.objects.all(), required=False, default=list)
+
+
+class BulkVoteItemSerializer(serializers.Serializer):
+    """One entry of a bulk vote submission: a question or an answer, and a value"""
+    question = serializers.IntegerField(required=False, min_value=1)
+    answer = serializers.IntegerField(required=False, min_value=1)
+    value = serializers.ChoiceField(choices=[1, -1, 0])
+    
+    def validate(self, attrs):
+        if ('question' in attrs) == ('answer' in attrs):
+            raise serializers.ValidationError(
+                "Indiquez soit une question, soit une réponse."
+            )
+        return attrs
@@ -0,0 +1,184 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import counters, ranking, reputation, response_cache, tag_cooccurrence
+from .models import Answer, Comment, Question, Tag, Vote
+from .related import get_related_index
+from .search import get_search_engine
+from .tag_directory import invalidate_tag_directory
+from .voting import votes_changed
+
+
+@receiver(post_delete, sender=Answer)
+def answer_deleted(sender, instance, **kwargs):
+    """Keep Question.answer_count / has_accepted right on deletes and cascades"""
+    counters.answer_removed(instance.question_id, was_accepted=instance.is_accepted)
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, **kwargs):
+    """Withdraw the vote value from the score of its target"""
+    if instance.question_id:
+        counters.question_vote_changed(instance.question_id, instance.value, None)
+    if instance.answer_id:
+        counters.answer_vote_changed(instance.answer_id, instance.value, None)
+
+
+# Reputation is reverted on pre_delete: during a cascade the voted post may
+# already be gone by the time post_delete fires, and we need its author.
+
+@receiver(pre_delete, sender=Answer)
+def accepted_answer_deleting(sender, instance, **kwargs):
+    if instance.is_accepted:
+        question_author_id = (
+            Question.objects.filter(pk=instance.question_id).values_list('author_id', flat=True).first()
+        )
+        if question_author_id is not None:
+            reputation.acceptance_removed(instance.author_id, question_author_id)
+
+
+@receiver(pre_delete, sender=Vote)
+def vote_deleting(sender, instance, **kwargs):
+    if instance.question_id:
+        author_id = Question.objects.filter(pk=instance.question_id).values_list('author_id', flat=True).first()
+        if author_id is not None:
+            reputation.question_vote_changed(instance.question_id, author_id, instance.value, None, ledger=False)
+    if instance.answer_id:
+        author_id = Answer.objects.filter(pk=instance.answer_id).values_list('author_id', flat=True).first()
+        if author_id is not None:
+            reputation.answer_vote_changed(instance.answer_id, author_id, instance.value, None, ledger=False)
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Question)
+def tag_links_changed(sender, **kwargs):
+    """Drop the cached tag directory when tags or question-tag links change"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_tag_directory()
+        response_cache.invalidate(response_cache.TAG_LIST)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, **kwargs):
+    """Keep the search index current (no-op for the PostgreSQL engine)"""
+    # Only committed questions: a rolled back one would stay searchable
+    transaction.on_commit(lambda: get_search_engine().index_question(instance))
+    transaction.on_commit(lambda: get_related_index().index_question(instance))
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def question_tags_changed(sender, instance, action, reverse, **kwargs):
+    # Tags are part of the related-questions vectors, read once committed
+    if action.startswith('post_') and not reverse:
+        transaction.on_commit(lambda: get_related_index().index_question(instance))
+
+
+@receiver(post_save, sender=Question)
+def question_created(sender, instance, created, **kwargs):
+    """New questions start the hot feed with their age term"""
+    if created:
+        ranking.refresh_hot_scores([instance.pk])
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def tag_links_counted(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the tag co-occurrence counts (TagPair) in step with the links"""
+    if action in ('pre_remove', 'pre_clear'):
+        # Only links that exist are removed, remember them before they go
+        instance._removed_tag_links = tag_cooccurrence.signal_links(instance, reverse, pk_set)
+    elif action in ('post_remove', 'post_clear'):
+        tag_cooccurrence.links_removed(getattr(instance, '_removed_tag_links', {}))
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            added = {question_id: {instance.pk} for question_id in pk_set}
+        else:
+            added = {instance.pk: set(pk_set)}
+        tag_cooccurrence.links_added(added)
+
+
+@receiver(pre_delete, sender=Question)
+def question_deleting(sender, instance, **kwargs):
+    tag_cooccurrence.question_deleting(instance.pk)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    question_id = instance.pk
+    transaction.on_commit(lambda: get_search_engine().remove_question(question_id))
+    transaction.on_commit(lambda: get_related_index().remove_question(question_id))
+
+
+# Question activity: the version counter behind the detail ETags
+# (questions/conditional.py) and the cached anonymous responses
+# (questions/response_cache.py)
+
+def question_activity(question_ids, list_changed=False):
+    counters.touch_questions(question_ids)
+    scopes = [response_cache.question_scope(pk) for pk in question_ids]
+    if list_changed:
+        scopes.append(response_cache.QUESTION_LIST)
+    response_cache.invalidate(*scopes)
+
+
+def question_of_answer(answer_id):
+    return Answer.objects.filter(pk=answer_id).values_list('question_id', flat=True).first()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_written(sender, instance, **kwargs):
+    # updated_at already changes the ETag
+    response_cache.invalidate(response_cache.QUESTION_LIST, response_cache.question_scope(instance.pk))
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def question_tags_written(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        response_cache.invalidate(response_cache.GLOBAL_SCOPE)
+    else:
+        question_activity([instance.pk], list_changed=True)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_written(sender, **kwargs):
+    # Tag names are embedded in every question payload
+    response_cache.invalidate(response_cache.GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_written(sender, instance, **kwargs):
+    # The list shows answer_count and has_accepted_answer
+    list_changed = kwargs.get('created', True) or instance.is_accepted
+    question_activity([instance.question_id], list_changed=list_changed)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_written(sender, instance, **kwargs):
+    question_id = question_of_answer(instance.answer_id)
+    if question_id is not None:
+        question_activity([question_id])
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def vote_written(sender, instance, **kwargs):
+    if instance.question_id:
+        question_activity([instance.question_id], list_changed=True)
+    if instance.answer_id:
+        question_id = question_of_answer(instance.answer_id)
+        if question_id is not None:
+            question_activity([question_id])
+
+
+@receiver(votes_changed)
+def votes_written(sender, question_ids=(), answer_question_ids=(), **kwargs):
+    """Votes cast through questions.voting, which bypasses the model signals"""
+    question_activity(sorted({*question_ids, *answer_question_ids}), list_changed=bool(question_ids))
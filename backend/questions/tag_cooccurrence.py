@@ -0,0 +1,185 @@
+"""Tag co-occurrence counts and tag suggestions.
+
+TagPair holds, for every two tags used together, the number of questions
+carrying both (one row per direction). It is updated incrementally from
+the question-tag link signals in questions.signals: adding tags to a
+question counts each new tag once with every other tag of the question,
+removing them (or deleting the question) takes those pairs back out, and
+all the changes of one signal go to the database as a single upsert.
+Bulk loads (seeding, imports) skip the signals and call
+``rebuild_cooccurrence`` instead.
+
+``suggest_tags`` ranks tags for a question draft. It combines three
+signals: tags named in the text, tags of the most similar existing
+questions (questions.related), and tags that often come with the ones
+already picked. It only reads in-memory structures and a few index
+ranges, so it can run on every keystroke.
+"""
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import connection
+
+from .models import Question, TagPair
+from .related import get_related_index
+from .search import tokenize
+from .tag_directory import get_tag_directory
+
+UPSERT_BATCH = 300
+NAME_WEIGHT = 1.0
+NEIGHBOUR_WEIGHT = 1.0
+PAIR_WEIGHT = 0.5
+NEIGHBOURS = 20
+PAIRS_PER_TAG = 50
+
+
+def tags_of(question_ids):
+    """{question_id: {tag ids}} in one query"""
+    tags = defaultdict(set)
+    links = Question.tags.through.objects.filter(question_id__in=question_ids).values_list('question_id', 'tag_id')
+    for question_id, tag_id in links:
+        tags[question_id].add(tag_id)
+    return tags
+
+
+def signal_links(instance, reverse, pk_set):
+    """{question_id: {tag ids}} of the existing links an m2m_changed signal is about"""
+    links = Question.tags.through.objects
+    if reverse:
+        links = links.filter(tag_id=instance.pk)
+        if pk_set is not None:
+            links = links.filter(question_id__in=pk_set)
+    else:
+        links = links.filter(question_id=instance.pk)
+        if pk_set is not None:
+            links = links.filter(tag_id__in=pk_set)
+    grouped = defaultdict(set)
+    for question_id, tag_id in links.values_list('question_id', 'tag_id'):
+        grouped[question_id].add(tag_id)
+    return grouped
+
+
+def pair_deltas(others, changed, delta, deltas):
+    """Add ``delta`` to every pair of a ``changed`` tag with the ``others`` and with each other"""
+    changed = sorted(changed)
+    for i, tag_id in enumerate(changed):
+        for other_id in [*others, *changed[i + 1:]]:
+            deltas[(tag_id, other_id)] += delta
+            deltas[(other_id, tag_id)] += delta
+
+
+def apply_deltas(deltas):
+    """Add {(tag_id, other_id): delta} to the stored counts, dropping pairs that reach 0"""
+    deltas = [(tag_id, other_id, delta) for (tag_id, other_id), delta in deltas.items() if delta]
+    if not deltas:
+        return
+    qn = connection.ops.quote_name
+    table = qn(TagPair._meta.db_table)
+    rows = iter(deltas)
+    with connection.cursor() as cursor:
+        for batch in iter(lambda: list(islice(rows, UPSERT_BATCH)), []):
+            sql = (
+                f"INSERT INTO {table} ({qn('tag_id')}, {qn('other_id')}, {qn('count')}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT ({qn('tag_id')}, {qn('other_id')}) "
+                f"DO UPDATE SET {qn('count')} = {table}.{qn('count')} + EXCLUDED.{qn('count')}"
+            )
+            cursor.execute(sql, [value for row in batch for value in row])
+    if any(delta < 0 for _, _, delta in deltas):
+        TagPair.objects.filter(tag_id__in={tag_id for tag_id, _, _ in deltas}, count__lte=0).delete()
+
+
+def links_added(added):
+    """Count the {question_id: {tag ids}} links that were just created"""
+    current = tags_of(list(added))
+    deltas = Counter()
+    for question_id, tag_ids in added.items():
+        pair_deltas(current[question_id] - tag_ids, tag_ids, 1, deltas)
+    apply_deltas(deltas)
+
+
+def links_removed(removed):
+    """Uncount the {question_id: {tag ids}} links that were just deleted"""
+    remaining = tags_of(list(removed))
+    deltas = Counter()
+    for question_id, tag_ids in removed.items():
+        pair_deltas(remaining[question_id] - tag_ids, tag_ids, -1, deltas)
+    apply_deltas(deltas)
+
+
+def question_deleting(question_id):
+    """Uncount the tags of a question about to be deleted (the cascade sends no m2m signal)"""
+    deltas = Counter()
+    pair_deltas((), tags_of([question_id])[question_id], -1, deltas)
+    apply_deltas(deltas)
+
+
+def rebuild_cooccurrence():
+    """Recount every pair from the question-tag links, returns the number of rows"""
+    qn = connection.ops.quote_name
+    links = qn(Question.tags.through._meta.db_table)
+    TagPair.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(TagPair._meta.db_table)} ({qn('tag_id')}, {qn('other_id')}, {qn('count')}) "
+            f"SELECT a.{qn('tag_id')}, b.{qn('tag_id')}, COUNT(*) FROM {links} a "
+            f"JOIN {links} b ON b.{qn('question_id')} = a.{qn('question_id')} AND b.{qn('tag_id')} <> a.{qn('tag_id')} "
+            f"GROUP BY a.{qn('tag_id')}, b.{qn('tag_id')}"
+        )
+    return TagPair.objects.count()
+
+
+def related_tags(tag_id, limit):
+    """[{id, name, count}] of the tags most often used with ``tag_id``"""
+    pairs = TagPair.objects.filter(tag_id=tag_id).order_by('-count', 'other_id')[:limit]
+    return [
+        {'id': other_id, 'name': name, 'count': count}
+        for other_id, name, count in pairs.values_list('other_id', 'other__name', 'count')
+    ]
+
+
+def name_key(name):
+    return '-'.join(tokenize(name))
+
+
+def suggest_tags(title, content='', tag_ids=(), limit=5):
+    """[{id, name, score}] of tags for a question draft, best first, without ``tag_ids``"""
+    directory = {entry['id']: entry for entry in get_tag_directory()}
+    by_name = {name_key(entry['name']): tag_id for tag_id, entry in directory.items()}
+    selected = {tag_id for tag_id in tag_ids if tag_id in directory}
+    scores = Counter()
+
+    # Tags named in the draft, including multi-word names ("django-rest-framework")
+    tokens = tokenize(f'{title} {content}')
+    candidates = set(tokens)
+    for size in (2, 3):
+        candidates.update('-'.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    for candidate in candidates & by_name.keys():
+        scores[by_name[candidate]] += NAME_WEIGHT
+
+    # Tags of the most similar questions, weighted by similarity
+    if title or content:
+        neighbours = get_related_index().similar_to_text(
+            title, content, [directory[tag_id]['name'] for tag_id in selected], limit=NEIGHBOURS, min_score=0.0,
+        )
+        total = sum(similarity for _, similarity in neighbours)
+        neighbour_tags = tags_of([question_id for question_id, _ in neighbours])
+        for question_id, similarity in neighbours:
+            for tag_id in neighbour_tags[question_id]:
+                scores[tag_id] += NEIGHBOUR_WEIGHT * similarity / total
+
+    # Tags often used with the ones already picked: P(other | picked)
+    for tag_id in selected:
+        questions = directory[tag_id]['questions_count'] or 1
+        pairs = TagPair.objects.filter(tag_id=tag_id).order_by('-count')[:PAIRS_PER_TAG]
+        for other_id, count in pairs.values_list('other_id', 'count'):
+            scores[other_id] += PAIR_WEIGHT * count / questions
+
+    ranked = sorted(
+        ((tag_id, score) for tag_id, score in scores.items() if tag_id not in selected and tag_id in directory),
+        key=lambda item: (-item[1], directory[item[0]]['name'].lower()),
+    )
+    return [
+        {'id': tag_id, 'name': directory[tag_id]['name'], 'score': round(score, 3)}
+        for tag_id, score in ranked[:limit]
+    ]
@@ -0,0 +1,90 @@
+"""Cached tag directory.
+
+The full tag list with precomputed question counts is built with one query
+and kept in the cache shared by all workers (the response cache's alias,
+see questions.response_cache) under a version token. A tag or
+question-tag link change (see questions.signals) replaces the token once
+the transaction commits, so every worker rebuilds or refetches it on its
+next read. Each process keeps the entries of the version it last saw, so
+a read costs one small cache lookup. Entries are already in
+TagSerializer's output shape and sorted case-insensitively by name so
+prefix lookups can bisect.
+"""
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import tags_with_question_counts
+from .response_cache import DEFAULTS
+
+CACHE_KEY = 'tags:directory'
+VERSION_KEY = f'{CACHE_KEY}:version'
+# Bounds the life of entries orphaned by a concurrent invalidation
+TIMEOUT = 24 * 3600
+
+# (version, entries) of this process
+_local_copy = (None, None)
+
+
+def shared_cache():
+    return caches[{**DEFAULTS, **getattr(settings, 'RESPONSE_CACHE', {})}['CACHE']]
+
+
+def build_tag_directory():
+    rows = tags_with_question_counts().values('id', 'name', 'description', 'questions_total')
+    entries = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'questions_count': row['questions_total'],
+        }
+        for row in rows
+    ]
+    entries.sort(key=lambda entry: entry['name'].lower())
+    return entries
+
+
+def get_tag_directory():
+    global _local_copy
+    cache = shared_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    local_version, entries = _local_copy
+    if local_version == version:
+        return entries
+    entries = cache.get(f'{CACHE_KEY}:{version}')
+    if entries is None:
+        entries = build_tag_directory()
+        cache.set(f'{CACHE_KEY}:{version}', entries, timeout=TIMEOUT)
+    _local_copy = (version, entries)
+    return entries
+
+
+def invalidate_tag_directory():
+    """Retire the directory of every worker once the current transaction commits"""
+    def retire():
+        cache = shared_cache()
+        old_version = cache.get(VERSION_KEY)
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        if old_version is not None:
+            cache.delete(f'{CACHE_KEY}:{old_version}')
+    transaction.on_commit(retire)
+
+
+def filter_by_prefix(entries, prefix):
+    """Entries whose name starts with prefix (case-insensitive)"""
+    prefix = prefix.lower()
+    start = bisect_left(entries, prefix, key=lambda entry: entry['name'].lower())
+    matches = []
+    for entry in entries[start:]:
+        if not entry['name'].lower().startswith(prefix):
+            break
+        matches.append(entry)
+    return matches
@@ -0,0 +1,39 @@
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..models import User
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-responses'},
+    'views': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-views'},
+}
+
+
+def make_users(*names):
+    return [
+        User.objects.create_user(username=name, email=f'{name}@example.com', password='test-password')
+        for name in names
+    ]
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    RESPONSE_CACHE={'ENABLED': False, 'CACHE': 'responses'},
+    # Hits are written by the request itself, inside the test's transaction
+    VIEW_COUNTER={'FLUSH_INTERVAL': 0, 'CACHE': 'views'},
+    SECURE_SSL_REDIRECT=False,
+)
+class APITests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Cached entries (e.g. the tag directory) may describe rows an earlier
+        # class rolled back; clearing retires their version tokens too
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    def post(self, user, url, data=None):
+        self.client.force_authenticate(user)
+        return self.client.post(url, data or {}, format='json')
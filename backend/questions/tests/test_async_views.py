@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.core.cache import caches
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import async_views
+from ..models import Answer, Comment, Question, Tag, Vote
+from .base import APITests, make_users
+
+
+def as_sync_links(content):
+    # Pagination links point to the endpoint that was called
+    return content.replace(b'/api/async/', b'/api/')
+
+
+class AsyncViewTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = make_users('alice', 'bob', 'carol')
+        tags = [Tag.objects.create(name=name) for name in ('django', 'python', 'orm')]
+        for i in range(6):
+            question = Question.objects.create(
+                title=f'Question {i}', content='c' * i, author=[cls.alice, cls.bob][i % 2]
+            )
+            question.tags.set(tags[:i % 3])
+            for j in range(i % 3):
+                answer = Answer.objects.create(question=question, author=cls.carol, content=f'Réponse {j}')
+                Comment.objects.create(answer=answer, author=cls.alice, content='Merci')
+                Vote.objects.create(user=cls.alice, answer=answer, value=1)
+        Question.objects.filter(pk=question.pk).update(score=5, answer_count=2)
+        Vote.objects.create(user=cls.carol, question=question, value=1)
+        cls.question, cls.answer = question, answer
+
+    def setUp(self):
+        # Both fetches of a detail page then see the same (deduplicated) view count
+        caches['views'].clear()
+
+    def fetch(self, url, user=None):
+        if user is None:
+            self.client.credentials()
+        else:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return self.client.get(url)
+
+    def assert_same_output(self, path, users=(None,)):
+        for user in users:
+            with self.subTest(path=path, user=user):
+                self.fetch(f'/api/{path}', user)
+                sync = self.fetch(f'/api/{path}', user)
+                result = self.fetch(f'/api/async/{path}', user)
+                self.assertEqual(result.status_code, sync.status_code)
+                self.assertEqual(as_sync_links(result.content), sync.content)
+                self.assertEqual(result.get('ETag'), sync.get('ETag'))
+
+    def test_same_output_as_the_sync_views(self):
+        users = (None, self.alice, self.carol)
+        for path in (
+            'questions/',
+            'questions/?sort=votes&page_size=2',
+            'questions/?sort=hot',
+            'questions/?tag=python&count=1',
+            'questions/?unanswered=1',
+            f'questions/{self.question.pk}/',
+            f'answers/{self.answer.pk}/',
+            'tags/?prefix=py',
+        ):
+            with mock.patch.object(async_views, 'delegate', wraps=async_views.delegate) as delegate:
+                self.assert_same_output(path, users)
+            delegate.assert_not_called()
+        self.assert_same_output('questions/999999/')
+        cursor = self.fetch('/api/questions/?page_size=2').data['next'].split('?')[1]
+        self.assert_same_output(f'questions/?{cursor}')
+        # users/async_views.py
+        sync = self.fetch(f'/api/auth/users/{self.bob.pk}/')
+        self.assertEqual(self.fetch(f'/api/auth/async/users/{self.bob.pk}/').content, sync.content)
+
+    def test_unsupported_parameters_are_delegated(self):
+        for path in (
+            'questions/?fields=id,title',
+            'questions/?search=question',
+            'questions/?ordering=views',
+            'questions/?page=2&page_size=2',
+            'questions/?tags=1',
+            f'questions/{self.question.pk}/?fields=title,answers.content',
+            f'answers/{self.answer.pk}/?fields=content',
+            'tags/?page_size=all',
+        ):
+            with mock.patch.object(async_views, 'delegate', wraps=async_views.delegate) as delegate:
+                sync = self.fetch(f'/api/{path}')
+                result = self.fetch(f'/api/async/{path}')
+            with self.subTest(path=path):
+                delegate.assert_called_once()
+                self.assertEqual(result.status_code, 200)
+                if sync.streaming:
+                    self.assertEqual(b''.join(result.streaming_content), b''.join(sync.streaming_content))
+                else:
+                    self.assertEqual(as_sync_links(result.content), sync.content)
+
+    def test_reads_only(self):
+        response = self.client.post('/api/async/questions/', {'title': 'x'})
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
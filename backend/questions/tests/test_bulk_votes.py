@@ -0,0 +1,40 @@
+from ..models import Answer, Question, Vote
+from ..reputation import ANSWER_UPVOTE, QUESTION_UPVOTE
+from .base import APITests, make_users
+
+
+class BulkVoteTests(APITests):
+    def setUp(self):
+        self.author, self.voter, self.other = make_users('author', 'voter', 'other')
+        self.question = Question.objects.create(title='Question', content='c', author=self.author)
+        self.answer = Answer.objects.create(question=self.question, author=self.other, content='a')
+
+    def figures(self, user):
+        user.refresh_from_db()
+        return user.reputation, user.total_votes
+
+    def test_bulk_vote(self):
+        self.post(self.voter, f'/api/answers/{self.answer.pk}/vote/', {'value': -1})
+        payload = {'votes': [
+            {'question': self.question.pk, 'value': -1},
+            {'question': self.question.pk, 'value': 1},
+            {'answer': self.answer.pk, 'value': 1},
+            {'question': 999999, 'value': 1},
+            {'question': self.question.pk, 'value': 5},
+        ]}
+        response = self.client.post('/api/votes/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['ok', 'ok', 'ok', 'not_found', 'invalid'],
+        )
+        self.assertEqual(response.data['results'][1]['vote_count'], 1)
+        self.assertEqual(response.data['results'][2]['vote_count'], 1)
+        self.assertEqual(Vote.objects.filter(user=self.voter).count(), 2)
+        self.assertEqual(self.figures(self.author), (QUESTION_UPVOTE, 1))
+        self.assertEqual(self.figures(self.other), (ANSWER_UPVOTE, 1))
+
+    def test_bulk_vote_rejects_empty_batches(self):
+        self.client.force_authenticate(self.voter)
+        response = self.client.post('/api/votes/bulk/', {'votes': []}, format='json')
+        self.assertEqual(response.status_code, 400)
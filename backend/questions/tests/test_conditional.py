@@ -0,0 +1,82 @@
+from django.test import override_settings
+
+from ..models import Answer, Question
+from ..view_counter import get_view_counter
+from .base import APITests, make_users
+
+
+# Hits stay pending (no dedup), so the flushed view count in the ETag stays put
+@override_settings(VIEW_COUNTER={'FLUSH_INTERVAL': 3600, 'DEDUP_WINDOW': 0, 'CACHE': 'views'})
+class ConditionalGetTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = make_users('alice', 'bob', 'carol')
+        cls.question = Question.objects.create(title='Question', content='c', author=cls.alice)
+        cls.answer = Answer.objects.create(question=cls.question, author=cls.bob, content='a')
+        cls.question_url = f'/api/questions/{cls.question.pk}/'
+        cls.answer_url = f'/api/answers/{cls.answer.pk}/'
+
+    def get(self, url, user=None, etag=None):
+        self.client.force_authenticate(user)
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def assertNotModified(self, url, user=None):
+        etag = self.get(url, user)['ETag']
+        response = self.get(url, user, etag=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def assertChangedBy(self, url, write):
+        etag = self.assertNotModified(url)
+        write()
+        response = self.get(url, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def write(self, user, method, url, data=None):
+        self.client.force_authenticate(user)
+        response = getattr(self.client, method)(url, data or {}, format='json')
+        self.assertLess(response.status_code, 300, response.data)
+
+    def test_if_none_match(self):
+        for url in (self.question_url, self.answer_url):
+            with self.subTest(url=url):
+                self.assertNotModified(url)
+                self.assertNotModified(url, self.carol)
+                self.assertEqual(self.get(url, etag='"stale"').status_code, 200)
+
+    def test_not_modified_counts_no_view(self):
+        counter = get_view_counter()
+        pending = counter.pending(self.question.pk)
+        etag = self.get(self.question_url)['ETag']
+        self.assertEqual(counter.pending(self.question.pk), pending + 1)
+        self.assertEqual(self.get(self.question_url, etag=etag).status_code, 304)
+        self.assertEqual(counter.pending(self.question.pk), pending + 1)
+        self.get(self.question_url)
+        self.assertEqual(counter.pending(self.question.pk), pending + 2)
+
+    def test_question_etag_changes(self):
+        url = self.question_url
+        self.assertChangedBy(url, lambda: self.write(self.carol, 'post', f'{url}vote/', {'value': 1}))
+        self.assertChangedBy(url, lambda: self.write(self.carol, 'post', f'{url}answers/', {'content': 'Autre'}))
+        self.assertChangedBy(url, lambda: self.write(self.alice, 'patch', url, {'title': 'Question modifiée'}))
+        self.assertChangedBy(url, lambda: self.write(self.carol, 'post', f'{self.answer_url}vote/', {'value': -1}))
+
+    def test_answer_etag_changes(self):
+        url = self.answer_url
+        self.assertChangedBy(url, lambda: self.write(self.carol, 'post', f'{url}vote/', {'value': 1}))
+        self.assertChangedBy(url, lambda: self.write(self.alice, 'post', f'{url}comments/', {'content': 'Merci'}))
+        self.assertChangedBy(url, lambda: self.write(self.bob, 'patch', url, {'content': 'Réponse modifiée'}))
+
+    def test_etag_depends_on_the_viewer(self):
+        for url in (self.question_url, self.answer_url):
+            with self.subTest(url=url):
+                responses = [self.get(url, user) for user in (None, self.alice, self.bob)]
+                self.assertEqual(len({response['ETag'] for response in responses}), 3)
+                self.assertIn('Authorization', responses[0]['Vary'])
+                # Another user's copy is not current for this one
+                response = self.get(url, self.bob, etag=responses[1]['ETag'])
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,40 @@
+from ..counters import rebuild_counters
+from ..models import Answer, Question, Vote
+from .base import APITests, make_users
+
+
+class CounterTests(APITests):
+    def setUp(self):
+        self.author, self.helper, self.voter = make_users('author', 'helper', 'voter')
+        self.question = Question.objects.create(title='Question', content='c', author=self.author)
+
+    def test_answers_and_acceptance(self):
+        first = self.post(self.helper, f'/api/questions/{self.question.pk}/answers/', {'content': 'one'}).data['id']
+        second = self.post(self.voter, f'/api/questions/{self.question.pk}/answers/', {'content': 'two'}).data['id']
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.answer_count, self.question.has_accepted), (2, False))
+
+        self.assertEqual(self.post(self.author, f'/api/answers/{first}/accept/').status_code, 200)
+        self.assertEqual(self.post(self.author, f'/api/answers/{second}/accept/').status_code, 200)
+        self.question.refresh_from_db()
+        self.assertTrue(self.question.has_accepted)
+        self.assertEqual(list(self.question.answers.filter(is_accepted=True).values_list('pk', flat=True)), [second])
+
+        Answer.objects.get(pk=second).delete()
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.answer_count, self.question.has_accepted), (1, False))
+
+    def test_rebuild_counters_repairs_drift(self):
+        answer = Answer.objects.create(question=self.question, author=self.helper, content='a', is_accepted=True)
+        Vote.objects.create(user=self.voter, question=self.question, value=1)
+        Vote.objects.create(user=self.voter, answer=answer, value=-1)
+        Question.objects.filter(pk=self.question.pk).update(
+            score=42, answer_count=7, has_accepted=False, imported_score=3,
+        )
+        Answer.objects.filter(pk=answer.pk).update(score=9)
+
+        rebuild_counters()
+        self.question.refresh_from_db()
+        answer.refresh_from_db()
+        self.assertEqual((self.question.score, self.question.answer_count, self.question.has_accepted), (4, 1, True))
+        self.assertEqual(answer.score, -1)
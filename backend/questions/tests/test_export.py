@@ -0,0 +1,79 @@
+import datetime
+import gzip
+import json
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import Answer, Comment, Question, Tag, User
+from .base import APITests, make_users
+
+URL = '/api/export/'
+
+
+def documents(content):
+    return [json.loads(line) for line in content.splitlines() if line]
+
+
+class ExportTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = make_users('alice', 'bob')
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        cls.cutoff = timezone.now()
+        cls.old = Question.objects.create(title='Old', content='c', author=cls.alice)
+        cls.recent = Question.objects.create(title='Recent', content='c', author=cls.bob)
+        cls.recent.tags.set([Tag.objects.create(name='django')])
+        answer = Answer.objects.create(question=cls.recent, author=cls.alice, content='a', is_accepted=True)
+        Comment.objects.create(answer=answer, author=cls.bob, content='merci')
+        long_ago = cls.cutoff - datetime.timedelta(days=30)
+        Question.objects.filter(pk=cls.old.pk).update(updated_at=long_ago, last_activity_at=long_ago)
+
+    def export(self, query=''):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(f'{URL}{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_documents(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('X-Export-Started', response)
+        exported = documents(content)
+        self.assertEqual([document['id'] for document in exported], [self.old.pk, self.recent.pk])
+        recent = exported[1]
+        self.assertEqual(recent['author'], {'id': self.bob.pk, 'username': 'bob'})
+        self.assertEqual(recent['tags'], ['django'])
+        answer, = recent['answers']
+        self.assertTrue(answer['is_accepted'])
+        self.assertEqual([comment['content'] for comment in answer['comments']], ['merci'])
+
+    def test_since(self):
+        _, content = self.export(f"?{urlencode({'since': self.cutoff.isoformat()})}")
+        self.assertEqual([document['id'] for document in documents(content)], [self.recent.pk])
+        _, content = self.export(f'?since={self.cutoff.date() - datetime.timedelta(days=60)}')
+        self.assertEqual(len(documents(content)), 2)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(f'{URL}?since=hier').status_code, 400)
+
+    def test_gzip(self):
+        response, content = self.export('?compress=gzip')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(gzip.decompress(content), self.export()[1])
+
+    def test_admins_only(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(URL).status_code, 403)
+
+    async def test_asgi_streams_an_async_iterator(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        response = await AsyncClient().get(URL, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        _, expected = await sync_to_async(self.export)()
+        self.assertEqual(content, expected)
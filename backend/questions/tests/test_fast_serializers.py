@@ -0,0 +1,62 @@
+from django.test import override_settings
+
+from ..models import Answer, Comment, Question, Tag, Vote
+from .base import APITests, make_users
+
+
+class FastSerializerOutputTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = make_users('alice', 'bob', 'carol')
+        cls.bob.bio = 'Répond vite'
+        cls.bob.save()
+        tags = [
+            Tag.objects.create(name=name, description=f'À propos de {name}') for name in ('django', 'python', 'orm')
+        ]
+        for i in range(12):
+            question = Question.objects.create(
+                title=f'Question {i} « accents »  ', content='c' * i, author=[cls.alice, cls.bob][i % 2],
+            )
+            question.tags.set(tags[:i % 4])
+            for j in range(i % 3):
+                answer = Answer.objects.create(
+                    question=question, author=[cls.bob, cls.carol][j % 2], content=f'Réponse {j}', is_accepted=j == 1,
+                )
+                Comment.objects.create(answer=answer, author=cls.alice, content='Merci')
+                Vote.objects.create(user=cls.alice, answer=answer, value=1 if j else -1)
+            if i % 4 == 1:
+                Vote.objects.create(user=cls.carol, question=question, value=1)
+        cls.users = (None, cls.alice, cls.carol)
+
+    def fetch(self, url, user, fast):
+        self.client.force_authenticate(user)
+        with override_settings(FAST_SERIALIZERS=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.content
+
+    def assert_same_bytes(self, url, users=None):
+        for user in users or self.users:
+            with self.subTest(url=url, user=user):
+                fast = self.fetch(url, user, True)
+                self.assertIn(b'"results":[{"id":', fast)
+                self.assertEqual(fast, self.fetch(url, user, False))
+
+    def test_question_list(self):
+        for url in (
+            '/api/questions/',
+            '/api/questions/?page_size=5',
+            '/api/questions/?sort=votes',
+            '/api/questions/?sort=hot',
+            '/api/questions/?tag=django',
+            '/api/questions/?ordering=-views&page=1',
+            '/api/questions/?fields=id,title,author.username',
+            '/api/questions/?fields=id,tags&expand=tags',
+        ):
+            self.assert_same_bytes(url)
+
+    def test_answer_list(self):
+        # Authenticated only
+        for author in (self.bob, self.carol):
+            self.assert_same_bytes(f'/api/users/{author.pk}/answers/', self.users[1:])
+            self.assert_same_bytes(f'/api/users/{author.pk}/answers/?fields=id,content', self.users[1:])
@@ -0,0 +1,135 @@
+from itertools import islice
+from pathlib import Path
+
+from ..counters import rebuild_counters
+from ..importer import (
+    ANSWER, COMMENT, GHOST_ID, QUESTION, USER, VOTE, Importer, ndjson_records, stackexchange_records,
+)
+from ..models import Answer, Comment, ImportedRecord, Question, Tag, User, Vote
+from ..reputation import expected_figures
+from .base import APITests
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+STACKEXCHANGE = FIXTURES / 'stackexchange'
+
+
+def interrupted(records, after):
+    """The first ``after`` records, then the crash of an interrupted run"""
+    yield from islice(records, after)
+    raise KeyboardInterrupt
+
+
+class ImporterTests(APITests):
+    def local(self, model, kind, external_id, source='se'):
+        local_id = ImportedRecord.objects.get(source=source, kind=kind, external_id=external_id).local_id
+        return model.objects.get(pk=local_id)
+
+    def assertDerivedFiguresConsistent(self):
+        counters = list(Question.objects.order_by('pk').values_list('score', 'answer_count', 'has_accepted'))
+        scores = list(Answer.objects.order_by('pk').values_list('score', flat=True))
+        rebuild_counters()
+        self.assertEqual(
+            list(Question.objects.order_by('pk').values_list('score', 'answer_count', 'has_accepted')), counters
+        )
+        self.assertEqual(list(Answer.objects.order_by('pk').values_list('score', flat=True)), scores)
+        for user in expected_figures():
+            self.assertEqual(user.reputation, user.expected_reputation, user.username)
+            self.assertEqual(user.total_votes, user.expected_total_votes, user.username)
+
+    def assertStackExchangeImported(self):
+        self.assertEqual(User.objects.count(), 4)
+        self.assertEqual(Question.objects.count(), 2)
+        self.assertEqual(Answer.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Vote.objects.count(), 2)
+        for kind, count in ((USER, 4), (QUESTION, 2), (ANSWER, 3), (COMMENT, 1)):
+            self.assertEqual(ImportedRecord.objects.filter(source='se', kind=kind).count(), count)
+        question = self.local(Question, QUESTION, '10')
+        for external_id in ('11', '12'):
+            self.assertEqual(self.local(Answer, ANSWER, external_id).question, question)
+        self.assertEqual(self.local(Answer, ANSWER, '14').question, self.local(Question, QUESTION, '13'))
+        self.assertEqual(self.local(Comment, COMMENT, '100').answer, self.local(Answer, ANSWER, '11'))
+
+    def test_stackexchange_import(self):
+        importer = Importer('se')
+        stats = importer.run(stackexchange_records(STACKEXCHANGE))
+        importer.finish()
+        self.assertStackExchangeImported()
+        # Comments on questions have no answer, duplicate and anonymous votes are dropped
+        self.assertEqual(stats['skipped'][COMMENT], 1)
+        self.assertEqual(stats['skipped'][VOTE], 2)
+
+        alice = self.local(User, USER, '1')
+        self.assertEqual((alice.username, alice.bio), ('Alice_Martin', 'Développeuse Django'))
+        self.assertEqual(self.local(User, USER, '3').username, 'carol')
+        question = self.local(Question, QUESTION, '10')
+        self.assertEqual(question.author, alice)
+        self.assertEqual(sorted(question.tags.values_list('name', flat=True)), ['django', 'orm'])
+        self.assertEqual((question.views, question.answer_count, question.has_accepted), (120, 2, True))
+        self.assertTrue(self.local(Answer, ANSWER, '11').is_accepted)
+        self.assertEqual(sorted(Tag.objects.values_list('name', flat=True)), ['django', 'orm'])
+
+    def test_missing_users_become_the_ghost_user(self):
+        Importer('se').run(stackexchange_records(STACKEXCHANGE))
+        ghost = self.local(User, USER, GHOST_ID)
+        self.assertEqual(ghost.username, 'se_deleted_user')
+        self.assertEqual(self.local(Answer, ANSWER, '12').author, ghost)
+        self.assertEqual(self.local(Question, QUESTION, '13').author, ghost)
+        self.assertFalse(ghost.has_usable_password())
+
+    def test_posts_keep_their_archive_score(self):
+        importer = Importer('se')
+        importer.run(stackexchange_records(STACKEXCHANGE))
+        importer.finish()
+        # The imported votes are taken out of imported_score, the score stays the archive's
+        for model, kind, external_id, score, imported_score in (
+            (Question, QUESTION, '10', 3, 2),
+            (Question, QUESTION, '13', 0, 0),
+            (Answer, ANSWER, '11', 2, 2),
+            (Answer, ANSWER, '12', -1, 0),
+            (Answer, ANSWER, '14', 1, 1),
+        ):
+            with self.subTest(external_id=external_id):
+                post = self.local(model, kind, external_id)
+                self.assertEqual((post.score, post.imported_score), (score, imported_score))
+        self.assertDerivedFiguresConsistent()
+        # Alice: one question upvote, two carried ones, an accepted answer given
+        self.assertEqual(self.local(User, USER, '1').reputation, 5 + 2 * 5 + 2)
+        # Bob: two carried answer upvotes and the accepted answer
+        self.assertEqual(self.local(User, USER, '2').reputation, 2 * 10 + 15)
+
+    def test_interrupted_import_resumes(self):
+        with self.assertRaises(KeyboardInterrupt):
+            Importer('se', batch_size=2).run(interrupted(stackexchange_records(STACKEXCHANGE), 8))
+        self.assertTrue(Question.objects.exists())
+        self.assertLess(Answer.objects.count(), 3)
+
+        importer = Importer('se', batch_size=2)
+        stats = importer.run(stackexchange_records(STACKEXCHANGE))
+        importer.finish()
+        self.assertGreater(stats['skipped'][USER], 0)
+        self.assertGreater(stats['skipped'][QUESTION], 0)
+        self.assertStackExchangeImported()
+        self.assertDerivedFiguresConsistent()
+
+        # A third run over a complete import writes nothing
+        stats = Importer('se').run(stackexchange_records(STACKEXCHANGE))
+        self.assertEqual(sum(stats['imported'].values()), 0)
+        self.assertStackExchangeImported()
+
+    def test_ndjson_import(self):
+        importer = Importer('corpus')
+        importer.run(ndjson_records(FIXTURES / 'corpus.ndjson'))
+        importer.finish()
+        question = self.local(Question, QUESTION, '1', source='corpus')
+        self.assertEqual(question.author.username, 'dana')
+        self.assertEqual(sorted(question.tags.values_list('name', flat=True)), ['django', 'pagination'])
+        self.assertEqual((question.score, question.imported_score, question.views), (4, 4, 30))
+        answer = question.answers.get()
+        self.assertEqual((answer.author.username, answer.is_accepted, answer.score), ('eve', True, 2))
+        self.assertEqual(answer.comments.get().author, question.author)
+        orphan = self.local(Question, QUESTION, '2', source='corpus')
+        self.assertEqual(orphan.author, self.local(User, USER, GHOST_ID, source='corpus'))
+        self.assertEqual(orphan.score, -1)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertDerivedFiguresConsistent()
@@ -0,0 +1,63 @@
+from ..models import Question
+from .base import APITests, make_users
+
+
+class KeysetPaginationTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        author, = make_users('author')
+        # Ties on score, broken by id
+        for score in (3, 1, 3, 0, 1, 3, 0):
+            question = Question.objects.create(title=f'Score {score}', content='c', author=author)
+            Question.objects.filter(pk=question.pk).update(score=score)
+
+    def walk(self, url, link='next'):
+        """Result ids of every page from ``url`` on, following the ``link`` links"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages, response
+
+    def test_next_and_previous_round_trip(self):
+        for query, ordering in (('', ('-created_at', '-id')), ('&sort=votes', ('-score', '-id'))):
+            with self.subTest(query=query):
+                expected = list(Question.objects.order_by(*ordering).values_list('id', flat=True))
+                pages, last = self.walk(f'/api/questions/?page_size=2{query}')
+                self.assertEqual(pages, [expected[i:i + 2] for i in range(0, len(expected), 2)])
+                self.assertIsNone(last.data['next'])
+                self.assertNotIn('count', last.data)
+
+                back, first = self.walk(last.data['previous'], link='previous')
+                self.assertEqual(back, pages[-2::-1])
+                self.assertIsNone(first.data['previous'])
+
+    def test_ties_on_score_are_neither_repeated_nor_skipped(self):
+        pages, _ = self.walk('/api/questions/?page_size=1&sort=votes')
+        ids = [page[0] for page in pages]
+        self.assertEqual(sorted(ids), sorted(Question.objects.values_list('id', flat=True)))
+        scores = dict(Question.objects.values_list('id', 'score'))
+        self.assertEqual([scores[pk] for pk in ids], [3, 3, 3, 1, 1, 0, 0])
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'eyJrIjpbMV19', 'eyJrIjpbIm5vdCBhIGRhdGUiLDFdfQ'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/questions/?cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data['detail'], 'Curseur invalide.')
+
+    def test_count_is_opt_in(self):
+        response = self.client.get('/api/questions/?page_size=2&count=1')
+        self.assertEqual(response.data['count'], 7)
+        self.assertNotIn('count=', response.data['next'])
+        self.assertNotIn('count', self.client.get(response.data['next']).data)
+
+    def test_page_number_fallback_keeps_the_page_size_rules(self):
+        response = self.client.get('/api/questions/?page=2&page_size=3')
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIn('page=3', response.data['next'])
+        response = self.client.get('/api/questions/?ordering=views&page_size=1')
+        self.assertEqual(len(response.data['results']), 1)
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Question, Tag
+from .base import APITests, make_users
+
+
+class QuestionListQueryTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = make_users('alice', 'bob', 'carol', 'dave')
+        cls.tags = [Tag.objects.create(name=f'tag{i}') for i in range(8)]
+        cls.untagged = Tag.objects.create(name='solo')
+        # 'solo' questions carry one tag, 'tag0' questions between 1 and 8
+        for i in range(3):
+            question = Question.objects.create(title=f'Solo {i}', content='c', author=cls.users[i % 4])
+            question.tags.set([cls.untagged])
+        for i in range(40):
+            question = Question.objects.create(title=f'Question {i}', content='c', author=cls.users[i % 4])
+            question.tags.set(cls.tags[:1 + i % 8])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def assert_bounded(self, urls):
+        counts = {url: self.count_queries(url)[0] for url in urls}
+        self.assertEqual(len(set(counts.values())), 1, counts)
+        return next(iter(counts.values()))
+
+    def test_query_count_independent_of_page_size_and_tags(self):
+        urls = [
+            '/api/questions/?page_size=1',
+            '/api/questions/?page_size=20',
+            '/api/questions/?page_size=100',
+            '/api/questions/?tag=solo',
+            '/api/questions/?tag=tag0&page_size=40',
+        ]
+        queries = self.assert_bounded(urls)
+        with self.assertNumQueries(queries):
+            self.client.get('/api/questions/?tag=tag7')
+        self.assertLessEqual(queries, 5)
+
+    @override_settings(FAST_SERIALIZERS=False)
+    def test_query_count_with_drf_serializers(self):
+        self.assertLessEqual(self.assert_bounded([
+            '/api/questions/?page_size=1',
+            '/api/questions/?page_size=100',
+            '/api/questions/?tag=solo',
+        ]), 5)
+
+    def test_nested_counts_match_the_database(self):
+        _, response = self.count_queries('/api/questions/?page_size=100')
+        self.assertEqual(len(response.data['results']), 43)
+        for row in response.data['results']:
+            author = row['author']
+            self.assertEqual(author['questions_count'], Question.objects.filter(author_id=author['id']).count())
+            for tag in row['tags']:
+                self.assertEqual(tag['questions_count'], Question.objects.filter(tags=tag['id']).count())
@@ -0,0 +1,67 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Question, Tag
+from .base import APITests, make_users
+
+
+class ReviewQueueTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = make_users('alice', 'bob')
+        cls.django, cls.python = (Tag.objects.create(name=name) for name in ('django', 'python'))
+        cls.questions = {}
+        for name, tag in (('a', cls.django), ('b', cls.django), ('c', cls.python), ('d', cls.django)):
+            question = Question.objects.create(title=name, content='c', author=cls.alice)
+            question.tags.set([tag])
+            cls.questions[name] = question
+
+    def queue(self, query):
+        response = self.client.get(f'/api/questions/?{query}')
+        self.assertEqual(response.status_code, 200)
+        names = {question.pk: name for name, question in self.questions.items()}
+        return ''.join(sorted(names[row['id']] for row in response.data['results']))
+
+    def answer(self, name):
+        response = self.post(self.bob, f"/api/questions/{self.questions[name].pk}/answers/", {'content': 'Réponse'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_queues_follow_answers_and_acceptance(self):
+        self.assertEqual(self.queue('unanswered=1'), 'abcd')
+        self.assertEqual(self.queue('unaccepted=1'), 'abcd')
+
+        first = self.answer('a')
+        self.answer('c')
+        self.assertEqual(self.queue('unanswered=1'), 'bd')
+        self.assertEqual(self.queue('unaccepted=1'), 'abcd')
+
+        self.post(self.alice, f'/api/answers/{first}/accept/')
+        self.assertEqual(self.queue('unaccepted=1'), 'bcd')
+        self.assertEqual(self.queue('unanswered=1&unaccepted=1'), 'bd')
+
+        # The accepted answer goes: the question is back in both queues
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.delete(f'/api/answers/{first}/').status_code, 204)
+        self.assertEqual(self.queue('unanswered=1'), 'abd')
+        self.assertEqual(self.queue('unaccepted=1'), 'abcd')
+
+    def test_combined_with_tag_and_pagination(self):
+        self.answer('b')
+        self.assertEqual(self.queue('unanswered=1&tag=django'), 'ad')
+        self.assertEqual(self.queue('unaccepted=1&tag=python'), 'c')
+
+        response = self.client.get('/api/questions/?unanswered=1&page_size=2')
+        self.assertEqual(len(response.data['results']), 2)
+        rest = self.client.get(response.data['next']).data
+        self.assertIsNone(rest['next'])
+        ids = [row['id'] for row in response.data['results'] + rest['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 3)
+
+    def test_queues_read_the_stored_counters(self):
+        self.answer('a')
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.queue('unanswered=1&fields=id'), 'bcd')
+        for query in context.captured_queries:
+            self.assertNotIn('GROUP BY', query['sql'])
@@ -0,0 +1,83 @@
+import math
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import Question
+from ..ranking import ANSWER_POINTS, DECAY, EPOCH, VIEWS_PER_POINT, rebuild_hot_scores
+from .base import APITests, make_users
+
+
+def expected_hot_score(question):
+    points = question.score + ANSWER_POINTS * question.answer_count + question.views / VIEWS_PER_POINT
+    order = math.log10(max(abs(points), 1))
+    sign = (points > 0) - (points < 0)
+    return sign * order + (question.created_at - EPOCH).total_seconds() / DECAY
+
+
+class HotFeedTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = make_users('alice', 'bob', 'carol')
+        now = timezone.now()
+        cls.questions = {}
+        # (name, days old, score, views)
+        for name, days, score, views in (
+            ('today', 0, 0, 0),
+            ('popular_today', 0.1, 50, 900),
+            ('three_days', 3, 400, 0),
+            ('two_weeks', 14, 10_000, 0),
+            ('two_months', 60, 10 ** 9, 0),
+            ('downvoted', 0.2, -20, 0),
+        ):
+            question = Question.objects.create(title=name, content='c', author=cls.alice)
+            Question.objects.filter(pk=question.pk).update(
+                created_at=now - timedelta(days=days), score=score, views=views,
+            )
+            cls.questions[name] = question
+        rebuild_hot_scores()
+
+    def feed(self, sort):
+        response = self.client.get(f'/api/questions/?sort={sort}')
+        self.assertEqual(response.status_code, 200)
+        names = {question.pk: name for name, question in self.questions.items()}
+        return [names[row['id']] for row in response.data['results']]
+
+    def assertHotScoreCurrent(self, question):
+        question.refresh_from_db()
+        self.assertAlmostEqual(question.hot_score, expected_hot_score(question), places=6)
+
+    def test_stored_scores(self):
+        for question in self.questions.values():
+            with self.subTest(question=question.title):
+                self.assertHotScoreCurrent(question)
+
+    def expected_feed(self):
+        scores = {
+            name: expected_hot_score(Question.objects.get(pk=question.pk)) for name, question in self.questions.items()
+        }
+        return sorted(scores, key=lambda name: -scores[name])
+
+    def test_feeds(self):
+        expected = self.expected_feed()
+        self.assertEqual(self.feed('hot'), expected)
+        self.assertEqual(self.feed('hot')[:2], ['popular_today', 'today'])
+        self.assertEqual(self.feed('hot')[-1], 'two_months')
+        self.assertEqual(self.feed('week'), [name for name in expected if name not in ('two_weeks', 'two_months')])
+        self.assertEqual(self.feed('month'), [name for name in expected if name != 'two_months'])
+
+    def test_votes_and_answers_refresh_the_score(self):
+        question = self.questions['downvoted']
+        question.refresh_from_db()
+        before = question.hot_score
+        for user in (self.bob, self.carol):
+            self.post(user, f'/api/questions/{question.pk}/vote/', {'value': 1})
+            self.assertHotScoreCurrent(question)
+        self.post(self.bob, f'/api/questions/{question.pk}/answers/', {'content': 'Réponse'})
+        self.assertHotScoreCurrent(question)
+        self.assertEqual((question.score, question.answer_count), (-18, 1))
+        self.assertGreater(question.hot_score, before)
+        self.assertEqual(self.feed('hot'), self.expected_feed())
+
+        self.post(self.carol, f'/api/questions/{question.pk}/vote/', {'value': 0})
+        self.assertHotScoreCurrent(question)
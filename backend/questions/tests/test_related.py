@@ -0,0 +1,111 @@
+import tempfile
+
+from django.db import transaction
+
+from ..models import Question, Tag
+from ..related import RelatedQuestionsIndex, get_related_index
+from .base import APITests, make_users
+
+
+class RelatedQuestionsIndexTests(APITests):
+    def setUp(self):
+        self.author, = make_users('author')
+        self.django, self.python = (Tag.objects.create(name=name) for name in ('django', 'python'))
+        self.orm = self.ask(
+            'Django ORM prefetch_related queries', 'prefetch_related joins the related rows', self.django
+        )
+        self.select = self.ask(
+            'Django ORM select_related queries', 'select_related joins the related rows', self.django
+        )
+        self.asyncio = self.ask('Python asyncio event loop', 'await coroutines in the event loop', self.python)
+
+    def ask(self, title, content, *tags):
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(title=title, content=content, author=self.author)
+            question.tags.set(tags)
+        return question
+
+    def index(self, **kwargs):
+        index = RelatedQuestionsIndex(refresh_interval=3600, **kwargs)
+        index.build()
+        return index
+
+    def related_ids(self, index, question):
+        return [question_id for question_id, _ in index.similar_to_question(question.pk)]
+
+    def test_incremental_add_replace_and_remove(self):
+        index = self.index()
+        self.assertEqual(self.related_ids(index, self.orm)[0], self.select.pk)
+
+        question = Question(pk=10_000, title='Django ORM prefetch_related queries', content='prefetch_related joins')
+        self.assertTrue(index._add(question.pk, question.title, question.content, ['django']))
+        self.assertEqual(self.related_ids(index, self.orm)[0], question.pk)
+        # Same text and tags (e.g. only a vote changed): not vectorized again
+        self.assertFalse(index._add(question.pk, question.title, question.content, ['django']))
+
+        index.index_question(question, tag_names=['python'])
+        question.title, question.content = 'Python asyncio event loop', 'await coroutines'
+        index.index_question(question, tag_names=['python'])
+        self.assertEqual(self.related_ids(index, self.asyncio)[0], question.pk)
+        self.assertEqual(self.related_ids(index, self.orm)[0], self.select.pk)
+
+        index.remove_question(question.pk)
+        index.remove_question(self.select.pk)
+        self.assertEqual(index.similar_to_question(question.pk), [])
+        self.assertNotIn(question.pk, self.related_ids(index, self.asyncio))
+        self.assertNotIn(self.select.pk, self.related_ids(index, self.orm))
+
+    def test_save_and_load_round_trip(self):
+        index = self.index()
+        index.remove_question(self.asyncio.pk)
+        edited = Question(pk=self.select.pk, title='Django ORM select_related', content='select_related joins')
+        index.index_question(edited, tag_names=['django'])
+        with tempfile.TemporaryDirectory() as path:
+            self.assertEqual(index.save(path), 2)
+            loaded = RelatedQuestionsIndex(path=path, refresh_interval=3600)
+            self.assertTrue(loaded.load())
+            for question in (self.orm, self.select):
+                self.assertEqual(loaded.similar_to_question(question.pk), index.similar_to_question(question.pk))
+            self.assertEqual(loaded.similar_to_question(self.asyncio.pk), [])
+            self.assertFalse(RelatedQuestionsIndex(path=path, dimensions=64).load())
+        self.assertFalse(RelatedQuestionsIndex(path=path).load())
+
+    def test_duplicate_threshold(self):
+        index = self.index(duplicate_threshold=0.5)
+        draft = ('Django ORM prefetch_related queries', 'prefetch_related joins the related rows', ['django'])
+        ranked = index.similar_to_text(*draft)
+        self.assertEqual(ranked[0][0], self.orm.pk)
+        self.assertTrue(all(similarity > 0.5 for _, similarity in ranked))
+        self.assertEqual(index.similar_to_text('Unrelated wording entirely', 'nothing alike'), [])
+        index.duplicate_threshold = 0.99
+        self.assertEqual(index.similar_to_text('Django ORM queries', 'joins rows', ['django']), [])
+        self.assertEqual(index.similar_to_text(*draft, min_score=0)[0][0], self.orm.pk)
+
+    def test_duplicates_endpoint(self):
+        get_related_index().build()
+        response = self.post(self.author, '/api/questions/duplicates/', {
+            'title': 'Django ORM prefetch_related queries',
+            'content': 'prefetch_related joins the related rows',
+            'tag_ids': [self.django.pk],
+        })
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data[0]['id'], self.orm.pk)
+        self.assertNotIn(self.asyncio.pk, [row['id'] for row in response.data])
+        response = self.post(self.author, '/api/questions/duplicates/', {'title': 'Unrelated wording entirely'})
+        self.assertEqual(response.data, [])
+
+    def test_rolled_back_questions_are_not_indexed(self):
+        index = get_related_index()
+        index.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    question = Question.objects.create(title='Rolled back', content='c', author=self.author)
+                    question.tags.set([self.django])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertNotIn(question.pk, index._rows)
+        self.assertNotIn(question.pk, index._signatures)
+        question = self.ask('Committed', 'c', self.django)
+        self.assertIn(question.pk, index._rows)
@@ -0,0 +1,49 @@
+from ..models import Answer, Question, ReputationEvent, Vote
+from ..reputation import QUESTION_UPVOTE, expected_figures, recompute_reputation
+from .base import APITests, make_users
+
+
+class ReputationTests(APITests):
+    def setUp(self):
+        self.asker, self.helper, self.voter = make_users('asker', 'helper', 'voter')
+        self.question = Question.objects.create(title='Question', content='c', author=self.asker)
+
+    def assert_consistent(self):
+        for user in expected_figures():
+            self.assertEqual(
+                (user.reputation, user.total_votes),
+                (user.expected_reputation, user.expected_total_votes),
+                user.username,
+            )
+
+    def test_incremental_updates_match_recompute(self):
+        answer = self.post(self.helper, f'/api/questions/{self.question.pk}/answers/', {'content': 'a'}).data['id']
+        events = [
+            (self.voter, f'/api/questions/{self.question.pk}/vote/', {'value': 1}),
+            (self.helper, f'/api/questions/{self.question.pk}/vote/', {'value': -1}),
+            (self.voter, f'/api/questions/{self.question.pk}/vote/', {'value': -1}),
+            (self.asker, f'/api/answers/{answer}/vote/', {'value': 1}),
+            (self.voter, f'/api/answers/{answer}/vote/', {'value': 1}),
+            (self.asker, f'/api/answers/{answer}/accept/', None),
+            (self.voter, f'/api/answers/{answer}/vote/', {'value': 0}),
+        ]
+        for user, url, data in events:
+            self.assertEqual(self.post(user, url, data).status_code, 200, url)
+            self.assert_consistent()
+        self.assertEqual(recompute_reputation(), 0)
+
+        Vote.objects.filter(user=self.asker).delete()
+        self.assert_consistent()
+        Answer.objects.filter(pk=answer).delete()
+        self.assert_consistent()
+
+    def test_recompute_repairs_drift(self):
+        Vote.objects.create(user=self.voter, question=self.question, value=1)
+        Question.objects.filter(pk=self.question.pk).update(imported_score=2)
+        self.assertEqual(recompute_reputation(), 1)
+        self.asker.refresh_from_db()
+        self.assertEqual((self.asker.reputation, self.asker.total_votes), (3 * QUESTION_UPVOTE, 3))
+        self.assertTrue(ReputationEvent.objects.filter(
+            user=self.asker, reason=ReputationEvent.REPAIR, delta=3 * QUESTION_UPVOTE, votes_delta=3,
+        ).exists())
+        self.assertEqual(recompute_reputation(), 0)
@@ -0,0 +1,94 @@
+from django.core.cache import caches
+from django.test import override_settings
+
+from ..models import Answer, Question, Tag
+from .base import APITests, make_users
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': True, 'CACHE': 'responses'})
+class ResponseCacheInvalidationTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = make_users('alice', 'bob', 'carol')
+        cls.django, cls.python = (Tag.objects.create(name=name) for name in ('django', 'python'))
+        cls.question = Question.objects.create(title='Question', content='c', author=cls.alice)
+        cls.question.tags.set([cls.django])
+        cls.answer = Answer.objects.create(question=cls.question, author=cls.bob, content='a')
+        Question.objects.filter(pk=cls.question.pk).update(answer_count=1)
+        cls.list_url = '/api/questions/'
+        cls.detail_url = f'/api/questions/{cls.question.pk}/'
+        cls.tags_url = '/api/tags/'
+
+    def setUp(self):
+        for alias in ('responses', 'views'):
+            caches[alias].clear()
+
+    def get(self, url):
+        self.client.force_authenticate(None)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def warm(self, *urls):
+        for url in urls:
+            self.get(url)
+            self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+    def write(self, user, method, url, data=None):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data or {}, format='json')
+        self.assertLess(response.status_code, 300, response.data)
+        return response
+
+    def fresh(self, url):
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        return response.data
+
+    def row(self):
+        return self.fresh(self.list_url)['results'][0]
+
+    def test_vote(self):
+        self.warm(self.list_url, self.detail_url)
+        self.write(self.carol, 'post', f'{self.detail_url}vote/', {'value': 1})
+        self.assertEqual(self.row()['vote_count'], 1)
+        self.assertEqual(self.fresh(self.detail_url)['vote_count'], 1)
+
+        self.warm(self.detail_url)
+        self.write(self.carol, 'post', f'/api/answers/{self.answer.pk}/vote/', {'value': 1})
+        self.assertEqual(self.fresh(self.detail_url)['answers'][0]['vote_count'], 1)
+
+    def test_answer(self):
+        self.warm(self.list_url, self.detail_url)
+        self.write(self.carol, 'post', f'{self.detail_url}answers/', {'content': 'Autre réponse'})
+        self.assertEqual(self.row()['answer_count'], 2)
+        self.assertEqual(len(self.fresh(self.detail_url)['answers']), 2)
+
+    def test_accept(self):
+        self.warm(self.list_url, self.detail_url)
+        self.write(self.alice, 'post', f'/api/answers/{self.answer.pk}/accept/')
+        self.assertTrue(self.row()['has_accepted_answer'])
+        self.assertTrue(self.fresh(self.detail_url)['answers'][0]['is_accepted'])
+
+    def test_tag_change(self):
+        self.warm(self.list_url, self.detail_url, self.tags_url)
+        self.write(self.alice, 'patch', self.detail_url, {'tag_ids': [self.python.pk]})
+        self.assertEqual([tag['name'] for tag in self.row()['tags']], ['python'])
+        self.assertEqual([tag['name'] for tag in self.fresh(self.detail_url)['tags']], ['python'])
+        counts = {tag['name']: tag['questions_count'] for tag in self.fresh(self.tags_url)['results']}
+        self.assertEqual(counts, {'django': 0, 'python': 1})
+
+    def test_view_flush_refreshes_the_list(self):
+        self.warm(self.list_url)
+        self.assertEqual(self.get(self.list_url).data['results'][0]['views'], 0)
+        # FLUSH_INTERVAL 0: the hit is flushed by the request that counts it
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get(self.detail_url)
+        self.assertEqual(self.row()['views'], 1)
+
+    def test_authenticated_reads_bypass_the_cache(self):
+        self.client.force_authenticate(self.alice)
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertNotIn('X-Cache', response)
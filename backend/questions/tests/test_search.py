@@ -0,0 +1,61 @@
+from unittest import skipIf
+
+from django.db import connection, transaction
+
+from ..models import Question
+from ..search import InvertedIndexSearchEngine, get_search_engine
+from .base import APITests, make_users
+
+
+class InvertedIndexSearchTests(APITests):
+    def setUp(self):
+        self.author, = make_users('author')
+
+    def ask(self, title, content='c'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Question.objects.create(title=title, content=content, author=self.author)
+
+    def test_ranking_and_every_token_matching(self):
+        first = self.ask('Django ORM queries', 'select_related prefetch')
+        second = self.ask('Queries in SQLite', 'the django orm runs them')
+        self.ask('Unrelated', 'nothing here')
+        engine = InvertedIndexSearchEngine()
+        self.assertEqual([pk for pk, _ in engine.rank('django orm')], [first.pk, second.pk])
+        self.assertEqual(engine.rank('django nothing'), [])
+        self.assertEqual(engine.rank('  '), [])
+
+    def test_refresh_picks_up_questions_written_elsewhere(self):
+        engine = InvertedIndexSearchEngine(refresh_interval=3600)
+        engine.build()
+        # Another worker's write: this engine receives no signal for it
+        question = self.ask('Posted through another worker')
+        self.assertEqual(engine.rank('worker'), [])
+        self.assertEqual(engine.refresh(force=True), 1)
+        self.assertEqual([pk for pk, _ in engine.rank('worker')], [question.pk])
+
+        question.title = 'Edited elsewhere'
+        question.save()
+        engine.refresh(force=True)
+        self.assertEqual(engine.rank('worker'), [])
+        self.assertEqual([pk for pk, _ in engine.rank('edited')], [question.pk])
+
+    @skipIf(connection.vendor == 'postgresql', "the PostgreSQL engine searches the database column")
+    def test_rolled_back_questions_are_not_indexed(self):
+        engine = get_search_engine()
+        engine.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Question.objects.create(title='Zebra crossing', content='c', author=self.author)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(engine.rank('zebra'), [])
+        question = self.ask('Zebra stripes')
+        self.assertEqual([pk for pk, _ in engine.rank('zebra')], [question.pk])
+
+    def test_search_endpoint(self):
+        question = self.ask('Pagination with cursors')
+        self.ask('Something else')
+        response = self.client.get('/api/questions/?search=cursors')
+        self.assertEqual([row['id'] for row in response.data['results']], [question.pk])
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Answer, Comment, Question, Tag, User
+from .base import APITests, make_users
+
+
+class SparseFieldsTests(APITests):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = make_users('alice', 'bob')
+        tags = [Tag.objects.create(name=name) for name in ('django', 'python')]
+        cls.question = Question.objects.create(title='Question', content='c', author=cls.alice)
+        cls.question.tags.set(tags)
+        cls.answer = Answer.objects.create(question=cls.question, author=cls.bob, content='a')
+        Comment.objects.create(answer=cls.answer, author=cls.alice, content='merci')
+
+    def get(self, url, status=200):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status, response.content)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_question_list_shapes(self):
+        response, _ = self.get('/api/questions/?fields=id,title')
+        self.assertEqual(response.data['results'], [{'id': self.question.pk, 'title': 'Question'}])
+        response, _ = self.get('/api/questions/?fields=id,author,tags')
+        row = response.data['results'][0]
+        self.assertEqual(row['author'], self.alice.pk)
+        self.assertEqual(sorted(row['tags']), sorted(self.question.tags.values_list('pk', flat=True)))
+        response, _ = self.get('/api/questions/?fields=author.username,tags.name')
+        self.assertEqual(response.data['results'][0]['author'], {'username': 'alice'})
+        self.assertEqual(sorted(tag['name'] for tag in response.data['results'][0]['tags']), ['django', 'python'])
+        response, _ = self.get('/api/questions/?fields=author&expand=author')
+        self.assertEqual(response.data['results'][0]['author']['questions_count'], 1)
+
+    def test_unknown_fields_are_rejected(self):
+        for url in (
+            '/api/questions/?fields=bogus',
+            '/api/questions/?fields=',
+            '/api/questions/?fields=id,title.length',
+            '/api/questions/?fields=id,author.bogus',
+            '/api/questions/?fields=id&expand=title',
+            f'/api/questions/{self.question.pk}/?fields=answers.bogus',
+            f'/api/answers/{self.answer.pk}/?fields=comments.author.bogus',
+            f'/api/auth/users/{self.alice.pk}/?fields=password',
+        ):
+            with self.subTest(url=url):
+                response, _ = self.get(url, status=400)
+                self.assertIn('available_fields', response.data)
+        response, _ = self.get('/api/questions/?fields=id,bogus,author.nope', status=400)
+        self.assertEqual(response.data['fields'], ['Champs inconnus : bogus, author.nope.'])
+        self.assertIn('author.username', response.data['available_fields'])
+        self.assertIn('tags.questions_count', response.data['available_fields'])
+
+    def test_answer_and_user_fields(self):
+        response, _ = self.get(f'/api/answers/{self.answer.pk}/?fields=content,comments.content')
+        self.assertEqual(response.data, {'content': 'a', 'comments': [{'content': 'merci'}]})
+        response, _ = self.get(f'/api/auth/users/{self.bob.pk}/?fields=username,reputation')
+        self.assertEqual(response.data, {'username': 'bob', 'reputation': 0})
+        self.client.force_authenticate(self.alice)
+        response, _ = self.get('/api/auth/profile/?fields=username')
+        self.assertEqual(response.data, {'username': 'alice'})
+        self.get('/api/auth/profile/?fields=username,password', status=400)
+
+    @override_settings(FAST_SERIALIZERS=False)
+    def test_dropped_fields_skip_their_queries(self):
+        tables = {model: model._meta.db_table for model in (Tag, User, Answer, Comment)}
+
+        def touched(queries):
+            return {model for model, table in tables.items() if any(f'"{table}"' in sql for sql in queries)}
+
+        _, full = self.get('/api/questions/')
+        _, sparse = self.get('/api/questions/?fields=id,title')
+        self.assertLessEqual({Tag, User}, touched(full))
+        self.assertEqual(touched(sparse), set())
+        self.assertLess(len(sparse), len(full))
+
+        _, full = self.get(f'/api/questions/{self.question.pk}/')
+        _, sparse = self.get(f'/api/questions/{self.question.pk}/?fields=id,title,answers.content')
+        self.assertEqual(touched(full), {Tag, User, Answer, Comment})
+        self.assertEqual(touched(sparse), {Answer})
+        self.assertLess(len(sparse), len(full))
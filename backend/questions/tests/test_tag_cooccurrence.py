@@ -0,0 +1,68 @@
+from ..models import Question, Tag, TagPair
+from ..tag_cooccurrence import rebuild_cooccurrence
+from .base import APITests, make_users
+
+
+class TagCooccurrenceTests(APITests):
+    def setUp(self):
+        self.author, = make_users('author')
+        self.a, self.b, self.c, self.d = (Tag.objects.create(name=name) for name in ('a', 'b', 'c', 'd'))
+        self.first, self.second = (
+            Question.objects.create(title=title, content='c', author=self.author) for title in ('first', 'second')
+        )
+
+    def pairs(self):
+        """{(tag name, other name): count}, both directions"""
+        return {
+            (tag, other): count
+            for tag, other, count in TagPair.objects.values_list('tag__name', 'other__name', 'count')
+        }
+
+    def assertPairs(self, expected):
+        both = {**expected, **{(other, tag): count for (tag, other), count in expected.items()}}
+        self.assertEqual(self.pairs(), both)
+        rebuild_cooccurrence()
+        self.assertEqual(self.pairs(), both)
+
+    def test_forward_changes(self):
+        self.first.tags.set([self.a, self.b, self.c])
+        self.assertPairs({('a', 'b'): 1, ('a', 'c'): 1, ('b', 'c'): 1})
+        self.second.tags.add(self.a, self.b)
+        self.assertPairs({('a', 'b'): 2, ('a', 'c'): 1, ('b', 'c'): 1})
+        self.first.tags.remove(self.c)
+        self.assertPairs({('a', 'b'): 2})
+        # Removing a link that does not exist changes nothing
+        self.first.tags.remove(self.d)
+        self.assertPairs({('a', 'b'): 2})
+        self.second.tags.set([self.b, self.d])
+        self.assertPairs({('a', 'b'): 1, ('b', 'd'): 1})
+        self.second.tags.clear()
+        self.assertPairs({('a', 'b'): 1})
+
+    def test_reverse_changes(self):
+        self.first.tags.set([self.a, self.b])
+        self.second.tags.set([self.a])
+        self.c.questions.add(self.first, self.second)
+        self.assertPairs({('a', 'b'): 1, ('a', 'c'): 2, ('b', 'c'): 1})
+        self.a.questions.remove(self.second)
+        self.assertPairs({('a', 'b'): 1, ('a', 'c'): 1, ('b', 'c'): 1})
+        self.c.questions.clear()
+        self.assertPairs({('a', 'b'): 1})
+
+    def test_deletes(self):
+        self.first.tags.set([self.a, self.b, self.c])
+        self.second.tags.set([self.a, self.b])
+        self.first.delete()
+        self.assertPairs({('a', 'b'): 1})
+        self.b.delete()
+        self.assertPairs({})
+
+    def test_related_tags_endpoint(self):
+        self.first.tags.set([self.a, self.b, self.c])
+        self.second.tags.set([self.a, self.c])
+        response = self.client.get(f'/api/tags/{self.a.pk}/related/')
+        self.assertEqual(
+            response.data,
+            [{'id': self.c.pk, 'name': 'c', 'count': 2}, {'id': self.b.pk, 'name': 'b', 'count': 1}],
+        )
+        self.assertEqual(self.client.get('/api/tags/999999/related/').status_code, 404)
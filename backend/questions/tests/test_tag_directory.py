@@ -0,0 +1,79 @@
+from django.core.cache import caches
+
+from ..models import Question, Tag
+from ..tag_directory import filter_by_prefix, get_tag_directory
+from .base import APITests, make_users
+
+
+class TagDirectoryTests(APITests):
+    def setUp(self):
+        caches['responses'].clear()
+        self.author, = make_users('author')
+        self.tags = {
+            name: Tag.objects.create(name=name)
+            for name in ('python', 'Django', 'django-rest-framework', 'djangocms', 'docker', 'pandas')
+        }
+
+    def counts(self):
+        return {entry['name']: entry['questions_count'] for entry in get_tag_directory()}
+
+    def ask(self, *names):
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(title='Question', content='c', author=self.author)
+            question.tags.set([self.tags[name] for name in names])
+        return question
+
+    def test_prefix_lookup(self):
+        entries = get_tag_directory()
+        self.assertEqual(
+            [entry['name'] for entry in entries],
+            ['Django', 'django-rest-framework', 'djangocms', 'docker', 'pandas', 'python'],
+        )
+
+        def names(prefix):
+            return [entry['name'] for entry in filter_by_prefix(entries, prefix)]
+
+        self.assertEqual(names('dj'), ['Django', 'django-rest-framework', 'djangocms'])
+        self.assertEqual(names('DJANGO-'), ['django-rest-framework'])
+        self.assertEqual(names('d'), ['Django', 'django-rest-framework', 'djangocms', 'docker'])
+        self.assertEqual(names('z'), [])
+        self.assertEqual(names('pythonic'), [])
+
+        response = self.client.get('/api/tags/?prefix=Djangoc')
+        self.assertEqual([tag['name'] for tag in response.data['results']], ['djangocms'])
+
+    def test_reads_are_served_from_the_local_copy(self):
+        entries = get_tag_directory()
+        with self.assertNumQueries(0):
+            self.assertIs(get_tag_directory(), entries)
+
+    def test_link_changes_invalidate(self):
+        self.assertEqual(self.counts()['python'], 0)
+        question = self.ask('python', 'pandas')
+        self.assertEqual((self.counts()['python'], self.counts()['pandas']), (1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.tags.remove(self.tags['pandas'])
+        self.assertEqual(self.counts()['pandas'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags['docker'].questions.add(question)
+        self.assertEqual(self.counts()['docker'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+        self.assertEqual(set(self.counts().values()), {0})
+
+    def test_tag_changes_invalidate(self):
+        self.counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='celery')
+            self.tags['docker'].delete()
+        self.assertIn('celery', self.counts())
+        self.assertNotIn('docker', self.counts())
+
+    def test_uncommitted_changes_keep_the_directory(self):
+        entries = get_tag_directory()
+        # No commit: the version token is only replaced by on_commit callbacks
+        self.tags['python'].questions.add(Question.objects.create(title='Q', content='c', author=self.author))
+        self.assertIs(get_tag_directory(), entries)
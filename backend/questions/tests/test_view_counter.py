@@ -0,0 +1,51 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import RequestFactory
+
+from ..models import Question
+from ..view_counter import LocalMemoryBuffer, ViewCounter, client_ip, viewer_key
+from .base import APITests, make_users
+
+
+class ViewerKeyTests(APITests):
+    def request(self, forwarded=None):
+        extra = {'REMOTE_ADDR': '10.0.0.1'}
+        if forwarded:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded
+        request = RequestFactory().get('/', **extra)
+        request.user = AnonymousUser()
+        return request
+
+    def test_forwarded_for_only_behind_trusted_proxies(self):
+        request = self.request('198.51.100.9, 203.0.113.7')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        self.assertEqual(client_ip(request, trusted_proxies=1), '203.0.113.7')
+        self.assertEqual(client_ip(request, trusted_proxies=2), '198.51.100.9')
+        self.assertEqual(client_ip(request, trusted_proxies=5), '198.51.100.9')
+        self.assertEqual(client_ip(self.request(), trusted_proxies=1), '10.0.0.1')
+
+    def test_client_chosen_hops_do_not_change_the_key(self):
+        keys = {
+            viewer_key(self.request(f'192.0.2.{i}, 203.0.113.7'), trusted_proxies=1)
+            for i in range(5)
+        }
+        self.assertEqual(keys, {'203.0.113.7'})
+
+    def test_authenticated_viewers_use_their_id(self):
+        user, = make_users('viewer')
+        request = self.request('192.0.2.1')
+        request.user = user
+        self.assertEqual(viewer_key(request, trusted_proxies=1), f'u{user.pk}')
+
+
+class ViewCounterTests(APITests):
+    def test_repeat_views_are_counted_once(self):
+        author, = make_users('author')
+        question = Question.objects.create(title='Question', content='c', author=author)
+        counter = ViewCounter(LocalMemoryBuffer(), flush_interval=0, dedup_window=60, cache=caches['views'])
+        self.assertEqual(
+            [counter.hit(question.pk, viewer) for viewer in ('a', 'a', 'b', 'a', 'b')],
+            [True, False, True, False, False],
+        )
+        question.refresh_from_db()
+        self.assertEqual(question.views, 2)
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Answer, Question, Vote
+from ..reputation import ANSWER_UPVOTE, DOWNVOTE, QUESTION_UPVOTE
+from .base import APITests, make_users
+
+
+class VotingTests(APITests):
+    def setUp(self):
+        self.author, self.voter, self.other = make_users('author', 'voter', 'other')
+        self.question = Question.objects.create(title='Question', content='c', author=self.author)
+        self.answer = Answer.objects.create(question=self.question, author=self.other, content='a')
+
+    def vote(self, user, url, value):
+        self.client.force_authenticate(user)
+        return self.client.post(url, {'value': value}, format='json')
+
+    def figures(self, user):
+        user.refresh_from_db()
+        return user.reputation, user.total_votes
+
+    def test_question_vote_change_and_withdrawal(self):
+        url = f'/api/questions/{self.question.pk}/vote/'
+        steps = [(1, 1, QUESTION_UPVOTE), (-1, -1, DOWNVOTE), (-1, -1, DOWNVOTE), (0, 0, 0)]
+        for value, score, reputation in steps:
+            with self.subTest(value=value):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.vote(self.voter, url, value)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, {'vote_count': score, 'user_vote': value or None})
+                self.assertFalse([q['sql'] for q in context.captured_queries if 'COUNT(' in q['sql'].upper()])
+                self.question.refresh_from_db()
+                self.assertEqual(self.question.score, score)
+                self.assertEqual(self.figures(self.author), (reputation, score))
+        self.assertFalse(Vote.objects.filter(user=self.voter).exists())
+
+    def test_answer_votes_add_up(self):
+        url = f'/api/answers/{self.answer.pk}/vote/'
+        self.vote(self.voter, url, 1)
+        response = self.vote(self.author, url, 1)
+        self.assertEqual(response.data['vote_count'], 2)
+        self.assertEqual(self.figures(self.other), (2 * ANSWER_UPVOTE, 2))
+
+    def test_invalid_vote(self):
+        response = self.vote(self.voter, f'/api/questions/{self.question.pk}/vote/', 2)
+        self.assertEqual(response.status_code, 400)
+        response = self.vote(self.voter, '/api/questions/999999/vote/', 1)
+        self.assertEqual(response.status_code, 404)
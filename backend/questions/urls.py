@@ -1,13 +1,21 @@
 from django.urls import path
+from . import async_views
 from .views import (
     QuestionListCreateView,
     QuestionDetailView,
+    related_questions,
+    duplicate_questions,
     AnswerCreateView,
     AnswerDetailView,
     CommentCreateView,
     TagListView,
+    UserAnswersView,
     vote_question,
     vote_answer,
+    bulk_vote,
+    export_corpus,
+    related_tags,
+    suggest_tags,
     accept_answer,
 )
 
@@ -15,6 +23,8 @@ urlpatterns = [
     # Questions
     path('questions/', QuestionListCreateView.as_view(), name='question_list'),
     path('questions/<int:pk>/', QuestionDetailView.as_view(), name='question_detail'),
+    path('questions/<int:pk>/related/', related_questions, name='related_questions'),
+    path('questions/duplicates/', duplicate_questions, name='duplicate_questions'),
     
     # Answers
     path('questions/<int:question_id>/answers/', AnswerCreateView.as_view(), name='answer_create'),
@@ -27,9 +37,24 @@ urlpatterns = [
     # Votes
     path('questions/<int:pk>/vote/', vote_question, name='vote_question'),
     path('answers/<int:pk>/vote/', vote_answer, name='vote_answer'),
+    path('votes/bulk/', bulk_vote, name='bulk_vote'),
     
     # Tags
     path('tags/', TagListView.as_view(), name='tag_list'),
+    path('tags/<int:pk>/related/', related_tags, name='related_tags'),
+    path('tags/suggest/', suggest_tags, name='suggest_tags'),
+    
+    # User activity
+    path('users/<int:user_id>/answers/', UserAnswersView.as_view(), name='user_answers'),
+    
+    # Data export (admins)
+    path('export/', export_corpus, name='export_corpus'),
+    
+    # Async read endpoints for the ASGI server, see questions/async_views.py
+    path('async/questions/', async_views.question_list, name='async_question_list'),
+    path('async/questions/<int:pk>/', async_views.question_detail, name='async_question_detail'),
+    path('async/answers/<int:pk>/', async_views.answer_detail, name='async_answer_detail'),
+    path('async/tags/', async_views.tag_list, name='async_tag_list'),
 
 ]
 
@@ -0,0 +1,244 @@
+"""Buffered question view counter.
+
+Hits are accumulated in a buffer instead of writing the Question row on
+every GET, and flushed as batched ``views = views + n`` updates every
+``FLUSH_INTERVAL`` seconds by a daemon thread of each process (started
+by the first hit), at exit, or via the flush_view_counts command. Repeat
+views by the same user/IP within ``DEDUP_WINDOW`` seconds are ignored,
+using ``add()`` on the ``CACHE`` alias: it has to be atomic (local memory,
+Redis), and shared by all workers (Redis) for cross-worker dedup. The IP
+is only read from X-Forwarded-For behind ``TRUSTED_PROXIES`` proxies.
+Flushing invalidates the cached detail responses of the questions it
+updated and the cached list pages, which show ``views`` too.
+
+Buffers:
+- LocalMemoryBuffer: per process, lost if the process is killed.
+- SQLiteBuffer: a local SQLite file shared by all workers on the host.
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import response_cache
+from .models import Question
+from .ranking import hot_score_expression
+
+DEFAULTS = {
+    'BACKEND': 'questions.view_counter.LocalMemoryBuffer',
+    'OPTIONS': {},
+    'FLUSH_INTERVAL': 10,
+    'DEDUP_WINDOW': 15 * 60,
+    'CACHE': 'default',
+    'TRUSTED_PROXIES': 0,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class LocalMemoryBuffer:
+    """Pending hits kept in a dict guarded by a lock"""
+
+    def __init__(self):
+        self._hits = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, question_id, count=1):
+        with self._lock:
+            self._hits[question_id] += count
+
+    def pending(self, question_id):
+        with self._lock:
+            return self._hits.get(question_id, 0)
+
+    def drain(self):
+        with self._lock:
+            hits, self._hits = dict(self._hits), defaultdict(int)
+        return hits
+
+
+class SQLiteBuffer:
+    """Pending hits kept in a SQLite file, shared between worker processes"""
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.BASE_DIR / 'view_counter.sqlite3')
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS pending_views ('
+                'question_id INTEGER PRIMARY KEY, hits INTEGER NOT NULL)'
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, question_id, count=1):
+        self._connection().execute(
+            'INSERT INTO pending_views (question_id, hits) VALUES (?, ?) '
+            'ON CONFLICT(question_id) DO UPDATE SET hits = hits + excluded.hits',
+            (question_id, count),
+        )
+
+    def pending(self, question_id):
+        row = self._connection().execute(
+            'SELECT hits FROM pending_views WHERE question_id = ?', (question_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def drain(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            hits = dict(conn.execute('SELECT question_id, hits FROM pending_views'))
+            conn.execute('DELETE FROM pending_views')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return hits
+
+
+class ViewCounter:
+    def __init__(self, buffer, flush_interval=10, dedup_window=0, cache=None, trusted_proxies=0):
+        self.buffer = buffer
+        self.flush_interval = flush_interval
+        self.dedup_window = dedup_window
+        self.cache = cache if cache is not None else caches['default']
+        self.trusted_proxies = trusted_proxies
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def hit(self, question_id, viewer=None):
+        """Record one view; returns False when it was a repeat view"""
+        if viewer and self.dedup_window:
+            key = f'question-view:{question_id}:{viewer}'
+            if not self.cache.add(key, 1, timeout=self.dedup_window):
+                return False
+        self.buffer.add(question_id)
+        if self.flush_interval <= 0:
+            self.flush()
+        elif self._thread is None:
+            self.start()
+        return True
+
+    def start(self):
+        """Flush every flush_interval seconds from a daemon thread, with or without traffic"""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(max(self._last_flush + self.flush_interval - time.monotonic(), 0.1))
+            try:
+                self.maybe_flush()
+            except Exception:
+                logger.exception("View count flush failed, retrying in %s s", self.flush_interval)
+            finally:
+                # This thread's own connection, don't keep it open between flushes
+                connections.close_all()
+
+    def pending(self, question_id):
+        return self.buffer.pending(question_id)
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered hits, one UPDATE per distinct increment. Returns the hits written."""
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_flush = time.monotonic()
+            hits = self.buffer.drain()
+            by_increment = defaultdict(list)
+            for question_id, count in hits.items():
+                by_increment[count].append(question_id)
+            try:
+                for count, question_ids in by_increment.items():
+                    Question.objects.filter(pk__in=question_ids).update(
+                        views=F('views') + count,
+                        hot_score=hot_score_expression(views=F('views') + count),
+                    )
+            except Exception:
+                # Put the hits back so the next flush retries them
+                for question_id, count in hits.items():
+                    self.buffer.add(question_id, count)
+                raise
+            if hits:
+                response_cache.invalidate(
+                    response_cache.QUESTION_LIST, *[response_cache.question_scope(pk) for pk in hits]
+                )
+            return sum(hits.values())
+        finally:
+            self._flush_lock.release()
+
+
+def client_ip(request, trusted_proxies=0):
+    """The address of the client, as seen by the outermost of ``trusted_proxies`` proxies.
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so only the right-most ``trusted_proxies`` entries can
+    be trusted; whatever the client sent itself comes before them.
+    """
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if trusted_proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        return hops[max(len(hops) - trusted_proxies, 0)]
+    return request.META.get('REMOTE_ADDR')
+
+
+def viewer_key(request, trusted_proxies=0):
+    """Identity used to deduplicate repeat views: user id, else client IP"""
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    return client_ip(request, trusted_proxies)
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                conf = {**DEFAULTS, **getattr(settings, 'VIEW_COUNTER', {})}
+                buffer = import_string(conf['BACKEND'])(**conf['OPTIONS'])
+                _counter = ViewCounter(
+                    buffer, conf['FLUSH_INTERVAL'], conf['DEDUP_WINDOW'],
+                    cache=caches[conf['CACHE']], trusted_proxies=conf['TRUSTED_PROXIES'],
+                )
+                atexit.register(_counter.flush)
+    return _counter
+
+
+@receiver(setting_changed)
+def reset_view_counter(setting, **kwargs):
+    """Rebuild the counter from the new settings (override_settings in tests)"""
+    global _counter
+    if setting in ('VIEW_COUNTER', 'CACHES'):
+        with _counter_lock:
+            if _counter is not None:
+                _counter.flush()
+            _counter = None
@@ -2,24 +2,39 @@ from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
-from .models import Question, Answer, Comment, Tag, Vote
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from config.renderers import StreamingJSONResponse
+from config.sparse_fields import FieldSpec, SparseFieldsViewMixin
+from . import (
+    conditional, counters, export, fast_serializers, ranking, reputation, response_cache, tag_cooccurrence, voting,
+)
+from .models import Question, Answer, Comment, Tag, Vote, answer_prefetches
+from .pagination import KeysetPagination, TagPagination
+from .related import get_related_index
+from .search import QuestionSearchFilter
+from .tag_directory import filter_by_prefix, get_tag_directory
+from .view_counter import get_view_counter, viewer_key
 from .serializers import (
     QuestionListSerializer,
     QuestionDetailSerializer,
     AnswerSerializer,
     CommentSerializer,
     TagSerializer,
-    VoteSerializer
+    VoteSerializer,
+    BulkVoteItemSerializer,
+    DuplicateCheckSerializer
 )
 
 
-class QuestionListCreateView(generics.ListCreateAPIView):
+class QuestionListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """List all questions or create a new question"""
     queryset = Question.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'content']
+    filter_backends = [DjangoFilterBackend, QuestionSearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
     ordering_fields = ['created_at', 'views']
     filterset_fields = ['tags']
     
@@ -30,42 +45,126 @@ class QuestionListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         queryset = Question.objects.all()
+        if fast_serializers.enabled(self.request):
+            queryset = queryset.values(*fast_serializers.QUESTION_LIST_FIELDS)
+        elif self.request.method == 'GET':
+            queryset = queryset.for_list(FieldSpec.from_request(self.request))
         
         # Filter by tag name
         tag_name = self.request.query_params.get('tag', None)
         if tag_name:
             queryset = queryset.filter(tags__name=tag_name)
         
-        # Filter unanswered questions
+        # Review queues: unanswered questions, questions without an accepted answer
         unanswered = self.request.query_params.get('unanswered', None)
         if unanswered:
-            queryset = queryset.annotate(num_answers=Count('answers')).filter(num_answers=0)
+            queryset = queryset.filter(answer_count=0)
+        unaccepted = self.request.query_params.get('unaccepted', None)
+        if unaccepted:
+            queryset = queryset.filter(has_accepted=False)
         
-        # Sort by popularity (votes)
+        # Sort by popularity (votes) or by the stored hot score
         sort = self.request.query_params.get('sort', None)
         if sort == 'votes':
-            queryset = queryset.annotate(
-                vote_sum=Count('votes', filter=Q(votes__value=1)) - Count('votes', filter=Q(votes__value=-1))
-            ).order_by('-vote_sum')
+            queryset = queryset.order_by('-score', '-id')
+        elif sort in ranking.FEED_WINDOWS:
+            queryset = ranking.feed(queryset, sort, timezone.now()).order_by(*ranking.ORDERING)
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        build = self.fast_list if fast_serializers.enabled(request) else super().list
+        return response_cache.cached_response(
+            request, [response_cache.QUESTION_LIST], lambda: build(request, *args, **kwargs)
+        )
+    
+    def fast_list(self, request, *args, **kwargs):
+        # get_queryset() returns .values() rows, see questions/fast_serializers.py
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(fast_serializers.question_list(page, request))
+    
+    def get_keyset_ordering(self):
+        """Unique ordering for KeysetPagination, None when the client picks another one"""
+        params = self.request.query_params
+        if params.get('search') or params.get('ordering', '-created_at') != '-created_at':
+            return None
+        if params.get('sort') == 'votes':
+            return ('-score', '-id')
+        if params.get('sort') in ranking.FEED_WINDOWS:
+            return ranking.ORDERING
+        return ('-created_at', '-id')
+    
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
-class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
+VALIDATOR_FIELDS = ('version', 'updated_at', 'last_activity_at', 'views')
+
+
+class QuestionDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a question"""
     queryset = Question.objects.all()
     serializer_class = QuestionDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
+    def get_queryset(self):
+        if self.request.method == 'GET':
+            return Question.objects.for_detail(FieldSpec.from_request(self.request))
+        return Question.objects.all()
+    
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        instance.views += 1
-        instance.save(update_fields=['views'])
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        pk = kwargs['pk']
+        
+        # Anonymous responses are cached, see questions/response_cache.py
+        cache = response_cache.get_response_cache() if response_cache.cacheable(request) else None
+        key = cache.key(request, response_cache.question_scope(pk)) if cache else None
+        entry = cache.get(key) if key else None
+        if entry is not None:
+            state, data = entry
+        else:
+            state = Question.objects.filter(pk=pk).values(*VALIDATOR_FIELDS).first()
+            if state is None:
+                raise Http404
+        
+        # Conditional GET, answered before anything is serialized or counted.
+        # The ETag follows the flushed view count, not the pending hits.
+        etag, last_modified = conditional.make_validators(
+            'question', pk, state['version'], state['views'], response_cache.normalized_query(request),
+            user=request.user, updated_at=state['updated_at'], last_activity_at=state['last_activity_at'],
+        )
+        not_modified = conditional.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        # Views are buffered and flushed in batches, see questions/view_counter.py
+        counter = get_view_counter()
+        counter.hit(pk, viewer=viewer_key(request, counter.trusted_proxies))
+        
+        if entry is None:
+            instance = self.get_object()
+            
+            # The caller's votes on the question and every answer, in one query
+            context = self.get_serializer_context()
+            spec = FieldSpec.from_request(request)
+            wants_votes = spec.wants('user_vote') or (
+                spec.expanded('answers') and spec.child('answers').wants('user_vote')
+            )
+            if request.user.is_authenticated and wants_votes:
+                question_vote, answer_votes = Vote.values_for_question(request.user, instance.pk)
+            else:
+                question_vote, answer_votes = None, {}
+            context.update(question_vote=question_vote, answer_votes=answer_votes)
+            
+            data = self.get_serializer_class()(instance, context=context).data
+            if key:
+                cache.set(key, (state, data))
+        
+        if 'views' in data:
+            data = {**data, 'views': data['views'] + counter.pending(pk)}
+        response = Response(data)
+        if key:
+            response['X-Cache'] = 'HIT' if entry is not None else 'MISS'
+        return conditional.set_validators(response, etag, last_modified)
     
     def perform_update(self, serializer):
         # Only author can update
@@ -86,6 +185,64 @@ class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.delete()
 
 
+RELATED_LIMIT = 5
+MAX_RELATED_LIMIT = 20
+
+
+def related_limit(request):
+    try:
+        limit = int(request.query_params.get('limit', RELATED_LIMIT))
+    except ValueError:
+        return RELATED_LIMIT
+    return min(max(limit, 1), MAX_RELATED_LIMIT)
+
+
+def suggestion_entries(ranked):
+    """Summaries of the [(question_id, similarity)] suggestions, in that order"""
+    rows = Question.objects.filter(pk__in=[pk for pk, _ in ranked]).values(
+        'id', 'title', 'score', 'answer_count', 'has_accepted'
+    )
+    by_id = {row['id']: row for row in rows}
+    return [
+        {
+            'id': pk,
+            'title': by_id[pk]['title'],
+            'vote_count': by_id[pk]['score'],
+            'answer_count': by_id[pk]['answer_count'],
+            'has_accepted_answer': by_id[pk]['has_accepted'],
+            'similarity': round(similarity, 3),
+        }
+        for pk, similarity in ranked
+        if pk in by_id
+    ]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def related_questions(request, pk):
+    """Questions similar to this one (title, content and tags), most similar first"""
+    if not Question.objects.filter(pk=pk).exists():
+        return Response(
+            {"detail": "Question introuvable."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    ranked = get_related_index().similar_to_question(pk, related_limit(request))
+    return Response(suggestion_entries(ranked))
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def duplicate_questions(request):
+    """Existing questions close enough to a draft to be duplicates, to check before posting it"""
+    serializer = DuplicateCheckSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    draft = serializer.validated_data
+    ranked = get_related_index().similar_to_text(
+        draft['title'], draft['content'], [tag.name for tag in draft['tag_ids']], limit=related_limit(request)
+    )
+    return Response(suggestion_entries(ranked))
+
+
 class AnswerCreateView(generics.CreateAPIView):
     """Create an answer to a question"""
     serializer_class = AnswerSerializer
@@ -94,18 +251,36 @@ class AnswerCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         question_id = self.kwargs.get('question_id')
         print(f"🎯 Création réponse - Question ID: {question_id}, User: {self.request.user.username}")
-        serializer.save(
-            author=self.request.user,
-            question_id=question_id
-        )
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                question_id=question_id
+            )
+            counters.answer_added(question_id)
 
 
-class AnswerDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AnswerDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete an answer"""
     queryset = Answer.objects.all()
     serializer_class = AnswerSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
+    def retrieve(self, request, *args, **kwargs):
+        # Votes and comments bump the version of the answer's question
+        state = Answer.objects.filter(pk=kwargs['pk']).values(
+            'updated_at', 'question__version', 'question__last_activity_at'
+        ).first()
+        if state is None:
+            raise Http404
+        etag, last_modified = conditional.make_validators(
+            'answer', kwargs['pk'], state['question__version'], response_cache.normalized_query(request),
+            user=request.user, updated_at=state['updated_at'], last_activity_at=state['question__last_activity_at'],
+        )
+        not_modified = conditional.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return conditional.set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
+    
     def perform_update(self, serializer):
         if serializer.instance.author != self.request.user:
             return Response(
@@ -138,12 +313,21 @@ def accept_answer(request, pk):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Remove previous accepted answer if exists
-        Answer.objects.filter(question=question, is_accepted=True).update(is_accepted=False)
-        
-        # Accept this answer
-        answer.is_accepted = True
-        answer.save()
+        with transaction.atomic():
+            previously_accepted = list(
+                Answer.objects.select_for_update()
+                .filter(question=question, is_accepted=True)
+                .values_list('pk', 'author_id')
+            )
+            
+            # Remove previous accepted answer if exists
+            Answer.objects.filter(question=question, is_accepted=True).update(is_accepted=False)
+            
+            # Accept this answer
+            answer.is_accepted = True
+            answer.save()
+            counters.answer_accepted(question.pk)
+            reputation.answer_accepted(answer, question, previously_accepted)
         
         serializer = AnswerSerializer(answer, context={'request': request})
         return Response(serializer.data)
@@ -171,27 +355,21 @@ class CommentCreateView(generics.CreateAPIView):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def vote_question(request, pk):
-    """Vote on a question"""
+    """Vote on a question (value 1 or -1), or withdraw the vote with 0"""
     try:
-        question = Question.objects.get(pk=pk)
+        question = Question.objects.only('id', 'author_id').get(pk=pk)
         value = request.data.get('value')
         
-        if value not in [1, -1]:
+        if value not in voting.VALUES:
             return Response(
-                {"detail": "La valeur du vote doit être 1 ou -1."},
+                {"detail": "La valeur du vote doit être 1, -1 ou 0."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update or create vote
-        vote, created = Vote.objects.update_or_create(
-            user=request.user,
-            question=question,
-            defaults={'value': value}
-        )
-        
+        result = voting.cast_vote(request.user, question, value)
         return Response({
-            "vote_count": question.vote_count,
-            "user_vote": value
+            "vote_count": result.score,
+            "user_vote": result.new_value
         })
     
     except Question.DoesNotExist:
@@ -204,27 +382,21 @@ def vote_question(request, pk):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def vote_answer(request, pk):
-    """Vote on an answer"""
+    """Vote on an answer (value 1 or -1), or withdraw the vote with 0"""
     try:
-        answer = Answer.objects.get(pk=pk)
+        answer = Answer.objects.only('id', 'author_id', 'question_id').get(pk=pk)
         value = request.data.get('value')
         
-        if value not in [1, -1]:
+        if value not in voting.VALUES:
             return Response(
-                {"detail": "La valeur du vote doit être 1 ou -1."},
+                {"detail": "La valeur du vote doit être 1, -1 ou 0."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update or create vote
-        vote, created = Vote.objects.update_or_create(
-            user=request.user,
-            answer=answer,
-            defaults={'value': value}
-        )
-        
+        result = voting.cast_vote(request.user, answer, value)
         return Response({
-            "vote_count": answer.vote_count,
-            "user_vote": value
+            "vote_count": result.score,
+            "user_vote": result.new_value
         })
     
     except Answer.DoesNotExist:
@@ -234,20 +406,172 @@ def vote_answer(request, pk):
         )
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_vote(request):
+    """Apply a batch of question and answer votes, e.g. queued by an offline client"""
+    items = request.data.get('votes') if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response(
+            {"detail": "Envoyez une liste de votes non vide."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(items) > voting.MAX_BATCH:
+        return Response(
+            {"detail": f"Pas plus de {voting.MAX_BATCH} votes par requête."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    results, valid = [], []
+    for index, item in enumerate(items):
+        serializer = BulkVoteItemSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+            results.append(None)
+        else:
+            results.append({"status": "invalid", "errors": serializer.errors})
+    
+    outcomes = voting.cast_votes(request.user, [data for _, data in valid])
+    not_found = {'question': "Question introuvable.", 'answer': "Réponse introuvable."}
+    for index, data in valid:
+        kind = 'question' if 'question' in data else 'answer'
+        outcome = outcomes.get((kind, data[kind]))
+        if outcome is None:
+            results[index] = {kind: data[kind], "status": "not_found", "detail": not_found[kind]}
+        else:
+            results[index] = {
+                kind: data[kind],
+                "status": "ok",
+                "vote_count": outcome.score,
+                "user_vote": outcome.new_value,
+            }
+    return Response({"results": results})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_corpus(request):
+    """Stream every question with its answers, comments and tags as NDJSON (admins only)"""
+    since = request.query_params.get('since')
+    if since:
+        try:
+            since = export.parse_since(since)
+        except ValueError:
+            return Response(
+                {"detail": "Date invalide, utilisez le format ISO 8601."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    compress = request.query_params.get('compress') == 'gzip'
+    # Next incremental export: ?since=<X-Export-Started>
+    started = timezone.now()
+    chunks = export.export_chunks(since or None, compress=compress)
+    if isinstance(request._request, ASGIRequest):
+        # A sync iterator would be read to the end before anything is sent
+        chunks = export.async_chunks(chunks)
+    response = StreamingHttpResponse(
+        chunks,
+        content_type='application/gzip' if compress else 'application/x-ndjson',
+    )
+    filename = 'corpus.ndjson.gz' if compress else 'corpus.ndjson'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Export-Started'] = started.isoformat()
+    return response
+
+
 class TagListView(generics.ListAPIView):
-    """List all tags"""
+    """List all tags, served from the cached tag directory"""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = TagPagination
+    
+    def list(self, request, *args, **kwargs):
+        return response_cache.cached_response(request, [response_cache.TAG_LIST], lambda: self.list_tags(request))
+    
+    def list_tags(self, request):
+        # Entries are already serialized, with precomputed questions_count
+        entries = get_tag_directory()
+        
+        # Filter by name prefix
+        prefix = request.query_params.get('prefix', None)
+        if prefix:
+            entries = filter_by_prefix(entries, prefix)
+        
+        # The whole directory, written out in chunks instead of one JSON document
+        if request.query_params.get('page_size') == 'all':
+            return StreamingJSONResponse(entries)
+        
+        page = self.paginate_queryset(entries)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(entries)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def related_tags(request, pk):
+    """Tags most often used together with this one, with their number of shared questions"""
+    def build():
+        if not Tag.objects.filter(pk=pk).exists():
+            return Response(
+                {"detail": "Tag introuvable."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(tag_cooccurrence.related_tags(pk, related_limit(request)))
+    
+    return response_cache.cached_response(request, [response_cache.TAG_LIST], build)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def suggest_tags(request):
+    """Tags for a question draft (?title=, ?content=), given the ?tag_ids= already picked"""
+    params = request.query_params
+    try:
+        tag_ids = [int(tag_id) for tag_id in params.get('tag_ids', '').split(',') if tag_id.strip()]
+    except ValueError:
+        return Response(
+            {"detail": "tag_ids doit être une liste d'identifiants séparés par des virgules."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    suggestions = tag_cooccurrence.suggest_tags(
+        params.get('title', ''), params.get('content', ''), tag_ids, limit=related_limit(request)
+    )
+    return Response(suggestions)
 
 
 # AJOUTEZ UserAnswersView ICI À LA FIN si vous en avez besoin
-class UserAnswersView(generics.ListAPIView):
+class UserAnswersView(SparseFieldsViewMixin, generics.ListAPIView):
     """Récupérer toutes les réponses d'un utilisateur"""
     serializer_class = AnswerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
-        return Answer.objects.filter(author_id=user_id).order_by('-created_at')
+        queryset = Answer.objects.filter(author_id=user_id).order_by('-created_at', '-id')
+        if fast_serializers.enabled(self.request):
+            return queryset.values(*fast_serializers.ANSWER_FIELDS)
+        return queryset.prefetch_related(*answer_prefetches(FieldSpec.from_request(self.request)))
+    
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        fast = fast_serializers.enabled(request)
+        
+        # The caller's votes on the page's answers, in one query
+        answer_votes = None
+        if FieldSpec.from_request(request).wants('user_vote'):
+            answer_ids = [row['id'] if fast else row.pk for row in page]
+            answer_votes = Vote.values_for_answers(request.user, answer_ids)
+        
+        if fast:
+            return self.get_paginated_response(fast_serializers.answer_list(page, request, answer_votes))
+        context = self.get_serializer_context()
+        if answer_votes is not None:
+            context['answer_votes'] = answer_votes
+        serializer = self.get_serializer_class()(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
+    
+    def get_keyset_ordering(self):
+        return ('-created_at', '-id')
     
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""Race-free vote casting.
+
+A vote is written with a single ``INSERT ... ON CONFLICT DO UPDATE``
+statement on the (user, question) / (user, answer) unique constraint, so
+concurrent requests never hit an IntegrityError. On PostgreSQL the
+statement reports whether the row was inserted, changed or left alone;
+as a vote is either 1 or -1 that is enough to know the old value without
+reading it first. Other databases read it under the row lock first.
+The score delta is then applied with ``UPDATE ... RETURNING``, which
+gives back the new score without a COUNT.
+
+A value of 0 withdraws the vote with ``DELETE ... RETURNING``. These raw
+statements bypass the Vote model signals on purpose: the counters and
+reputation are adjusted here, once. ``votes_changed`` is sent instead for
+the receivers that only need to know which posts changed.
+
+``cast_votes`` applies a whole batch (offline clients replaying their
+queue) with ``bulk_create(update_conflicts=True)`` and one aggregated
+UPDATE per table for the scores and the reputation.
+
+Requires RETURNING support (PostgreSQL, SQLite >= 3.35).
+"""
+from typing import NamedTuple
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import reputation
+from .counters import vote_delta
+from .models import Answer, Question, User, Vote
+
+UNVOTE = 0
+VALUES = (1, -1, UNVOTE)
+MAX_BATCH = 100
+TARGET_MODELS = {'question': Question, 'answer': Answer}
+
+# Sent with question_ids (questions whose score changed) and
+# answer_question_ids (the questions of the answers whose score changed)
+votes_changed = Signal()
+
+
+class VoteResult(NamedTuple):
+    old_value: int | None
+    new_value: int | None
+    score: int
+
+
+def _target_column(target):
+    return 'question_id' if isinstance(target, Question) else 'answer_id'
+
+
+def upsert_vote(user_id, column, target_id, value):
+    """Insert or change a vote, returns the previous value (None if there was none)"""
+    qn = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {qn(Vote._meta.db_table)} ({qn('user_id')}, {qn(column)}, {qn('value')}, {qn('created_at')}) "
+        f"VALUES (%s, %s, %s, %s) "
+        f"ON CONFLICT ({qn('user_id')}, {qn(column)}) DO UPDATE SET {qn('value')} = EXCLUDED.{qn('value')} "
+        f"WHERE {qn(Vote._meta.db_table)}.{qn('value')} <> EXCLUDED.{qn('value')}"
+    )
+    params = [user_id, target_id, value, connection.ops.adapt_datetimefield_value(timezone.now())]
+    if connection.vendor != 'postgresql':
+        previous = (
+            Vote.objects.select_for_update().filter(user_id=user_id, **{column: target_id})
+            .values_list('value', flat=True).first()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        return previous
+    with connection.cursor() as cursor:
+        # xmax is 0 in a row version written by an insert
+        cursor.execute(f"{sql} RETURNING (xmax = 0)", params)
+        row = cursor.fetchone()
+    if row is None:
+        # Conflict with an identical vote, the WHERE clause skipped the update
+        return value
+    return None if row[0] else -value
+
+
+def delete_vote(user_id, column, target_id):
+    """Withdraw a vote, returns its value (None if there was none)"""
+    qn = connection.ops.quote_name
+    sql = (
+        f"DELETE FROM {qn(Vote._meta.db_table)} WHERE {qn('user_id')} = %s AND {qn(column)} = %s "
+        f"RETURNING {qn('value')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, target_id])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def apply_score_delta(model, target_id, delta):
+    """Add ``delta`` to the stored score and return the new score"""
+    if not delta:
+        return model.objects.values_list('score', flat=True).get(pk=target_id)
+    qn = connection.ops.quote_name
+    sql = (
+        f"UPDATE {qn(model._meta.db_table)} SET {qn('score')} = {qn('score')} + %s "
+        f"WHERE {qn('id')} = %s RETURNING {qn('score')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [delta, target_id])
+        return cursor.fetchone()[0]
+
+
+def cast_vote(user, target, value):
+    """Set ``user``'s vote on a Question or Answer to 1, -1 or UNVOTE.
+
+    Updates the stored score and the author's reputation in the same
+    transaction and returns a VoteResult.
+    """
+    column = _target_column(target)
+    with transaction.atomic():
+        if value == UNVOTE:
+            old_value = delete_vote(user.pk, column, target.pk)
+            new_value = None
+        else:
+            old_value = upsert_vote(user.pk, column, target.pk, value)
+            new_value = value
+        delta = vote_delta(old_value, new_value)
+        score = apply_score_delta(type(target), target.pk, delta)
+        if isinstance(target, Question):
+            reputation.question_vote_changed(target.pk, target.author_id, old_value, new_value)
+            changed = {'question_ids': [target.pk], 'answer_question_ids': []}
+        else:
+            reputation.answer_vote_changed(target.pk, target.author_id, old_value, new_value)
+            changed = {'question_ids': [], 'answer_question_ids': [target.question_id]}
+        if delta:
+            votes_changed.send(sender=Vote, **changed)
+    return VoteResult(old_value, new_value, score)
+
+
+def delete_votes(user_id, column, target_ids):
+    qn = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(target_ids))
+    sql = (
+        f"DELETE FROM {qn(Vote._meta.db_table)} WHERE {qn('user_id')} = %s AND {qn(column)} IN ({placeholders})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *target_ids])
+
+
+def apply_score_deltas(model, deltas):
+    """Apply {target_id: delta} with one UPDATE, returns {target_id: new score}"""
+    changed = {pk: delta for pk, delta in deltas.items() if delta}
+    if changed:
+        model.objects.filter(pk__in=changed).update(score=F('score') + Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in changed.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    return dict(model.objects.filter(pk__in=deltas).values_list('pk', 'score'))
+
+
+def cast_votes(user, items):
+    """Apply a batch of ``user``'s votes.
+
+    ``items`` are dicts with a 'question' or an 'answer' id and a 'value';
+    the last entry for a post wins. Returns {(kind, target_id): VoteResult},
+    posts that do not exist are left out.
+    """
+    wanted = {kind: {} for kind in TARGET_MODELS}
+    for item in items:
+        kind = 'question' if 'question' in item else 'answer'
+        wanted[kind][item[kind]] = item['value']
+
+    results, changes = {}, []
+    changed = {'question_ids': set(), 'answer_question_ids': set()}
+    with transaction.atomic():
+        # Serializes concurrent batches of the same user, which read the
+        # old values before writing
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk'))
+        for kind, values in wanted.items():
+            if not values:
+                continue
+            model = TARGET_MODELS[kind]
+            column = f'{kind}_id'
+            if kind == 'question':
+                targets = model.objects.filter(pk__in=values).values_list('pk', 'author_id', 'pk')
+            else:
+                targets = model.objects.filter(pk__in=values).values_list('pk', 'author_id', 'question_id')
+            authors, questions = {}, {}
+            for pk, author_id, question_id in targets:
+                authors[pk] = author_id
+                questions[pk] = question_id
+            values = {pk: value for pk, value in values.items() if pk in authors}
+            old = dict(
+                Vote.objects.select_for_update()
+                .filter(user=user, **{f'{column}__in': values})
+                .values_list(column, 'value')
+            )
+            upserts = [
+                Vote(user=user, value=value, **{column: pk})
+                for pk, value in values.items()
+                if value != UNVOTE and old.get(pk) != value
+            ]
+            if upserts:
+                Vote.objects.bulk_create(
+                    upserts, update_conflicts=True, unique_fields=['user', kind], update_fields=['value']
+                )
+            withdrawn = [pk for pk, value in values.items() if value == UNVOTE and pk in old]
+            if withdrawn:
+                delete_votes(user.pk, column, withdrawn)
+
+            new = {pk: value or None for pk, value in values.items()}
+            scores = apply_score_deltas(model, {pk: vote_delta(old.get(pk), new[pk]) for pk in values})
+            for pk in values:
+                changes.append((kind, pk, authors[pk], old.get(pk), new[pk]))
+                results[(kind, pk)] = VoteResult(old.get(pk), new[pk], scores[pk])
+                if old.get(pk) != new[pk]:
+                    changed[f'{kind}_ids' if kind == 'question' else 'answer_question_ids'].add(questions[pk])
+        reputation.votes_changed(changes)
+        if any(changed.values()):
+            votes_changed.send(sender=Vote, **{name: sorted(ids) for name, ids in changed.items()})
+    return results
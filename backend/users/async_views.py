@@ -0,0 +1,36 @@
+"""Async version of the public profile endpoint, see questions/async_views.py"""
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from rest_framework import serializers
+
+from config.async_api import async_api_view, delegate, json_response
+from config.sparse_fields import FieldSpec
+from .views import UserDetailView
+
+User = get_user_model()
+
+sync_user_detail = UserDetailView.as_view()
+
+# DRF's own formatting, so the output matches UserProfileSerializer
+format_datetime = serializers.DateTimeField().to_representation
+
+
+@async_api_view
+async def user_detail(request, pk):
+    if not FieldSpec.from_request(request).is_full:
+        return await delegate(sync_user_detail, request, pk=pk)
+    user = await User.objects.filter(pk=pk).afirst()
+    if user is None:
+        raise Http404
+    return json_response({
+        'id': user.pk,
+        'username': user.username,
+        'email': user.email,
+        'bio': user.bio,
+        'avatar': request.build_absolute_uri(user.avatar.url) if user.avatar else None,
+        'reputation': user.reputation,
+        'created_at': format_datetime(user.created_at),
+        'questions_count': await user.questions.acount(),
+        'answers_count': await user.answers.acount(),
+        'total_votes': user.total_votes,
+    })
@@ -9,6 +9,9 @@ class User(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
     reputation = models.IntegerField(default=0)
+    # Sum of the votes received on the user's questions and answers,
+    # maintained by questions.reputation
+    total_votes = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
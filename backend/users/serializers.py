@@ -1,11 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from config.sparse_fields import SparseFieldsMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     questions_count = serializers.SerializerMethodField()
     answers_count = serializers.SerializerMethodField()
@@ -19,10 +20,17 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'reputation', 'created_at']
     
     def get_questions_count(self, obj):
-        return obj.questions.count()
+        # Annotated by questions.models.users_with_post_counts() when prefetched
+        count = getattr(obj, 'questions_total', None)
+        if count is None:
+            count = obj.questions.count()
+        return count
     
     def get_answers_count(self, obj):
-        return obj.answers.count()
+        count = getattr(obj, 'answers_total', None)
+        if count is None:
+            count = obj.answers.count()
+        return count
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -51,7 +59,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Detailed user profile serializer"""
     questions_count = serializers.SerializerMethodField()
     answers_count = serializers.SerializerMethodField()
@@ -72,7 +80,6 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return obj.answers.count()
     
     def get_total_votes(self, obj):
-        questions_votes = sum([q.vote_count for q in obj.questions.all()])
-        answers_votes = sum([a.vote_count for a in obj.answers.all()])
-        return questions_votes + answers_votes
+        # Maintained incrementally by questions.reputation
+        return obj.total_votes
     
\ No newline at end of file
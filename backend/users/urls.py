@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import RegisterView, ProfileView, UserDetailView
+from . import async_views
 
 urlpatterns = [
     # JWT endpoints
@@ -11,4 +12,7 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user_detail'),
+    
+    # Async read endpoint for the ASGI server, see users/async_views.py
+    path('async/users/<int:pk>/', async_views.user_detail, name='async_user_detail'),
 ]
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from config.sparse_fields import SparseFieldsViewMixin, check_fields
 from .serializers import RegisterSerializer, UserSerializer, UserProfileSerializer
 
 User = get_user_model()
@@ -20,7 +21,8 @@ class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        check_fields(request, UserSerializer)
+        serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data)
     
     def put(self, request):
@@ -35,7 +37,7 @@ class ProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """Public user profile endpoint"""
     queryset = User.objects.all()
     serializer_class = UserProfileSerializer